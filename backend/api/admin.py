@@ -1,37 +1,117 @@
 from django.contrib import admin
-from .models import Supplier, Invoice, Pin, Vessel
-from django.utils.html import format_html
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.functional import cached_property
+from .models import Supplier, Invoice, Pin, Vessel, SupplierMonthlySummary, VesselMonthlySummary
+from .search import search_invoices
+from django.utils.html import format_html, format_html_join
 
-class InvoiceInline(admin.TabularInline): 
-    model = Invoice
-    extra = 1  # number of empty invoice rows to show
-    fields = ("invoice_number", "vessel","submitted_date", "amount_due", "description")
-    readonly_fields = ("date_created", "date_modified")
+# Below this many rows an exact COUNT(*) is cheap enough.
+ESTIMATE_COUNT_THRESHOLD = 100000
+
+
+def estimated_row_count(model):
+    """The database's own row estimate for model's table, or None."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the table estimate instead of COUNT(*) for unfiltered changelists
+    of large tables; filtered and small lists are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate > ESTIMATE_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+def summary_invoice_count(summary_model, owner_field):
+    """Correlated sum over one owner's monthly summary rows: O(1) per row."""
+    total = (
+        summary_model.objects.filter(**{owner_field: OuterRef("pk")})
+        .order_by()
+        .values(owner_field)
+        .annotate(total=Sum("invoice_count"))
+        .values("total")
+    )
+    return Coalesce(Subquery(total), Value(0))
 
-    @admin.display(description="Vessel")
-    def vessel_name(self, obj):
-        return obj.vessel.vessel_name if obj.vessel else "-"
 
 @admin.register(Supplier)
 class SupplierAdmin(admin.ModelAdmin):
     list_display = ("supplier_name", "supplier_id","invoice_count", "date_created")
     search_fields = ("supplier_name",)
-    inlines = [InvoiceInline]
+    readonly_fields = ("recent_invoices",)
+    show_full_result_count = False
 
-    @admin.display(description="Invoices")
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            summary_invoice_count=summary_invoice_count(SupplierMonthlySummary, "supplier")
+        )
+
+    @admin.display(description="Invoices", ordering="summary_invoice_count")
     def invoice_count(self, obj):
-        return obj.invoices.count()
+        return obj.summary_invoice_count
+
+    @admin.display(description="Recent invoices")
+    def recent_invoices(self, obj):
+        # A supplier can have thousands of invoices: show the latest few and
+        # link to the paginated invoice changelist instead of an inline.
+        if obj is None or obj.pk is None:
+            return "-"
+        invoices = obj.invoices.select_related("vessel").order_by("-date_created")[:10]
+        rows = format_html_join(
+            "",
+            "<li><a href='{}'>{}</a> &middot; {} &middot; {}</li>",
+            (
+                (reverse("admin:api_invoice_change", args=[invoice.pk]), invoice.invoice_number,
+                 invoice.vessel.vessel_name, invoice.amount_due)
+                for invoice in invoices
+            ),
+        )
+        return format_html(
+            "<ul>{}</ul><a href='{}?supplier__exact={}'>All invoices of this supplier</a>",
+            rows,
+            reverse("admin:api_invoice_changelist"),
+            obj.pk,
+        )
 
 @admin.register(Pin)
 class PinAdmin(admin.ModelAdmin):
     list_display = (
         "supplier",
         "is_locked",
+        "locked_until",
         "created_at"
         )
     # readonly_fields = ("pin_code",)
     ordering = ("created_at",)
-    search_fields = ("supplier",)
+    search_fields = ("supplier__supplier_name",)
+    list_select_related = ("supplier",)
+    autocomplete_fields = ("supplier",)
+    show_full_result_count = False
 
     def save_model(self,request,obj,form,change):
         raw_pin = form.cleaned_data.get("pin_code")
@@ -41,15 +121,38 @@ class PinAdmin(admin.ModelAdmin):
 
 @admin.register(Vessel)
 class VesselAdmin(admin.ModelAdmin):
-    list_display = ("vessel_name", "vessel_id","created_at", "updated_at")
+    list_display = ("vessel_name", "vessel_id", "invoice_count", "created_at", "updated_at")
     search_fields = ("vessel_name",)
     ordering = ("vessel_name",)
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            summary_invoice_count=summary_invoice_count(VesselMonthlySummary, "vessel")
+        )
+
+    @admin.display(description="Invoices", ordering="summary_invoice_count")
+    def invoice_count(self, obj):
+        return obj.summary_invoice_count
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
     list_display = ("invoice_number", "supplier","vessel", "amount_due", "submitted_date", "pdf_link")
-    list_filter = ("supplier", "submitted_date")
+    # No supplier dropdown filter (10k options); filter with ?supplier__exact=<id>,
+    # e.g. from the supplier page, or search by name.
+    list_filter = ("submitted_date",)
     search_fields = ("invoice_number", "supplier__supplier_name", "vessel__vessel_name")
+    readonly_fields = ("pdf_preview",)
+    list_select_related = ("supplier", "vessel")
+    autocomplete_fields = ("supplier", "vessel")
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the token index (api.search) rather than icontains over three joins.
+        if not search_term.strip():
+            return queryset, False
+        return search_invoices(queryset, search_term), False
 
     @admin.display(description="PDF File")
     def pdf_link(self, obj):
@@ -61,9 +164,45 @@ class InvoiceAdmin(admin.ModelAdmin):
     
     @admin.display(description="PDF Preview")
     def pdf_preview(self, obj):
-        if obj.pdf_file:
+        if not obj.pdf_file:
+            return "No PDF uploaded"
+
+        preview = getattr(obj.pdf_blob, "preview", None) if obj.pdf_blob_id else None
+        if preview is not None and preview.thumbnail:
             return format_html(
-                "<iframe src='{}' width='100%' height='500px' style='border:none;'></iframe>",
-                obj.pdf_file.url
+                "<a href='{}' target='_blank'><img src='{}' alt='First page' style='max-width:320px;'></a>"
+                "<br>{} page(s)",
+                obj.pdf_file.url,
+                preview.thumbnail.url,
+                preview.page_count,
             )
-        return "No PDF uploaded"
\ No newline at end of file
+        return format_html(
+            "<a href='{}' target='_blank'>View PDF</a> (preview not ready yet)", obj.pdf_file.url
+        )
+
+
+class MonthlySummaryAdmin(admin.ModelAdmin):
+    """Read-only: rows are maintained by api.summaries."""
+    list_display = ("month", "invoice_count", "amount_total")
+    list_filter = ("month",)
+    date_hierarchy = "month"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SupplierMonthlySummary)
+class SupplierMonthlySummaryAdmin(MonthlySummaryAdmin):
+    list_display = ("supplier",) + MonthlySummaryAdmin.list_display
+    list_select_related = ("supplier",)
+    search_fields = ("supplier__supplier_name",)
+
+
+@admin.register(VesselMonthlySummary)
+class VesselMonthlySummaryAdmin(MonthlySummaryAdmin):
+    list_display = ("vessel",) + MonthlySummaryAdmin.list_display
+    list_select_related = ("vessel",)
+    search_fields = ("vessel__vessel_name",)
@@ -0,0 +1,74 @@
+import json
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from .renderers import FastJSONRenderer
+
+
+class AsyncAPIView(View):
+    """
+    Base for read endpoints served natively under ASGI (server.asgi).
+
+    DRF's APIView is synchronous, so under ASGI each request to one holds a
+    worker thread from authentication to rendering. These views keep what
+    the read endpoints used from it: bearer authentication through the
+    classes' aauthenticate(), request.user, has_permission() checks, DRF's
+    exceptions answered with the same status codes and {"detail": ...}
+    bodies, and FastJSONRenderer output. Handlers are `async def` and query
+    with the async ORM; under WSGI Django runs them in a per-request loop.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Bearer tokens, not cookies, authenticate these views, as with APIView.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            self.check_permissions(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        for authentication_class in self.authentication_classes:
+            result = await authentication_class().aauthenticate(request)
+            if result is not None:
+                return result[0]
+        return AnonymousUser()
+
+    def check_permissions(self, request):
+        for permission_class in self.permission_classes:
+            permission = permission_class()
+            if not permission.has_permission(request, self):
+                # Suppliers have no is_authenticated to ask.
+                if isinstance(request.user, AnonymousUser):
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    def handle_exception(self, exc):
+        status_code = exc.status_code
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # The authentication classes send no WWW-Authenticate challenge,
+            # so DRF answers these with 403 as well.
+            status_code = status.HTTP_403_FORBIDDEN
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        return self.render(data, status=status_code)
+
+    def get_json(self, request):
+        """The request's JSON body, {} when empty; ParseError when malformed."""
+        if not request.body:
+            return {}
+        try:
+            return json.loads(request.body)
+        except ValueError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(FastJSONRenderer().render(data), status=status, content_type="application/json")
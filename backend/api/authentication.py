@@ -1,33 +1,172 @@
 # app/authentication.py
+import time
 import jwt
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import authentication, exceptions
-from .models import Supplier
+from .caches import TTLCache
+from .models import Supplier, Pin
+from .tokens import REFRESH
+
+
+# Raw token -> decoded payload, so repeat requests skip signature checks.
+token_cache = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL,
+)
+
+# ("supplier", supplier_id) / ("user", user_id) -> resolved principal.
+# Evicted by api.signals when the principal changes.
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL,
+)
+
+
+def supplier_cache_key(supplier_id):
+    return ("supplier", str(supplier_id))
+
+
+def user_cache_key(user_id):
+    return ("user", str(user_id))
+
+
+def get_bearer_payload(request):
+    """
+    Return the decoded JWT payload from the Authorization header,
+    or None when the request carries no bearer token.
+    """
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+
+    token = auth_header.split(" ")[1]
+    payload = token_cache.get(token)
+    if payload is not None:
+        if payload.get("exp") is not None and payload["exp"] <= time.time():
+            token_cache.delete(token)
+            raise exceptions.AuthenticationFailed("Access token expired")
+        return payload
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        raise exceptions.AuthenticationFailed("Access token expired")
+    except jwt.InvalidTokenError:
+        raise exceptions.AuthenticationFailed("Invalid token")
+    if payload.get("type") == REFRESH:
+        # Refresh tokens are only accepted by token/refresh/.
+        raise exceptions.AuthenticationFailed("Invalid token")
+
+    ttl = None
+    if payload.get("exp") is not None:
+        ttl = payload["exp"] - time.time()
+    token_cache.set(token, payload, ttl=ttl)
+    return payload
+
+
+class PrincipalJWTAuthentication(authentication.BaseAuthentication):
+    """
+    Shared by the bearer token classes below: the token's `claim` names
+    the principal, which is loaded once per principal_cache lifetime.
+    Subclasses say how to load it (principals(), lookup_field), when a
+    cached one is too old for the token (stale()) and vet it in
+    authenticated(principal, payload). Tokens without the claim
+    are left to the other class.
+    """
+    claim = None
+    lookup_field = None
+    missing_message = None
+
+    def principals(self):
+        raise NotImplementedError
+
+    def cache_key(self, principal_id):
+        raise NotImplementedError
+
+    def resolve(self, request):
+        """
+        Return (payload, cache key, principal id, cached principal or None)
+        for the request's bearer token, or None when it does not name a
+        principal of this kind.
+        """
+        payload = get_bearer_payload(request)
+        if payload is None or not payload.get(self.claim):
+            return None
+        principal_id = payload[self.claim]
+        cache_key = self.cache_key(principal_id)
+        principal = principal_cache.get(cache_key)
+        if principal is not None and self.stale(principal, payload):
+            principal_cache.delete(cache_key)
+            principal = None
+        return payload, cache_key, principal_id, principal
+
+    def stale(self, principal, payload):
+        """Whether the cached principal predates the token, so must be reloaded."""
+        return False
+
+    def authenticate(self, request):
+        resolved = self.resolve(request)
+        if resolved is None:
+            return None
+        payload, cache_key, principal_id, principal = resolved
+        if principal is None:
+            try:
+                principal = self.principals().get(**{self.lookup_field: principal_id})
+            except ObjectDoesNotExist:
+                raise exceptions.AuthenticationFailed(self.missing_message)
+            principal_cache.set(cache_key, principal)
+        return self.authenticated(principal, payload)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views (api.async_views), on the async ORM."""
+        resolved = self.resolve(request)
+        if resolved is None:
+            return None
+        payload, cache_key, principal_id, principal = resolved
+        if principal is None:
+            try:
+                principal = await self.principals().aget(**{self.lookup_field: principal_id})
+            except ObjectDoesNotExist:
+                raise exceptions.AuthenticationFailed(self.missing_message)
+            principal_cache.set(cache_key, principal)
+        return self.authenticated(principal, payload)
 
 
 # ------------------------------------
 #  Supplier JWT Authentication (PIN) -
 # ----------------------------------=-
-class JWTAuthentication(authentication.BaseAuthentication):
-    def authenticate(self, request):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return None
+class JWTAuthentication(PrincipalJWTAuthentication):
+    claim = "supplier_id"
+    lookup_field = "supplier_id"
+    missing_message = "No such supplier"
 
-        token = auth_header.split(" ")[1]
+    def principals(self):
+        return Supplier.objects.select_related("pin")
+
+    def cache_key(self, principal_id):
+        return supplier_cache_key(principal_id)
+
+    def stale(self, supplier, payload):
+        # A token for a newer PIN than the cached one: the PIN was changed
+        # since this worker cached the supplier.
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        except jwt.ExpiredSignatureError:
-            raise exceptions.AuthenticationFailed("Access token expired")
-        except jwt.InvalidTokenError:
-            raise exceptions.AuthenticationFailed("Invalid token")
+            return payload.get("pin_version", 0) > supplier.pin.token_version
+        except Pin.DoesNotExist:
+            return False
 
-        supplier_id = payload.get("supplier_id")
+    def authenticated(self, supplier, payload):
+        # The pin was loaded with the supplier, so this costs no query.
         try:
-            supplier = Supplier.objects.get(supplier_id=supplier_id)
-        except Supplier.DoesNotExist:
-            raise exceptions.AuthenticationFailed("No such supplier")
+            if supplier.pin.lock_active:
+                raise exceptions.AuthenticationFailed("Account is locked")
+            # Tokens from verify-pin/ name the PIN version; a changed PIN
+            # (Pin.set_pin) ends them. stale() reloaded newer ones.
+            if payload.get("pin_version", supplier.pin.token_version) < supplier.pin.token_version:
+                raise exceptions.AuthenticationFailed("Token revoked")
+        except Pin.DoesNotExist:
+            pass
 
         return (supplier, None)
 
@@ -35,31 +174,52 @@ class JWTAuthentication(authentication.BaseAuthentication):
 # -----------------------------------
 #  Django User JWT Authentication   -
 # -----------------------------------
-class UserJWTAuthentication(authentication.BaseAuthentication):
-    def authenticate(self, request):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return None
+class UserJWTAuthentication(PrincipalJWTAuthentication):
+    claim = "user_id"
+    lookup_field = "id"
+    missing_message = "No such user"
 
-        token = auth_header.split(" ")[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        except jwt.ExpiredSignatureError:
-            raise exceptions.AuthenticationFailed("Access token expired")
-        except jwt.InvalidTokenError:
-            raise exceptions.AuthenticationFailed("Invalid token")
+    def principals(self):
+        return User.objects.all()
 
-        user_id = payload.get("user_id")
-        if not user_id:
-            return None
-
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise exceptions.AuthenticationFailed("No such user")
+    def cache_key(self, principal_id):
+        return user_cache_key(principal_id)
 
+    def authenticated(self, user, payload):
         if user.is_staff:
             raise exceptions.AuthenticationFailed("Staff users are not allowed here")
 
         return (user, None)
 
+
+def principal_authenticator(request):
+    """
+    Return (payload, authentication class instance) for the kind of
+    principal the bearer token names, or (None, None).
+    """
+    payload = get_bearer_payload(request)
+    if payload is not None:
+        for authenticator in (UserJWTAuthentication(), JWTAuthentication()):
+            if payload.get(authenticator.claim):
+                return payload, authenticator
+    return None, None
+
+
+def authenticate_principal(request):
+    """
+    Return (staff user or supplier, token exp) for the bearer token, or
+    (None, None) without one. For plain Django views that accept both
+    kinds of token; raises AuthenticationFailed like the classes above.
+    """
+    payload, authenticator = principal_authenticator(request)
+    if authenticator is None:
+        return None, None
+    return authenticator.authenticate(request)[0], payload.get("exp")
+
+
+async def aauthenticate_principal(request):
+    """authenticate_principal() for async views, on the async ORM."""
+    payload, authenticator = principal_authenticator(request)
+    if authenticator is None:
+        return None, None
+    return (await authenticator.aauthenticate(request))[0], payload.get("exp")
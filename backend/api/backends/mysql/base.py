@@ -0,0 +1,130 @@
+"""
+MySQL/MariaDB backend with a per-process connection pool.
+
+Enabled like Django's PostgreSQL pool, with OPTIONS["pool"] set to True
+or to a dict of api.connection_pool.ConnectionPool options (min_size,
+max_size, timeout, max_idle, stats_interval). CONN_MAX_AGE must be 0:
+Django "closes" the connection at the end of every request, which here
+returns it to the pool instead of ending the session. Without
+OPTIONS["pool"] this is the stock mysql backend.
+"""
+import os
+import threading
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.mysql import base as mysql
+from django.db.utils import NO_DB_ALIAS
+from django.utils.asyncio import async_unsafe
+from api.connection_pool import ConnectionPool, PoolTimeout
+from .creation import DatabaseCreation
+
+Database = mysql.Database
+
+
+def open_connection(conn_params, isolation_level):
+    """A new connection with the session settings the stock backend applies on connect."""
+    connection = Database.connect(**conn_params)
+    if connection.encoders.get(bytes) is bytes:
+        connection.encoders.pop(bytes)
+
+    assignments = ["SET SQL_AUTO_IS_NULL = 0"]
+    if isolation_level:
+        assignments.append("SET SESSION TRANSACTION ISOLATION LEVEL %s" % isolation_level.upper())
+    with connection.cursor() as cursor:
+        cursor.execute("; ".join(assignments))
+        while cursor.nextset():
+            pass
+    return connection
+
+
+def check_connection(connection):
+    try:
+        connection.ping()
+    except Database.Error:
+        return False
+    return True
+
+
+def reset_connection(connection):
+    # Never hand out a connection with a transaction still open.
+    if not connection.get_autocommit():
+        connection.rollback()
+        connection.autocommit(True)
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    # alias -> ConnectionPool, shared by this process's per-thread wrappers.
+    _connection_pools = {}
+    _connection_pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+
+        pool = self._connection_pools.get(self.alias)
+        if pool is not None and pool.pid == os.getpid():
+            return pool
+
+        with self._connection_pools_lock:
+            pool = self._connection_pools.get(self.alias)
+            if pool is None or pool.pid != os.getpid():
+                if self.settings_dict.get("CONN_MAX_AGE", 0) != 0:
+                    raise ImproperlyConfigured("Pooling doesn't support persistent connections.")
+                if pool_options is True:
+                    pool_options = {}
+                conn_params = self.get_connection_params()
+                isolation_level = self.isolation_level
+                pool = self._connection_pools[self.alias] = ConnectionPool(
+                    connect=lambda: open_connection(conn_params, isolation_level),
+                    check=check_connection if self.settings_dict["CONN_HEALTH_CHECKS"] else None,
+                    reset=reset_connection,
+                    name=self.alias,
+                    **pool_options,
+                )
+        return pool
+
+    def close_pool(self):
+        pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        pool.open()
+        try:
+            return pool.getconn()
+        except PoolTimeout as e:
+            raise Database.OperationalError(str(e)) from e
+
+    def init_connection_state(self):
+        if self.pool is None:
+            return super().init_connection_state()
+        # Session settings were applied once, by open_connection(), and
+        # survive checkouts.
+        super(mysql.DatabaseWrapper, self).init_connection_state()
+
+    def _close(self):
+        if self.connection is not None and self.pool is not None:
+            with self.wrap_database_errors:
+                # A connection closed inside an atomic block may be mid
+                # transaction: drop it rather than reuse it.
+                self.pool.putconn(self.connection, discard=self.in_atomic_block)
+                self.connection = None
+            return
+        return super()._close()
+
+    def close_if_health_check_failed(self):
+        if self.pool is not None:
+            # The pool checks connections on checkout.
+            return
+        return super().close_if_health_check_failed()
@@ -0,0 +1,18 @@
+from django.db.backends.mysql.creation import DatabaseCreation as MySQLDatabaseCreation
+
+
+class DatabaseCreation(MySQLDatabaseCreation):
+    # The test database has another NAME: drop pooled connections to the
+    # old one whenever it changes, as Django's PostgreSQL pool does.
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        self.connection.close_pool()
+        return super()._create_test_db(verbosity, autoclobber, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self.connection.close_pool()
+        return super()._destroy_test_db(test_database_name, verbosity)
+
+    def set_as_test_mirror(self, primary_settings_dict):
+        self.connection.close_pool()
+        super().set_as_test_mirror(primary_settings_dict)
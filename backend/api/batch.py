@@ -0,0 +1,95 @@
+from collections import Counter
+from django.db import transaction
+from .bloom import invoice_number_filter
+from . import conditional, search, summaries, sync
+from .models import Invoice, PdfBlob, Supplier, Vessel
+
+
+def validate_batch(items):
+    """
+    Resolve suppliers and vessels and check invoice-number uniqueness for a
+    list of InvoiceBatchItemSerializer.validated_data dicts, in at most one
+    query per model for the whole batch.
+
+    Returns one error dict per item ({} when the item is fine) and replaces
+    the supplier/vessel ids in each item with model instances.
+    """
+    suppliers = Supplier.objects.in_bulk({item["supplier"] for item in items})
+    vessels = Vessel.objects.in_bulk({item["vessel"] for item in items})
+    numbers = [item["invoice_number"] for item in items]
+    taken = invoice_number_filter.existing(numbers)
+    repeated = {number for number, count in Counter(numbers).items() if count > 1}
+
+    errors = []
+    for item in items:
+        item_errors = {}
+        item["supplier"] = suppliers.get(item["supplier"])
+        item["vessel"] = vessels.get(item["vessel"])
+        if item["supplier"] is None:
+            item_errors["supplier"] = ["No such supplier"]
+        if item["vessel"] is None:
+            item_errors["vessel"] = ["No such vessel"]
+        if item["invoice_number"] in taken:
+            item_errors["invoice_number"] = ["invoice with this invoice number already exists."]
+        elif item["invoice_number"] in repeated:
+            item_errors["invoice_number"] = ["Invoice number appears more than once in this batch."]
+        errors.append(item_errors)
+    return errors
+
+
+def store_blobs(files):
+    """
+    Return a PdfBlob per file, looking already-stored content up in one
+    query, and the blobs that were not stored before.
+    """
+    known = PdfBlob.objects.in_bulk(
+        [uploaded.sha256 for uploaded in files if getattr(uploaded, "sha256", None)]
+    )
+    blobs, new = [], {}
+    for uploaded in files:
+        blob = known.get(getattr(uploaded, "sha256", None))
+        if blob is None:
+            blob = PdfBlob.store(uploaded)
+            known[blob.pk] = new[blob.pk] = blob
+        blobs.append(blob)
+    return blobs, list(new.values())
+
+
+def create_invoice_batch(items, batch_size=500):
+    """
+    Insert validated batch items with bulk_create in a single transaction.
+
+    PDFs are stored as blobs before the transaction opens, so it holds no
+    locks while files are written; blobs first stored here are deleted
+    again if the insert fails. bulk_create skips Invoice.save() and
+    post_save, so this calls the helpers behind the api.signals receivers
+    for the whole batch: blob references, search tokens, summary tables,
+    change log, list version and invoice numbers.
+    """
+    files = [item["pdf_file"] for item in items if item.get("pdf_file")]
+    blobs, new_blobs = store_blobs(files)
+    blobs = iter(blobs)
+
+    try:
+        with transaction.atomic():
+            invoices = []
+            for item in items:
+                invoice = Invoice(**{key: value for key, value in item.items() if key != "pdf_file"})
+                if item.get("pdf_file"):
+                    invoice.pdf_blob = next(blobs)
+                    invoice.pdf_file = invoice.pdf_blob.file.name
+                invoices.append(invoice)
+            Invoice.objects.bulk_create(invoices, batch_size=batch_size)
+
+            PdfBlob.count_references(added=[invoice.pdf_blob_id for invoice in invoices])
+            search.index_invoices(invoices, batch_size=batch_size)
+            summaries.record_changes(added=[invoice.summary_values() for invoice in invoices])
+            conditional.bump(conditional.INVOICE)
+            # Last, like api.signals, so the entries are close to commit.
+            sync.record_changes(((invoice.pk, invoice.supplier_id) for invoice in invoices), created=True)
+    except BaseException:
+        for blob in new_blobs:
+            PdfBlob.delete_unreferenced(blob.pk)
+        raise
+    invoice_number_filter.add([invoice.invoice_number for invoice in invoices])
+    return invoices
@@ -0,0 +1,165 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from .models import Invoice
+from .replicas import primary
+from .typeahead import normalize
+
+# Catch-up queries re-read this much history so rows committed late by a
+# long transaction are not missed.
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings: no false negatives, roughly
+    error_rate false positives once `capacity` keys have been added.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        step = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        # Setting bits is read-modify-write on shared bytes.
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class InvoiceNumberFilter:
+    """
+    Per-process Bloom filter of every invoice number, so "is this number
+    free?" is usually answered without a query.
+
+    Numbers saved in this process are added by api.signals straight away;
+    other workers' inserts are picked up by an indexed date_modified query
+    at most every INVOICE_BLOOM_SYNC_SECONDS. The filter is rebuilt from
+    the table every INVOICE_BLOOM_REBUILD_SECONDS, or sooner once it is
+    over capacity, to drop deleted numbers and keep the error rate down.
+    """
+
+    def __init__(self):
+        self._filter = None
+        self._synced_at = None
+        self._next_sync = 0
+        self._next_rebuild = 0
+        self._lock = threading.Lock()
+
+    def get_filter(self):
+        now = time.monotonic()
+        bloom = self._filter
+        if bloom is not None and now < self._next_sync:
+            return bloom
+
+        # Built from the primary: a number missing from a lagging replica
+        # would be a false negative, which the filter must never give.
+        with self._lock, primary():
+            if self._filter is None or now >= self._next_rebuild or self._filter.count > self._filter.capacity:
+                self._rebuild(now)
+            elif now >= self._next_sync:
+                self._catch_up(now)
+            return self._filter
+
+    def _rebuild(self, now):
+        synced_at = timezone.now()
+        numbers = list(Invoice.objects.order_by().values_list("invoice_number", flat=True).iterator())
+        bloom = BloomFilter(len(numbers) * 2 + 1000, settings.INVOICE_BLOOM_ERROR_RATE)
+        for number in numbers:
+            bloom.add(normalize(number))
+
+        self._filter = bloom
+        self._synced_at = synced_at
+        self._next_sync = now + settings.INVOICE_BLOOM_SYNC_SECONDS
+        self._next_rebuild = now + settings.INVOICE_BLOOM_REBUILD_SECONDS
+
+    def _catch_up(self, now):
+        synced_at = timezone.now()
+        recent = Invoice.objects.filter(
+            date_modified__gte=self._synced_at - SYNC_OVERLAP
+        ).order_by().values_list("invoice_number", flat=True)
+        for number in recent:
+            self._filter.add(normalize(number))
+
+        self._synced_at = synced_at
+        self._next_sync = now + settings.INVOICE_BLOOM_SYNC_SECONDS
+
+    def add(self, numbers):
+        bloom = self._filter
+        if bloom is not None:
+            for number in numbers:
+                bloom.add(normalize(number))
+
+    def existing(self, numbers):
+        """
+        Return the subset of numbers that are already taken, querying only
+        the ones the filter cannot rule out, in one IN query.
+
+        Keys are normalized like the database collation compares them, so a
+        case or accent variant is never wrongly reported as free.
+        """
+        candidates = self._candidates(self.get_filter(), numbers)
+        if not candidates:
+            return set()
+
+        # Confirmed on the primary too: a lagging replica would report a
+        # number that was just taken as free.
+        with primary():
+            found = list(self._found(candidates))
+        return self._taken(candidates, found)
+
+    async def aexisting(self, numbers):
+        """existing() for async views, on the async ORM."""
+        bloom = self._filter
+        if bloom is None or time.monotonic() >= self._next_sync:
+            bloom = await sync_to_async(self.get_filter)()
+        candidates = self._candidates(bloom, numbers)
+        if not candidates:
+            return set()
+
+        # The async ORM's threads get a copy of this context, so the
+        # query follows primary() like in existing().
+        with primary():
+            found = [number async for number in self._found(candidates)]
+        return self._taken(candidates, found)
+
+    @staticmethod
+    def _candidates(bloom, numbers):
+        return [number for number in numbers if normalize(number) in bloom]
+
+    @staticmethod
+    def _found(candidates):
+        return Invoice.objects.filter(invoice_number__in=candidates).values_list("invoice_number", flat=True)
+
+    @staticmethod
+    def _taken(candidates, found):
+        taken = {normalize(number) for number in found}
+        return {number for number in candidates if normalize(number) in taken}
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._next_sync = self._next_rebuild = 0
+
+
+invoice_number_filter = InvoiceNumberFilter()
@@ -0,0 +1,141 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from .models import TableVersion
+
+INVOICE = "invoice"
+VESSEL = "vessel"
+SUPPLIER = "supplier"
+PDF_PREVIEW = "pdf_preview"
+
+
+def bump(*names):
+    """
+    Advance the change counters of the given tables once the current
+    transaction commits. Bumping earlier would let a reader pair the new
+    ETag with the old rows and keep serving them as fresh.
+    """
+    transaction.on_commit(lambda: _bump(names))
+
+
+def _bump(names):
+    now = timezone.now()
+    updated = TableVersion.objects.filter(name__in=names).update(
+        version=F("version") + 1, updated_at=now
+    )
+    if updated < len(names):
+        TableVersion.objects.bulk_create(
+            [TableVersion(name=name, version=1, updated_at=now) for name in names],
+            ignore_conflicts=True,
+        )
+
+
+def table_state(request, tables):
+    """Return ({name: version}, last updated_at) for tables, once per request."""
+    state = getattr(request, "_table_state", None)
+    if state is None:
+        rows = TableVersion.objects.filter(name__in=tables).values_list("name", "version", "updated_at")
+        state = request._table_state = _state(rows)
+    return state
+
+
+async def atable_state(request, tables):
+    """table_state() for async views, on the async ORM."""
+    state = getattr(request, "_table_state", None)
+    if state is None:
+        rows = TableVersion.objects.filter(name__in=tables).values_list("name", "version", "updated_at")
+        state = request._table_state = _state([row async for row in rows])
+    return state
+
+
+def _state(rows):
+    versions = {name: version for name, version, _ in rows}
+    last_modified = max((updated_at for _, _, updated_at in rows), default=None)
+    return versions, last_modified
+
+
+def conditional_response(etag_func, last_modified_func=None, prepare=None):
+    """
+    Method decorator for APIView.get: Django's condition() plus headers
+    making browsers revalidate per bearer token instead of reusing a copy.
+
+    condition() calls the ETag and Last-Modified functions synchronously,
+    so on an async handler `prepare(request)` is awaited first to load
+    what they read without touching the database from the event loop.
+    """
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if prepare is not None:
+                    await prepare(request)
+                return revalidate(await conditional_view(request, *args, **kwargs))
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return revalidate(conditional_view(request, *args, **kwargs))
+        return wrapper
+
+    return method_decorator(decorator)
+
+
+def revalidate(response):
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def conditional_list(*tables, per_user=False):
+    """
+    Answer If-None-Match and If-Modified-Since with 304 from the change
+    counters of `tables`, before the view queries or serializes anything.
+
+    The ETag covers the full path, so each page and search has its own, and
+    with per_user the authenticated principal, for lists scoped to them.
+    """
+    def etag(request, *args, **kwargs):
+        versions, _ = table_state(request, tables)
+        parts = [f"{name}:{versions.get(name, 0)}" for name in tables]
+        parts.append(request.get_full_path())
+        if per_user:
+            parts.append(str(request.user.pk))
+        return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        updated_at = table_state(request, tables)[1]
+        # HTTP dates have whole seconds; a second change within this one
+        # would be invisible to an If-Modified-Since-only client.
+        if updated_at is None or timezone.now() - updated_at < timedelta(seconds=1):
+            return None
+        return updated_at
+
+    async def prepare(request):
+        await atable_state(request, tables)
+
+    return conditional_response(etag, last_modified, prepare)
+
+
+def conditional_typeahead(index):
+    """
+    Validate typeahead responses against the fingerprint of the worker's
+    in-process index (api.typeahead), so a 304 costs no query at all.
+    """
+    def etag(request, *args, **kwargs):
+        current = getattr(request, "_typeahead_index", None) or index.get_index()
+        parts = f"{current.fingerprint}|{request.get_full_path()}"
+        return hashlib.blake2b(parts.encode(), digest_size=16).hexdigest()
+
+    async def prepare(request):
+        request._typeahead_index = await index.aget_index()
+
+    return conditional_response(etag, prepare=prepare)
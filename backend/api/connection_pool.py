@@ -0,0 +1,213 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """No connection came free within the pool's timeout."""
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool of DB-API connections for one database, shared
+    by every thread of a worker process (see api.backends.mysql).
+
+    At most max_size connections are open; getconn() waits up to `timeout`
+    seconds for one to come back before raising PoolTimeout. Idle
+    connections are reused newest first, so the oldest ones age out: any
+    idle longer than max_idle seconds are closed on the next checkout or
+    checkin, down to min_size. `check(conn)` runs on every checkout of a
+    reused connection and drops it if it returns False; `reset(conn)`
+    runs on checkin and drops it if it raises.
+    """
+
+    def __init__(self, connect, min_size=0, max_size=10, timeout=10.0, max_idle=300.0,
+                 check=None, reset=None, close=None, name="", stats_interval=0):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Need 0 <= min_size <= max_size and max_size >= 1")
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check = check
+        self.reset = reset
+        self.close_connection = close or (lambda conn: conn.close())
+        self.name = name
+        self.stats_interval = stats_interval
+        # Connections belong to the process that opened them; a forked
+        # worker must build its own pool instead of sharing sockets.
+        self.pid = os.getpid()
+
+        self._idle = deque()  # (connection, idle since), oldest on the left
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._next_log = time.monotonic() + stats_interval
+        self._stats = dict.fromkeys(
+            ["checkouts", "opened", "closed", "reaped", "failed_checks", "waits", "timeouts"], 0
+        )
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def open(self):
+        """Open connections up to min_size, e.g. before the first request."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._open()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self._cond:
+                stale = self._take_stale(started)
+                while True:
+                    if self._closed:
+                        raise PoolTimeout(f"Connection pool {self.name} is closed")
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        conn = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No connection in pool {self.name} came free within {self.timeout}s "
+                            f"({self.max_size} in use)"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+                self._stats["checkouts"] += 1
+                if waited:
+                    waited_for = time.monotonic() - started
+                    self._stats["waits"] += 1
+                    self._wait_seconds += waited_for
+                    self._max_wait_seconds = max(self._max_wait_seconds, waited_for)
+                    waited = False
+            self._close_all(stale)
+
+            if conn is None:
+                return self._open()
+            if self.check is None or self._checks_out(conn):
+                return conn
+            with self._cond:
+                self._stats["failed_checks"] += 1
+            self._discard(conn)
+
+    def putconn(self, conn, discard=False):
+        """Return a connection; discard closes it instead of keeping it."""
+        if os.getpid() != self.pid:
+            return
+        if not discard and self.reset is not None:
+            try:
+                self.reset(conn)
+            except Exception:
+                discard = True
+        if discard:
+            self._discard(conn)
+            return
+
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                stale = [conn]
+                self._size -= 1
+            else:
+                self._idle.append((conn, now))
+                stale = self._take_stale(now)
+                self._cond.notify()
+        self._close_all(stale)
+        self._log_stats(now)
+
+    def close(self):
+        """Close the idle connections; ones in use are closed on checkin."""
+        with self._cond:
+            self._closed = True
+            stale = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(stale)
+            self._cond.notify_all()
+        self._close_all(stale)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            checkouts = self._stats["checkouts"]
+            return {
+                **self._stats,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "wait_ms_total": round(self._wait_seconds * 1000, 1),
+                "wait_ms_max": round(self._max_wait_seconds * 1000, 1),
+                # New connections per checkout: 1.0 without pooling.
+                "churn": round(self._stats["opened"] / checkouts, 4) if checkouts else 0.0,
+            }
+
+    def _open(self):
+        try:
+            conn = self.connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["opened"] += 1
+        return conn
+
+    def _checks_out(self, conn):
+        try:
+            return self.check(conn)
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        self._close_all([conn])
+
+    def _take_stale(self, now):
+        """Pop connections idle longer than max_idle, keeping min_size open."""
+        stale = []
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            stale.append(self._idle.popleft()[0])
+            self._size -= 1
+            self._stats["reaped"] += 1
+        return stale
+
+    def _close_all(self, connections):
+        for conn in connections:
+            try:
+                self.close_connection(conn)
+            except Exception:
+                pass
+        if connections:
+            with self._cond:
+                self._stats["closed"] += len(connections)
+
+    def _log_stats(self, now):
+        if self.stats_interval and now >= self._next_log:
+            self._next_log = now + self.stats_interval
+            logger.info("Connection pool %s: %s", self.name, self.stats())
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils import timezone
+from .models import Invoice, InvoiceChange
+from .serializers import FastInvoiceListSerializer
+from .sync import expand_vessel_changes, latest_cursor
+
+logger = logging.getLogger(__name__)
+
+CREATED = "invoice-created"
+UPDATED = "invoice-updated"
+DELETED = "invoice-deleted"
+# Sent instead of the events a subscriber could not keep up with; the
+# client catches up from the sync feed (api.sync).
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+def format_event(change_id, name, data):
+    return f"id: {change_id}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscriber:
+    """One open event stream: a bounded queue of preformatted events."""
+
+    def __init__(self, supplier_id, maxsize):
+        self.supplier_id = supplier_id
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, event):
+        """
+        Queue an event without waiting. A subscriber that falls maxsize
+        events behind loses them for a single resync marker, so a stalled
+        client holds at most one queue of text and never slows the others.
+        """
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.overflowed = True
+
+    async def next_event(self, timeout):
+        event = await asyncio.wait_for(self.queue.get(), timeout)
+        if event is RESYNC:
+            self.overflowed = False
+        return event
+
+
+class InvoiceEventHub:
+    """
+    In-process fan-out of invoice changes to open event streams.
+
+    While anyone is subscribed, a single task per worker process polls the
+    InvoiceChange log every INVOICE_EVENTS_POLL_SECONDS and formats each
+    change once per audience: staff streams see every invoice, supplier
+    streams only their own. With no subscribers the task stops, so the
+    feed costs nothing until someone listens.
+    """
+
+    def __init__(self):
+        self.staff = set()
+        self.suppliers = defaultdict(set)
+        self.task = None
+
+    def subscribe(self, supplier_id=None):
+        subscriber = Subscriber(supplier_id, settings.INVOICE_EVENTS_QUEUE_SIZE)
+        if supplier_id is None:
+            self.staff.add(subscriber)
+        else:
+            self.suppliers[supplier_id].add(subscriber)
+
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self.run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber.supplier_id is None:
+            self.staff.discard(subscriber)
+            return
+        subscribers = self.suppliers.get(subscriber.supplier_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.suppliers[subscriber.supplier_id]
+
+    def has_subscribers(self):
+        return bool(self.staff or self.suppliers)
+
+    async def run(self):
+        cursor = await sync_to_async(latest_cursor)()
+        sent = set()
+        while self.has_subscribers():
+            await asyncio.sleep(settings.INVOICE_EVENTS_POLL_SECONDS)
+            try:
+                cursor, sent, events = await sync_to_async(self.read)(cursor, sent)
+            except DatabaseError:
+                logger.exception("Reading invoice changes failed")
+                await sync_to_async(connection.close)()
+                continue
+            finally:
+                # No request ends in this thread to release the connection;
+                # with pooling it goes back to the pool between polls.
+                await sync_to_async(close_old_connections)()
+            self.publish(events)
+
+    def read(self, cursor, sent):
+        """
+        Return (cursor, sent ids, events) for changes after cursor.
+
+        As in api.sync.read_changes, the cursor stops before changes
+        younger than INVOICE_SYNC_SETTLE_SECONDS; `sent` remembers which of
+        those were published already.
+        """
+        entries = list(
+            InvoiceChange.objects.filter(id__gt=cursor)
+            .order_by("id")
+            .values_list("id", "invoice_id", "supplier_id", "vessel_id", "deleted", "created", "created_at")
+            [:settings.INVOICE_SYNC_PAGE_SIZE]
+        )
+        settled = timezone.now() - timedelta(seconds=settings.INVOICE_SYNC_SETTLE_SECONDS)
+        fresh = [entry for entry in entries if entry[0] not in sent]
+
+        rows, by_vessel = expand_vessel_changes(
+            [(invoice_id, vessel_id) for _, invoice_id, _, vessel_id, deleted, _, _ in fresh if not deleted],
+            Invoice.objects.all(),
+            "supplier_id",
+        )
+        serializer = FastInvoiceListSerializer()
+
+        events = []
+        for change_id, invoice_id, supplier_id, vessel_id, deleted, created, _ in fresh:
+            if vessel_id:
+                for row in (rows[invoice_id] for invoice_id in by_vessel[vessel_id]):
+                    event = format_event(change_id, UPDATED, serializer.to_representation([row])[0])
+                    events.append((row["supplier_id"], event, event))
+                continue
+            row = rows.get(invoice_id)
+            deleted_event = format_event(change_id, DELETED, {"invoice_id": str(invoice_id)})
+            if row is None:
+                events.append((supplier_id, deleted_event, deleted_event))
+                continue
+            event = format_event(change_id, CREATED if created else UPDATED, serializer.to_representation([row])[0])
+            if row["supplier_id"] == supplier_id:
+                events.append((supplier_id, event, event))
+            else:
+                # Entry for the supplier an invoice moved away from.
+                events.append((supplier_id, None, deleted_event))
+
+        for change_id, *_, created_at in entries:
+            if created_at > settled:
+                break
+            cursor = change_id
+        sent = {entry[0] for entry in entries if entry[0] > cursor}
+        return cursor, sent, events
+
+    def publish(self, events):
+        for supplier_id, staff_event, supplier_event in events:
+            if staff_event is not None:
+                for subscriber in self.staff:
+                    subscriber.offer(staff_event)
+            for subscriber in self.suppliers.get(supplier_id, ()):
+                subscriber.offer(supplier_event)
+
+    async def stream(self, supplier_id, expires_at, resync=False):
+        """
+        Subscribe and yield SSE text until expires_at (the access token's
+        exp), sending a comment every INVOICE_EVENTS_KEEPALIVE_SECONDS so
+        proxies keep the connection open and dead ones are noticed.
+        supplier_id None is a staff stream.
+        """
+        subscriber = self.subscribe(supplier_id)
+        try:
+            yield f"retry: {settings.INVOICE_EVENTS_RETRY_MS}\n\n"
+            if resync:
+                # Reconnecting client: events may have been missed meanwhile.
+                yield RESYNC
+            while True:
+                remaining = expires_at - time.time() if expires_at else settings.INVOICE_EVENTS_KEEPALIVE_SECONDS
+                if remaining <= 0:
+                    return
+                try:
+                    yield await subscriber.next_event(min(remaining, settings.INVOICE_EVENTS_KEEPALIVE_SECONDS))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+invoice_event_hub = InvoiceEventHub()
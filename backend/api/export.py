@@ -0,0 +1,135 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from .models import Invoice
+
+# (column, lookup) pairs; lookups are read with values_list, never as models.
+EXPORT_COLUMNS = [
+    ("invoice_id", "invoice_id"),
+    ("invoice_number", "invoice_number"),
+    ("supplier", "supplier__supplier_name"),
+    ("vessel", "vessel__vessel_name"),
+    ("submitted_date", "submitted_date"),
+    ("amount_due", "amount_due"),
+    ("description", "description"),
+    ("pdf_file", "pdf_file"),
+    ("date_created", "date_created"),
+]
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_queryset(date_from=None, date_to=None, supplier=None, vessel=None):
+    """
+    Invoices submitted between date_from and date_to (inclusive local
+    dates), optionally for one supplier and/or vessel id.
+    """
+    invoices = Invoice.objects.order_by()
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+        invoices = invoices.filter(submitted_date__gte=start)
+    if date_to:
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        invoices = invoices.filter(submitted_date__lt=end)
+    if supplier:
+        invoices = invoices.filter(supplier_id=supplier)
+    if vessel:
+        invoices = invoices.filter(vessel_id=vessel)
+    return invoices
+
+
+def iter_rows(invoices, chunk_size=2000):
+    """
+    Yield export tuples in (submitted_date, invoice_id) order, one keyset
+    query per chunk_size rows.
+
+    mysqlclient buffers a whole result set client-side even under
+    .iterator(), so bounded keyset batches are what keeps memory flat
+    for millions of rows.
+    """
+    chunks = KeysetChunks(invoices, chunk_size)
+    while chunks.position is not None:
+        yield from chunks.advance(list(chunks.query()))
+
+
+async def aiter_rows(invoices, chunk_size=2000):
+    """iter_rows() for async views: each chunk is read in a worker thread."""
+    chunks = KeysetChunks(invoices, chunk_size)
+    while chunks.position is not None:
+        for row in chunks.advance(await sync_to_async(list)(chunks.query())):
+            yield row
+
+
+class KeysetChunks:
+    """Keyset pagination state shared by iter_rows() and aiter_rows()."""
+
+    def __init__(self, invoices, chunk_size):
+        self.invoices = invoices
+        self.chunk_size = chunk_size
+        self.lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+        self.date_index = self.lookups.index("submitted_date")
+        self.id_index = self.lookups.index("invoice_id")
+        # None once the last chunk has been read.
+        self.position = Q()
+
+    def query(self):
+        return (
+            self.invoices.filter(self.position)
+            .order_by("submitted_date", "invoice_id")
+            .values_list(*self.lookups)[:self.chunk_size]
+        )
+
+    def advance(self, chunk):
+        if len(chunk) < self.chunk_size:
+            self.position = None
+        else:
+            last_date, last_id = chunk[-1][self.date_index], chunk[-1][self.id_index]
+            self.position = Q(submitted_date__gt=last_date) | Q(submitted_date=last_date, invoice_id__gt=last_id)
+        return chunk
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines():
+    """The header lines and a row -> line function for CSV."""
+    writer = csv.writer(Echo())
+    return [writer.writerow([column for column, _ in EXPORT_COLUMNS])], writer.writerow
+
+
+def ndjson_lines():
+    """The header lines and a row -> line function for NDJSON."""
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    return [], lambda row: json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+FORMATTERS = {"csv": csv_lines, "ndjson": ndjson_lines}
+
+
+def export_lines(invoices, export_format, chunk_size=2000):
+    header, format_row = FORMATTERS[export_format]()
+    yield from header
+    for row in iter_rows(invoices, chunk_size=chunk_size):
+        yield format_row(row)
+
+
+async def aexport_lines(invoices, export_format, chunk_size=2000):
+    """
+    export_lines() as an async iterator, for StreamingHttpResponse under
+    ASGI: Django would read a sync iterator into a list before sending it.
+    """
+    header, format_row = FORMATTERS[export_format]()
+    for line in header:
+        yield line
+    async for row in aiter_rows(invoices, chunk_size=chunk_size):
+        yield format_row(row)
@@ -0,0 +1,176 @@
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DEFAULT_PATHS = [
+    "/vessels/?search=a",
+    "/invoices/check-invoice/?invoice_number=BENCH-ASGI-0",
+    "/user/invoices/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the async read endpoints in-process under WSGI (a pool of "
+        "--threads worker threads, like a threaded WSGI worker) and ASGI (one "
+        "event loop), with --concurrency requests in flight. --latency-ms adds "
+        "a sleep to every query, standing in for the network round trip to a "
+        "remote database. Reads the configured database; a temporary staff "
+        "user is created for the token and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", dest="paths",
+                            help=f"Path to request; repeatable. Default: {', '.join(DEFAULT_PATHS)}")
+        parser.add_argument("--requests", type=int, default=500, help="Requests per path and mode")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight")
+        parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every query")
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f"bench-asgi-{time.time_ns()}")
+        token = jwt.encode(
+            {"user_id": user.pk, "exp": datetime.now(timezone.utc) + timedelta(hours=1)},
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+        latency = options["latency_ms"] / 1000
+
+        def add_latency(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def install(sender, connection, **kwargs):
+            connection.execute_wrappers.append(add_latency)
+
+        if latency:
+            # Connections opened from here on, in any thread, get the wrapper.
+            connections.close_all()
+            connection_created.connect(install, weak=False)
+        try:
+            self.stdout.write(f"{'mode':<5} {'path':<52} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+            for path in options["paths"] or DEFAULT_PATHS:
+                for mode, run in [("wsgi", self._run_wsgi), ("asgi", self._run_asgi)]:
+                    latencies, statuses, elapsed = run(path, f"Bearer {token}", options)
+                    errors = sum(status != 200 for status in statuses)
+                    self.stdout.write(
+                        f"{mode:<5} {path[:52]:<52} {len(latencies) / elapsed:>8.0f} "
+                        f"{statistics.median(latencies):>8.2f} {self._p95(latencies):>8.2f} {errors:>7}"
+                    )
+        finally:
+            connection_created.disconnect(install)
+            connections.close_all()
+            User.objects.filter(pk=user.pk).delete()
+
+    def _run_wsgi(self, path, authorization, options):
+        application = get_wsgi_application()
+        url = urlsplit(path)
+        slots = threading.BoundedSemaphore(options["concurrency"])
+        latencies, statuses = [], []
+
+        def request(submitted):
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": url.path,
+                "QUERY_STRING": url.query,
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "REMOTE_ADDR": "127.0.0.1",
+                "HTTP_HOST": "localhost",
+                "HTTP_AUTHORIZATION": authorization,
+                "wsgi.input": io.BytesIO(),
+                "wsgi.errors": io.StringIO(),
+                "wsgi.url_scheme": "http",
+                "wsgi.multithread": True,
+                "wsgi.multiprocess": False,
+                "wsgi.run_once": False,
+                "wsgi.version": (1, 0),
+            }
+            status = []
+            try:
+                body = application(environ, lambda code, headers: status.append(int(code[:3])))
+                try:
+                    b"".join(body)
+                finally:
+                    # Fires request_finished, which releases the connection.
+                    body.close()
+                latencies.append((time.perf_counter() - submitted) * 1000)
+                statuses.append(status[0])
+            finally:
+                slots.release()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["threads"]) as executor:
+            futures = []
+            for _ in range(options["requests"]):
+                slots.acquire()
+                futures.append(executor.submit(request, time.perf_counter()))
+            for future in futures:
+                future.result()
+        return latencies, statuses, time.perf_counter() - started
+
+    def _run_asgi(self, path, authorization, options):
+        application = get_asgi_application()
+        url = urlsplit(path)
+        latencies, statuses = [], []
+
+        async def request(slots):
+            async with slots:
+                submitted = time.perf_counter()
+                scope = {
+                    "type": "http",
+                    "asgi": {"version": "3.0"},
+                    "http_version": "1.1",
+                    "method": "GET",
+                    "scheme": "http",
+                    "path": url.path,
+                    "root_path": "",
+                    "query_string": url.query.encode(),
+                    "headers": [(b"host", b"localhost"), (b"authorization", authorization.encode())],
+                    "client": ("127.0.0.1", 0),
+                    "server": ("localhost", 80),
+                }
+                received = asyncio.Event()
+                messages = []
+
+                async def receive():
+                    if not received.is_set():
+                        received.set()
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    # The client stays connected; Django stops listening once it responds.
+                    await asyncio.Future()
+
+                async def send(message):
+                    messages.append(message)
+
+                await application(scope, receive, send)
+                latencies.append((time.perf_counter() - submitted) * 1000)
+                statuses.append(messages[0]["status"])
+
+        async def run():
+            slots = asyncio.Semaphore(options["concurrency"])
+            await asyncio.gather(*(request(slots) for _ in range(options["requests"])))
+
+        started = time.perf_counter()
+        try:
+            asyncio.run(run())
+        except Exception as e:
+            raise CommandError(f"ASGI run failed: {e}")
+        return latencies, statuses, time.perf_counter() - started
+
+    def _p95(self, values):
+        return sorted(values)[int(len(values) * 0.95) - 1] if values else 0.0
@@ -0,0 +1,95 @@
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test connection setup per request, with a fresh connection per "
+        "request (CONN_MAX_AGE=0, the old setup) and with the pool. Each request "
+        "connects, runs SELECT 1 and closes, as Django does around every view; "
+        "--threads run concurrently, like worker threads. Needs the "
+        "api.backends.mysql engine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per thread")
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        settings_dict = connections[options["database"]].settings_dict
+        if settings_dict["ENGINE"] != "api.backends.mysql":
+            raise CommandError("bench_db_connections needs ENGINE api.backends.mysql")
+        backend = load_backend(settings_dict["ENGINE"])
+        pool_options = settings_dict["OPTIONS"].get("pool") or {}
+        if pool_options is True:
+            pool_options = {}
+        options_without_pool = {k: v for k, v in settings_dict["OPTIONS"].items() if k != "pool"}
+
+        self.stdout.write(
+            f"{'mode':<12} {'req/s':>8} {'connect ms':>11} {'p95 ms':>8} {'request ms':>11} "
+            f"{'opened':>7} {'waits':>6} {'wait ms':>8}"
+        )
+        for mode, db_options in [
+            ("per request", options_without_pool),
+            ("pooled", {**options_without_pool, "pool": {**pool_options, "stats_interval": 0}}),
+        ]:
+            alias = f"bench_{mode.replace(' ', '_')}"
+            bench_settings = {**settings_dict, "CONN_MAX_AGE": 0, "OPTIONS": db_options}
+            connect_times, request_times, elapsed, opened = self._run(backend, bench_settings, alias, options)
+
+            pool = backend.DatabaseWrapper(bench_settings, alias).pool
+            stats = pool.stats() if pool is not None else {"opened": opened, "waits": 0, "wait_ms_total": 0.0}
+            self.stdout.write(
+                f"{mode:<12} {len(request_times) / elapsed:>8.0f} "
+                f"{statistics.mean(connect_times):>11.3f} {self._p95(connect_times):>8.3f} "
+                f"{statistics.mean(request_times):>11.3f} "
+                f"{stats['opened']:>7} {stats['waits']:>6} {stats['wait_ms_total']:>8.1f}"
+            )
+            if pool is not None:
+                pool.close()
+
+    def _run(self, backend, settings_dict, alias, options):
+        connect_times, request_times = [], []
+        lock = threading.Lock()
+        errors = []
+
+        def worker():
+            # One wrapper per thread, as django.db.connections keeps them.
+            wrapper = backend.DatabaseWrapper(settings_dict, alias)
+            connects, requests = [], []
+            try:
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    wrapper.ensure_connection()
+                    connected = time.perf_counter()
+                    with wrapper.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                        cursor.fetchone()
+                    wrapper.close()
+                    connects.append((connected - started) * 1000)
+                    requests.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                errors.append(e)
+            with lock:
+                connect_times.extend(connects)
+                request_times.extend(requests)
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise CommandError(f"{len(errors)} threads failed, first: {errors[0]}")
+        # Without a pool every request opened its own connection.
+        return connect_times, request_times, elapsed, len(request_times)
+
+    def _p95(self, values):
+        return sorted(values)[int(len(values) * 0.95) - 1] if values else 0.0
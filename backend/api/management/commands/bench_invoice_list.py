@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from api.models import Supplier, Vessel, Invoice
+from api.renderers import FastJSONRenderer
+from api.serializers import InvoiceListSerializer, FastInvoiceListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark invoice list serialization: InvoiceListSerializer + JSONRenderer "
+        "against FastInvoiceListSerializer + FastJSONRenderer, in rows per second. "
+        "All rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default="100,1000,10000",
+                            help="Comma separated invoice counts to test")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Runs per size and path; the fastest is reported")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["rows"].split(",")]
+
+        self.stdout.write(f"{'rows':>8} {'drf rows/s':>12} {'fast rows/s':>12} {'speedup':>8}")
+        for size in sizes:
+            with transaction.atomic():
+                supplier = Supplier.objects.create(supplier_name="Bench supplier")
+                vessel = Vessel.objects.create(vessel_name="MV Bench")
+                submitted = datetime(2025, 1, 1, tzinfo=timezone.utc)
+                Invoice.objects.bulk_create(
+                    (
+                        Invoice(
+                            supplier=supplier,
+                            vessel=vessel,
+                            invoice_number=f"BENCH-{size}-{i}",
+                            submitted_date=submitted + timedelta(minutes=i),
+                            amount_due="1250.75",
+                            description="Bunker delivery",
+                            pdf_file=f"invoices/bench-{i}.pdf",
+                        )
+                        for i in range(size)
+                    ),
+                    batch_size=1000,
+                )
+                invoices = Invoice.objects.filter(supplier=supplier).order_by("-date_created", "-invoice_id")
+
+                drf = self._time(options["repeat"], lambda: JSONRenderer().render(
+                    InvoiceListSerializer(invoices.select_related("vessel", "pdf_blob__preview"), many=True).data
+                ))
+                fast = self._time(options["repeat"], lambda: FastJSONRenderer().render(
+                    FastInvoiceListSerializer().to_representation(FastInvoiceListSerializer.values(invoices))
+                ))
+                self.stdout.write(f"{size:>8} {size / drf:>12.0f} {size / fast:>12.0f} {drf / fast:>7.1f}x")
+
+                transaction.set_rollback(True)
+
+    def _time(self, repeat, render):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
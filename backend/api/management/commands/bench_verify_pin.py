@@ -0,0 +1,64 @@
+import time
+import uuid
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from api.models import Supplier, Pin, pin_lookup_digest
+from api.views import VerifyPinView
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark VerifyPinView latency against a growing number of suppliers. "
+        "All rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000,5000",
+                            help="Comma separated supplier counts to test")
+        parser.add_argument("--requests", type=int, default=5,
+                            help="Logins to time per size and outcome")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        view = VerifyPinView.as_view()
+        factory = APIRequestFactory()
+
+        # Hash once and reuse it for filler rows; only the lookup has to be unique.
+        filler_hash = make_password("filler")
+
+        self.stdout.write(f"{'suppliers':>10} {'valid ms':>10} {'invalid ms':>11}")
+        for size in sizes:
+            with transaction.atomic():
+                suppliers = Supplier.objects.bulk_create(
+                    Supplier(supplier_name=f"Bench supplier {i}") for i in range(size)
+                )
+                Pin.objects.bulk_create(
+                    Pin(
+                        supplier=supplier,
+                        pin_code=filler_hash,
+                        pin_lookup=pin_lookup_digest(uuid.uuid4().hex),
+                    )
+                    for supplier in suppliers[1:]
+                )
+                target = Pin(supplier=suppliers[0])
+                target.set_pin("bench-pin")
+                Pin.objects.bulk_create([target])
+
+                valid = self._time(view, factory, "bench-pin", options["requests"])
+                invalid = self._time(view, factory, "not-a-pin", options["requests"])
+                self.stdout.write(f"{size:>10} {valid:>10.1f} {invalid:>11.1f}")
+
+                transaction.set_rollback(True)
+
+    def _time(self, view, factory, raw_pin, count):
+        started = time.perf_counter()
+        for i in range(count):
+            # A distinct client per request, so the failure throttles stay out of the timing.
+            view(factory.post(
+                "/verify-pin/", {"pin_code": raw_pin}, format="json",
+                REMOTE_ADDR=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                HTTP_X_DEVICE_ID=f"bench-{raw_pin}-{i}",
+            ))
+        return (time.perf_counter() - started) * 1000 / count
@@ -0,0 +1,34 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete expired resumable upload sessions and their partial files."
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(expires_at__lte=timezone.now())
+        removed = 0
+        for session in expired.iterator():
+            session.discard()
+            removed += 1
+
+        # Partial files whose session row is already gone. List the files
+        # before reading the rows so a session created meanwhile is kept.
+        orphans = 0
+        if os.path.isdir(settings.RESUMABLE_UPLOAD_DIR):
+            names = [name for name in os.listdir(settings.RESUMABLE_UPLOAD_DIR) if name.endswith(".part")]
+            live = {
+                f"{upload_id.hex}.part"
+                for upload_id in UploadSession.objects.values_list("upload_id", flat=True)
+            }
+            for name in names:
+                if name not in live:
+                    os.remove(os.path.join(settings.RESUMABLE_UPLOAD_DIR, name))
+                    orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {removed} expired sessions and {orphans} orphaned files"
+        ))
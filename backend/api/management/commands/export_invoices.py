@@ -0,0 +1,36 @@
+from datetime import date
+from uuid import UUID
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.export import EXPORT_FORMATS, export_lines, export_queryset
+
+
+class Command(BaseCommand):
+    help = "Stream invoices with supplier and vessel names as CSV or NDJSON for accounting."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", type=date.fromisoformat,
+                            help="First submitted date to include (YYYY-MM-DD)")
+        parser.add_argument("--date-to", type=date.fromisoformat,
+                            help="Last submitted date to include (YYYY-MM-DD)")
+        parser.add_argument("--supplier", type=UUID)
+        parser.add_argument("--vessel", type=UUID)
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", help="File to write (defaults to stdout)")
+        parser.add_argument("--chunk-size", type=int, default=settings.INVOICE_EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        invoices = export_queryset(
+            date_from=options["date_from"],
+            date_to=options["date_to"],
+            supplier=options["supplier"],
+            vessel=options["vessel"],
+        )
+        lines = export_lines(invoices, options["format"], chunk_size=options["chunk_size"])
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as target:
+                target.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+from api.models import Invoice, PdfBlob
+
+
+class Command(BaseCommand):
+    help = "Delete PDF blobs that no invoice references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-minutes", type=int, default=60,
+                            help="Keep unreferenced blobs younger than this (uploads in flight)")
+        parser.add_argument("--recount", action="store_true",
+                            help="Recompute ref_count from Invoice rows before collecting")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["recount"]:
+            self._recount()
+
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+        garbage = (
+            PdfBlob.objects.filter(ref_count=0, created_at__lt=cutoff)
+            .exclude(Exists(Invoice.objects.filter(pdf_blob=OuterRef("pk"))))
+        )
+
+        deleted = freed = 0
+        for blob in garbage.iterator():
+            if options["dry_run"]:
+                self.stdout.write(f"{blob.sha256} ({blob.size} bytes)")
+            elif not PdfBlob.delete_unreferenced(blob.pk, garbage):
+                continue
+            deleted += 1
+            freed += blob.size
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} blobs ({freed} bytes)"))
+
+    def _recount(self):
+        counts = PdfBlob.objects.annotate(actual=Count("invoices")).values_list("pk", "actual", "ref_count")
+        with transaction.atomic():
+            for sha256, actual, ref_count in counts.iterator():
+                if actual != ref_count:
+                    PdfBlob.objects.filter(pk=sha256).update(ref_count=actual)
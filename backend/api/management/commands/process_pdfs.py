@@ -0,0 +1,121 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from api import conditional, sync
+from api.models import Invoice, PdfBlob, PdfPreview
+from api.pdf_processing import process_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Drain the PDF processing queue: page count, text, first-page "
+        "thumbnail and a linearized copy for each new PdfBlob."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Processing processes (defaults to the CPU count; 1 runs inline)")
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--poll-interval", type=float, default=5.0)
+        parser.add_argument("--stale-minutes", type=int, default=15,
+                            help="Re-queue running jobs whose worker died this long ago")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit when the queue is empty instead of polling")
+
+    def handle(self, *args, **options):
+        self.workers = options["workers"]
+        self.pool = self.new_pool() if self.workers != 1 else None
+
+        try:
+            while True:
+                jobs = self.claim(options["batch_size"], options["stale_minutes"])
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                self.run(jobs)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+    def new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup)
+
+    def claim(self, batch_size, stale_minutes):
+        now = timezone.now()
+        stale = now - timedelta(minutes=stale_minutes)
+        skip_locked = connection.features.has_select_for_update_skip_locked
+
+        max_attempts = settings.PDF_PROCESSING_MAX_ATTEMPTS
+
+        with transaction.atomic():
+            # Jobs whose worker died on every attempt, e.g. a PDF that
+            # crashes the renderer, are not handed out again.
+            PdfPreview.objects.filter(
+                status=PdfPreview.RUNNING, started_at__lt=stale, attempts__gte=max_attempts
+            ).update(status=PdfPreview.FAILED, error="Worker stopped while processing")
+            job_ids = list(
+                PdfPreview.objects.select_for_update(skip_locked=skip_locked)
+                .filter(
+                    Q(status=PdfPreview.PENDING)
+                    | Q(status=PdfPreview.RUNNING, started_at__lt=stale, attempts__lt=max_attempts)
+                )
+                .order_by("created_at")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            PdfPreview.objects.filter(pk__in=job_ids).update(
+                status=PdfPreview.RUNNING, started_at=now, attempts=F("attempts") + 1
+            )
+        return list(PdfBlob.objects.filter(pk__in=job_ids).values_list("pk", "file"))
+
+    def run(self, jobs):
+        if self.pool is None:
+            for sha256, name in jobs:
+                self.record(sha256, lambda: process_pdf(sha256, name))
+            return
+
+        futures = {self.submit(sha256, name): sha256 for sha256, name in jobs}
+        for future in as_completed(futures):
+            self.record(futures[future], future.result)
+
+    def submit(self, sha256, name):
+        try:
+            return self.pool.submit(process_pdf, sha256, name)
+        except BrokenProcessPool:
+            # A worker process died (its in-flight jobs fail with the same
+            # error and are retried); the pool takes no more work.
+            self.pool.shutdown(wait=False)
+            self.pool = self.new_pool()
+            return self.pool.submit(process_pdf, sha256, name)
+
+    def record(self, sha256, get_result):
+        try:
+            result = get_result()
+        except Exception as e:
+            job = PdfPreview.objects.get(pk=sha256)
+            status = PdfPreview.PENDING
+            if job.attempts >= settings.PDF_PROCESSING_MAX_ATTEMPTS:
+                status = PdfPreview.FAILED
+            PdfPreview.objects.filter(pk=sha256).update(status=status, error=repr(e))
+            self.stderr.write(f"{sha256}: {e!r}")
+            return
+
+        with transaction.atomic():
+            PdfPreview.objects.filter(pk=sha256).update(
+                status=PdfPreview.DONE,
+                error="",
+                finished_at=timezone.now(),
+                **result,
+            )
+            # Thumbnail and page count appear in the invoice rows.
+            sync.record_invoices(Invoice.objects.filter(pdf_blob_id=sha256))
+            conditional.bump(conditional.PDF_PREVIEW)
+        self.stdout.write(f"{sha256}: {result['page_count']} pages")
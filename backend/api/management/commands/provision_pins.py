@@ -0,0 +1,167 @@
+import csv
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import django
+from functools import partial
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from api.authentication import principal_cache, supplier_cache_key
+from api.models import Supplier, Pin, pin_lookup_digest, pin_lookup_digests
+
+
+def hash_pin(raw_pin, legacy=()):
+    """
+    Hash a PIN and return (pin_code, lookup, ids of the legacy suppliers
+    holding it). PINs without a fingerprint can only be compared by
+    check_password, which is why that runs here in the worker pool.
+    """
+    holders = [supplier_id for supplier_id, pin_code in legacy if check_password(raw_pin, pin_code)]
+    return make_password(raw_pin), pin_lookup_digest(raw_pin), holders
+
+
+class Command(BaseCommand):
+    help = (
+        "Provision or rotate supplier PINs from a CSV with the columns "
+        "supplier_id, supplier_name and pin. Rows without a supplier_id "
+        "create a new supplier; rows with one rotate that supplier's PIN."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Hashing processes (defaults to the CPU count)")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Validate the file without hashing or writing anything")
+
+    def handle(self, *args, **options):
+        rows = self._read_rows(options["csv_path"])
+        self._check_unique(rows)
+
+        legacy = Pin.legacy_pins()
+        if options["dry_run"]:
+            self.stdout.write(f"{len(rows)} rows are valid")
+            if legacy:
+                self.stdout.write(
+                    f"Not compared with {len(legacy)} PINs without a fingerprint; "
+                    "that needs hashing and runs without --dry-run"
+                )
+            return
+        if legacy:
+            self.stdout.write(
+                f"Comparing each PIN with {len(legacy)} PINs without a fingerprint "
+                "(one check_password each)"
+            )
+
+        raw_pins = [row["pin"] for row in rows]
+        hash_with_legacy = partial(hash_pin, legacy=legacy)
+        if options["workers"] == 1:
+            hashed = list(map(hash_with_legacy, raw_pins))
+        else:
+            with ProcessPoolExecutor(max_workers=options["workers"],
+                                     initializer=django.setup) as pool:
+                hashed = list(pool.map(hash_with_legacy, raw_pins, chunksize=32))
+
+        for line, (row, (_, _, holders)) in enumerate(zip(rows, hashed), start=2):
+            if any(holder != row["supplier_id"] for holder in holders):
+                raise CommandError(f"Line {line}: PIN already in use by another supplier")
+
+        created, rotated = self._write(rows, [(pin_code, lookup) for pin_code, lookup, _ in hashed],
+                                       options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Provisioned {created} new PINs and rotated {rotated} existing PINs"
+        ))
+
+    def _read_rows(self, path):
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                rows = list(csv.DictReader(handle))
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        for line, row in enumerate(rows, start=2):
+            row["pin"] = (row.get("pin") or "").strip()
+            row["supplier_id"] = (row.get("supplier_id") or "").strip()
+            row["supplier_name"] = (row.get("supplier_name") or "").strip()
+            if not row["pin"]:
+                raise CommandError(f"Line {line}: pin is required")
+            if not row["supplier_id"] and not row["supplier_name"]:
+                raise CommandError(f"Line {line}: supplier_id or supplier_name is required")
+            if row["supplier_id"]:
+                try:
+                    row["supplier_id"] = uuid.UUID(row["supplier_id"])
+                except ValueError:
+                    raise CommandError(f"Line {line}: invalid supplier_id")
+            # Current pepper first, then the retired ones.
+            row["lookups"] = pin_lookup_digests(row["pin"])
+            row["lookup"] = row["lookups"][0]
+        return rows
+
+    def _check_unique(self, rows):
+        seen = {}
+        for index, row in enumerate(rows):
+            if row["lookup"] in seen:
+                raise CommandError(f"Line {index + 2}: PIN duplicates line {seen[row['lookup']] + 2}")
+            seen[row["lookup"]] = index
+
+        supplier_ids = [row["supplier_id"] for row in rows if row["supplier_id"]]
+        if len(set(supplier_ids)) != len(supplier_ids):
+            raise CommandError("Each supplier_id may appear only once")
+        known = set(
+            Supplier.objects.filter(supplier_id__in=supplier_ids)
+            .values_list("supplier_id", flat=True)
+        )
+        missing = [str(supplier_id) for supplier_id in supplier_ids if supplier_id not in known]
+        if missing:
+            raise CommandError(f"Unknown supplier_id: {', '.join(missing[:10])}")
+
+        # A PIN may be re-used by the supplier that already owns it, never by
+        # anyone else. PINs without a fingerprint are compared in hash_pin().
+        lines = {lookup: index for index, row in enumerate(rows) for lookup in row["lookups"]}
+        taken = Pin.objects.filter(pin_lookup__in=list(lines)).values_list("pin_lookup", "supplier_id")
+        for lookup, owner_id in taken:
+            if rows[lines[lookup]]["supplier_id"] != owner_id:
+                raise CommandError(
+                    f"Line {lines[lookup] + 2}: PIN already in use by another supplier"
+                )
+
+    @transaction.atomic
+    def _write(self, rows, hashed, batch_size):
+        new_suppliers = Supplier.objects.bulk_create(
+            [Supplier(supplier_name=row["supplier_name"]) for row in rows if not row["supplier_id"]],
+            batch_size=batch_size,
+        )
+        new_supplier_ids = iter(supplier.supplier_id for supplier in new_suppliers)
+        for row in rows:
+            if not row["supplier_id"]:
+                row["supplier_id"] = next(new_supplier_ids)
+
+        existing = {
+            pin.supplier_id: pin
+            for pin in Pin.objects.filter(supplier_id__in=[row["supplier_id"] for row in rows])
+        }
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for row, (pin_code, lookup) in zip(rows, hashed):
+            pin = existing.get(row["supplier_id"])
+            if pin is None:
+                to_create.append(Pin(supplier_id=row["supplier_id"], pin_code=pin_code, pin_lookup=lookup))
+            else:
+                pin.pin_code = pin_code
+                pin.pin_lookup = lookup
+                pin.updated_at = now
+                # As in Pin.set_pin(): tokens issued for the old PIN stop working.
+                pin.token_version += 1
+                to_update.append(pin)
+
+        Pin.objects.bulk_update(
+            to_update, ["pin_code", "pin_lookup", "token_version", "updated_at"], batch_size=batch_size
+        )
+        Pin.objects.bulk_create(to_create, batch_size=batch_size)
+        # bulk_update() sends no post_save, so api.signals cannot evict them.
+        for pin in to_update:
+            principal_cache.delete(supplier_cache_key(pin.supplier_id))
+        return len(to_create), len(to_update)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.sync import prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete invoice change log rows older than INVOICE_SYNC_RETENTION_DAYS. "
+        "Clients holding an older cursor get 410 Gone and reload their list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.INVOICE_SYNC_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        removed = prune_changes(days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} invoice changes"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.tokens import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete denylisted refresh tokens that have expired. Expired tokens "
+        "fail their signature check, so their entries are no longer needed."
+    )
+
+    def handle(self, *args, **options):
+        removed = prune_revoked_tokens()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} revoked refresh tokens"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from api.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-supplier and per-vessel monthly invoice summaries from the Invoice table."
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Summarized {count} invoices"))
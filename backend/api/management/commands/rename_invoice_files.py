@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api import conditional, sync
+from api.models import Invoice, invoice_upload_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing invoice PDFs to the sharded naming scheme used by "
+        "invoice_upload_path and update Invoice.pdf_file in bulk. "
+        "Content-addressed (PdfBlob) files are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only report which files would move")
+
+    def handle(self, *args, **options):
+        storage = Invoice._meta.get_field("pdf_file").storage
+        invoices = (
+            Invoice.objects.exclude(pdf_file="").exclude(pdf_file__isnull=True)
+            .filter(pdf_blob__isnull=True)
+            .only("invoice_id", "pdf_file").order_by("pk")
+        )
+
+        moved = missing = 0
+        batch = []
+        for invoice in invoices.iterator(chunk_size=options["batch_size"]):
+            old_name = invoice.pdf_file.name
+            new_name = invoice_upload_path(invoice, old_name)
+            if old_name == new_name:
+                continue
+
+            if not storage.exists(old_name):
+                missing += 1
+                self.stderr.write(f"Missing file for invoice {invoice.pk}: {old_name}")
+                continue
+
+            if options["dry_run"]:
+                self.stdout.write(f"{old_name} -> {new_name}")
+                moved += 1
+                continue
+
+            with storage.open(old_name, "rb") as source:
+                invoice.pdf_file.name = storage.save(new_name, source)
+            batch.append((invoice, old_name))
+            moved += 1
+
+            if len(batch) >= options["batch_size"]:
+                self._commit(storage, batch)
+                batch = []
+        self._commit(storage, batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} files ({missing} missing)"))
+
+    def _commit(self, storage, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            Invoice.objects.bulk_update([invoice for invoice, _ in batch], ["pdf_file"])
+            sync.record_changes((invoice.pk, invoice.supplier_id) for invoice, _ in batch)
+            conditional.bump(conditional.INVOICE)
+        # Old copies are only removed once the rows point at the new ones.
+        for _, old_name in batch:
+            storage.delete(old_name)
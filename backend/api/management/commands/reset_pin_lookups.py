@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from api.models import Pin
+
+
+class Command(BaseCommand):
+    help = (
+        "Clear every Pin.pin_lookup fingerprint, e.g. after losing a retired "
+        "PIN_LOOKUP_PEPPER. PINs are then found by the legacy scan and "
+        "re-fingerprinted with the current pepper on their next login, so "
+        "logins cost one check_password per unconverted PIN until then."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--noinput", action="store_false", dest="interactive")
+
+    def handle(self, *args, **options):
+        if options["interactive"]:
+            answer = input("Clear all PIN fingerprints? Logins slow down until suppliers log in again. [y/N] ")
+            if answer.strip().lower() != "y":
+                self.stdout.write("Cancelled")
+                return
+        cleared = Pin.objects.exclude(pin_lookup=None).update(pin_lookup=None)
+        self.stdout.write(self.style.SUCCESS(f"Cleared {cleared} PIN fingerprints"))
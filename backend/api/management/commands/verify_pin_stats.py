@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from api.throttling import metrics, reset_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Show verify-pin throttling counters and the PIN hashing CPU that "
+        "throttled attempts did not cost. Counters come from the default cache, so "
+        "they only cover other processes with a shared cache backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zero the counters after printing")
+
+    def handle(self, *args, **options):
+        stats = metrics()
+        self.stdout.write(f"verified attempts   {stats['verified']}")
+        self.stdout.write(f"failed attempts     {stats['failures']}")
+        self.stdout.write(f"throttled attempts  {stats['throttled']}")
+        self.stdout.write(f"PINs locked         {stats['locked']}")
+        self.stdout.write(f"CPU per verify      {stats['cpu_ms_per_verify']:.1f} ms")
+        self.stdout.write(f"CPU avoided         {stats['cpu_ms_avoided']:.0f} ms")
+        if options["reset"]:
+            reset_metrics()
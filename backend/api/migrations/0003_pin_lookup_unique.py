@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_pin_pin_lookup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pin',
+            name='pin_lookup',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_pin_lookup_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-date_created', '-invoice_id'], name='invoice_created_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['supplier', '-date_created', '-invoice_id'], name='invoice_supplier_keyset'),
+        ),
+    ]
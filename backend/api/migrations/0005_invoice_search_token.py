@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_invoice_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('invoice_number', 'Invoice number'), ('supplier', 'Supplier name'), ('vessel', 'Vessel name')], max_length=16)),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='api.invoice')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'invoice'], name='invoice_search_token')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_invoice_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfBlob',
+            fields=[
+                ('sha256', models.CharField(editable=False, max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'PDF blob',
+                'verbose_name_plural': 'PDF blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_blob',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='invoices', to='api.pdfblob'),
+        ),
+    ]
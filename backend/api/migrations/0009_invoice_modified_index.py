@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_pdf_preview'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['date_modified'], name='invoice_modified'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_table_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['submitted_date', 'invoice_id'], name='invoice_submitted_keyset'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_invoice_submitted_keyset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='api.supplier')),
+            ],
+            options={
+                'verbose_name_plural': 'Supplier monthly summaries',
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'month'), name='supplier_summary_month')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VesselMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('vessel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='api.vessel')),
+            ],
+            options={
+                'verbose_name_plural': 'Vessel monthly summaries',
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('vessel', 'month'), name='vessel_summary_month')],
+            },
+        ),
+    ]
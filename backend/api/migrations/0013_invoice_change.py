@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_invoice_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('invoice_id', models.UUIDField()),
+                ('supplier_id', models.UUIDField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['supplier_id', 'id'], name='invoice_change_supplier')],
+            },
+        ),
+    ]
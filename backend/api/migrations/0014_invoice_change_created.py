@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_invoice_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicechange',
+            name='created',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_invoice_change_created'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pin',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_pin_locked_until'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedRefreshToken',
+            fields=[
+                ('jti', models.UUIDField(primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_revoked_refresh_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicechange',
+            name='vessel_id',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='invoicechange',
+            name='invoice_id',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='invoicechange',
+            name='supplier_id',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='invoicechange',
+            index=models.Index(fields=['vessel_id', 'id'], name='invoice_change_vessel'),
+        ),
+    ]
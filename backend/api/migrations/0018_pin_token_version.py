@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_invoice_change_vessel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pin',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
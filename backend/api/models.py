@@ -1,6 +1,14 @@
 import uuid
 import os
-from django.db import models
+import hmac
+import hashlib
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.db import models, transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.deletion import ProtectedError
 from django.contrib.auth.hashers import make_password,check_password
 from django.core.exceptions import ValidationError
 from .storage_backends import MediaStorage
@@ -41,6 +49,21 @@ class Vessel(models.Model):
         return self.vessel_name
 
 
+def pin_lookup_digest(raw_pin, pepper=None):
+    """
+    Keyed fingerprint of a raw PIN so its row can be found with one
+    indexed query instead of running check_password against every Pin.
+    """
+    pepper = (pepper or settings.PIN_LOOKUP_PEPPER).encode()
+    return hmac.new(pepper, str(raw_pin).encode(), hashlib.sha256).hexdigest()
+
+
+def pin_lookup_digests(raw_pin):
+    """Fingerprints under the current pepper, then each retired one."""
+    peppers = [settings.PIN_LOOKUP_PEPPER, *settings.PIN_LOOKUP_OLD_PEPPERS]
+    return [pin_lookup_digest(raw_pin, pepper) for pepper in peppers]
+
+
 class Pin(models.Model):
     supplier = models.OneToOneField(
         Supplier,
@@ -48,47 +71,322 @@ class Pin(models.Model):
         related_name="pin"
     )
     pin_code = models.CharField(max_length=128)
+    pin_lookup = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        unique=True
+    )
     is_locked = models.BooleanField(default=False)
+    # End of an automatic lockout (VerifyPinView); None while is_locked
+    # means locked until an admin unlocks it.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    # Bumped by set_pin(); supplier tokens carry the version they were
+    # issued for (api.tokens), so changing the PIN ends their sessions.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+
+    @property
+    def lock_active(self):
+        """is_locked, unless it is a timed lock that has run out."""
+        return self.is_locked and (self.locked_until is None or self.locked_until > timezone.now())
+
+    def lock(self, duration=None):
+        """
+        Lock the PIN, for `duration` or until unlocked by an admin. Goes
+        through save() so api.signals evicts the cached supplier.
+        """
+        self.is_locked = True
+        self.locked_until = timezone.now() + duration if duration else None
+        self.save(update_fields=["is_locked", "locked_until", "updated_at"])
+
+    def unlock(self):
+        self.is_locked = False
+        self.locked_until = None
+        self.save(update_fields=["is_locked", "locked_until", "updated_at"])
     
     def clean(self):
-        raw_pin = self.pin_code
+        # pin_code is still raw here unless set_pin() already hashed it.
+        if self.pin_code.startswith('pbkdf2_'):
+            raw_pin = getattr(self, '_raw_pin', None)
+        else:
+            raw_pin = self.pin_code
 
-        for existing_pin in Pin.objects.exclude(pk=self.pk):
-            if check_password(raw_pin, existing_pin.pin_code):
-                raise ValidationError("This PIN code already in use by another supplier.")
+        if raw_pin is not None:
+            taken = Pin.holders(raw_pin) - {self.supplier_id}
+        else:
+            # Only the hash is known; compare what fingerprint there is.
+            taken = self.pin_lookup and Pin.objects.exclude(pk=self.pk).filter(pin_lookup=self.pin_lookup).exists()
+        if taken:
+            raise ValidationError("This PIN code already in use by another supplier.")
 
     def save(self,*args, **kwargs):
         self.full_clean()
         if not self.pin_code.startswith('pbkdf2_'):
-            self.pin_code = make_password(self.pin_code)
+            self.set_pin(self.pin_code)
         super().save(*args, **kwargs)
+        # Compared with the other PINs now; later saves keep only the hash.
+        self._raw_pin = None
 
     def set_pin(self,raw_pin):
         self.pin_code = make_password(raw_pin)
+        self.pin_lookup = pin_lookup_digest(raw_pin)
+        self.token_version += 1
+        # For clean(): the hash alone cannot be compared with legacy PINs.
+        self._raw_pin = raw_pin
     
     def check_pin(self,raw_pin,ignore_lock=False):
-        if self.is_locked and not ignore_lock:
+        if self.lock_active and not ignore_lock:
             return False
         return check_password(raw_pin,self.pin_code)
+
+    @classmethod
+    def holders(cls, raw_pin, legacy=None):
+        """
+        Return the supplier ids of the Pins that already hold raw_pin: by
+        fingerprint under any pepper, and by check_password against PINs
+        without a fingerprint (legacy), which cannot be backfilled until
+        their supplier logs in. `legacy` is a list of (supplier_id,
+        pin_code) pairs, loaded when not given.
+        """
+        holders = set(
+            cls.objects.filter(pin_lookup__in=pin_lookup_digests(raw_pin)).values_list("supplier_id", flat=True)
+        )
+        if legacy is None:
+            legacy = cls.legacy_pins()
+        holders.update(supplier_id for supplier_id, pin_code in legacy if check_password(raw_pin, pin_code))
+        return holders
+
+    @classmethod
+    def legacy_pins(cls):
+        return list(cls.objects.filter(pin_lookup__isnull=True).values_list("supplier_id", "pin_code"))
+
+    @classmethod
+    def find_by_pin(cls, raw_pin):
+        """
+        Return the Pin matching raw_pin (locked or not), or None.
+
+        Costs one indexed query and a single check_password. A PIN found
+        under a retired pepper (PIN_LOOKUP_OLD_PEPPERS) is re-fingerprinted
+        with the current one. PINs without a fingerprint (hashed before
+        pin_lookup existed, or cleared by reset_pin_lookups) are scanned,
+        and get it backfilled the first time their supplier logs in.
+        """
+        pins = cls.objects.select_related('supplier')
+        lookups = pin_lookup_digests(raw_pin)
+        lookup = lookups[0]
+
+        pin = pins.filter(pin_lookup__in=lookups).first()
+        if pin is not None:
+            if not pin.check_pin(raw_pin, ignore_lock=True):
+                return None
+            if pin.pin_lookup != lookup:
+                cls.objects.filter(pk=pin.pk).update(pin_lookup=lookup)
+                pin.pin_lookup = lookup
+            return pin
+
+        for legacy_pin in pins.filter(pin_lookup__isnull=True):
+            if legacy_pin.check_pin(raw_pin, ignore_lock=True):
+                cls.objects.filter(pk=legacy_pin.pk).update(pin_lookup=lookup)
+                legacy_pin.pin_lookup = lookup
+                return legacy_pin
+        return None
     
     
     def __str__(self):
-        return f"PIN for {self.supplier.supplier_name}"
+        # Only use the supplier when it is already loaded; lists of pins
+        # must not cost a query each.
+        if Pin.supplier.is_cached(self):
+            return f"PIN for {self.supplier.supplier_name}"
+        return f"PIN for supplier {self.supplier_id}"
+
+
+class RevokedRefreshToken(models.Model):
+    """
+    Denylist of refresh token ids (the jti claim) that were rotated or
+    revoked, and of whole sessions (the sid claim) ended because a
+    rotated token was reused (api.tokens). A row is only needed until
+    the token or session itself expires; prune_revoked_tokens removes it
+    after that.
+    """
+    jti = models.UUIDField(primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return str(self.jti)
 
 def invoice_upload_path(instance, filename):
-    base, ext = os.path.splitext(filename)
-    invoice_id = str(instance.invoice_id).replace('-', '')
+    """
+    invoices/pdfs/<ab>/<cd>/<invoice_id hex><ext>
+
+    Named after the invoice's primary key, so no query is needed and
+    concurrent uploads cannot collide. The two shard levels come from the
+    (random) UUID and keep every directory small.
+    """
+    ext = os.path.splitext(filename)[1]
+    invoice_id = instance.invoice_id.hex
+
+    return f"invoices/pdfs/{invoice_id[:2]}/{invoice_id[2:4]}/{invoice_id}{ext.lower()}"
+
+def pdf_blob_path(sha256):
+    return f"invoices/blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf"
+
+
+class PdfBlob(models.Model):
+    """
+    Content-addressed invoice PDF, stored once no matter how many invoices
+    reference it. ref_count is maintained by api.signals; blobs that drop
+    to zero are removed by the gc_pdf_blobs management command.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True, editable=False)
+    size = models.PositiveBigIntegerField()
+    file = models.FileField(max_length=255)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "PDF blob"
+        verbose_name_plural = "PDF blobs"
+
+    def __str__(self):
+        return self.sha256
+
+    @classmethod
+    def store(cls, uploaded_file):
+        """
+        Hash uploaded_file in chunks and return its blob, writing the bytes
+        to storage only if this content has never been seen before.
+        """
+        # PdfUploadHandler already hashed the bytes while they streamed in.
+        sha256 = getattr(uploaded_file, "sha256", None)
+        size = uploaded_file.size
+        if sha256 is None:
+            digest = hashlib.sha256()
+            size = 0
+            for chunk in uploaded_file.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+            sha256 = digest.hexdigest()
 
-    existing_files = Invoice.objects.filter(invoice_id=instance.invoice_id).count()
-    suffix = f"_{existing_files + 1}" if existing_files > 0 else ""
+        blob = cls.objects.filter(pk=sha256).first()
+        if blob is not None:
+            return blob
+
+        name = pdf_blob_path(sha256)
+        storage = cls._meta.get_field("file").storage
+        if not storage.exists(name):
+            uploaded_file.seek(0)
+            name = storage.save(name, uploaded_file)
+
+        blob, created = cls.objects.get_or_create(pk=sha256, defaults={"size": size, "file": name})
+        if created:
+            # Queue page count, text, thumbnail and linearization (api.pdf_processing).
+            PdfPreview.objects.get_or_create(blob=blob)
+        elif name != blob.file.name:
+            # A concurrent upload of the same content saved first, so ours
+            # went to an alternate name that no row will ever reference.
+            storage.delete(name)
+        return blob
+
+    @classmethod
+    def count_references(cls, added=(), removed=()):
+        """Move ref_count by one per blob id in added / removed (None is skipped)."""
+        for sha256, count in Counter(filter(None, added)).items():
+            cls.objects.filter(pk=sha256).update(ref_count=F("ref_count") + count)
+        for sha256, count in Counter(filter(None, removed)).items():
+            cls.objects.filter(pk=sha256, ref_count__gte=count).update(ref_count=F("ref_count") - count)
+
+    @classmethod
+    def delete_unreferenced(cls, sha256, candidates=None):
+        """
+        Delete the blob, and its files once that commits, unless something
+        references it; False if something does. candidates narrows the
+        blobs that may go (gc_pdf_blobs passes its grace period).
+
+        The row lock makes a concurrent upload's ref_count update wait, so
+        the recheck cannot miss an invoice that picked the blob up.
+        """
+        if candidates is None:
+            candidates = cls.objects.all()
+        candidates = candidates.filter(ref_count=0).exclude(
+            Exists(Invoice.objects.filter(pdf_blob=OuterRef("pk")))
+        )
+        try:
+            with transaction.atomic():
+                blob = candidates.select_for_update().filter(pk=sha256).first()
+                if blob is None:
+                    return False
+                preview = PdfPreview.objects.filter(blob=blob).first()
+                files = [blob.file]
+                if preview is not None:
+                    files += [preview.thumbnail, preview.web_file]
+                blob.delete()
+                transaction.on_commit(lambda: cls._delete_files(sha256, files))
+        except ProtectedError:
+            return False
+        return True
+
+    @classmethod
+    def _delete_files(cls, sha256, files):
+        # store() reuses a file it finds at the blob's path, so leave the
+        # files to a blob re-created from the same bytes in the meantime.
+        if cls.objects.filter(pk=sha256).exists():
+            return
+        for file in files:
+            if file:
+                file.delete(save=False)
+
+
+class PdfPreview(models.Model):
+    """
+    Derived data for a PdfBlob, doubling as its row in the DB-backed
+    processing queue drained by the process_pdfs management command.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    blob = models.OneToOneField(
+        PdfBlob,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="preview"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    text = models.TextField(blank=True)
+    thumbnail = models.FileField(max_length=255, blank=True)
+    web_file = models.FileField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="pdf_preview_queue"),
+        ]
+
+    def __str__(self):
+        return f"Preview {self.blob_id} ({self.status})"
+
+
+# Invoice fields that decide its summary buckets and totals.
+SUMMARY_FIELDS = ("supplier_id", "vessel_id", "submitted_date", "amount_due")
 
-    new_filename = f"{invoice_id}{suffix}{ext}"
-    return f"invoices/pdfs/{new_filename}"
 
 class Invoice(models.Model):
     invoice_id = models.UUIDField(
@@ -114,6 +412,14 @@ class Invoice(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
     pdf_file = models.FileField(upload_to=invoice_upload_path, blank=True, null=True)
+    pdf_blob = models.ForeignKey(
+        PdfBlob,
+        on_delete=models.PROTECT,
+        related_name="invoices",
+        blank=True,
+        null=True,
+        editable=False
+    )
     # pdf_file = models.FileField(upload_to="invoices/pdfs/", blank=True, null=True)
     # pdf_file = models.FileField(
     #     storage=MediaStorage(),
@@ -125,6 +431,232 @@ class Invoice(models.Model):
     class Meta:
         ordering = ["-date_created"]
         verbose_name = "Invoice" 
+        indexes = [
+            # Keyset pagination in api.pagination.InvoiceCursorPagination
+            models.Index(fields=["-date_created", "-invoice_id"], name="invoice_created_keyset"),
+            models.Index(fields=["supplier", "-date_created", "-invoice_id"], name="invoice_supplier_keyset"),
+            # Catch-up reads of recently changed rows (api.bloom)
+            models.Index(fields=["date_modified"], name="invoice_modified"),
+            # Keyset batches of accounting exports (api.export)
+            models.Index(fields=["submitted_date", "invoice_id"], name="invoice_submitted_keyset"),
+        ]
+
+    def __str__(self):
+        # Only use vessel and supplier when already loaded (select_related);
+        # lists of invoices must not cost two queries each.
+        if Invoice.vessel.is_cached(self) and Invoice.supplier.is_cached(self):
+            return f"Invoice {self.invoice_number} - {self.vessel.vessel_name} ({self.supplier.supplier_name})"
+        return f"Invoice {self.invoice_number}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored blob so api.signals can move its ref_count.
+        instance._loaded_pdf_blob_id = instance.__dict__.get("pdf_blob_id")
+        # ...and the stored summary bucket, so it can move totals (api.summaries).
+        instance._loaded_summary_values = tuple(
+            instance.__dict__.get(field) for field in SUMMARY_FIELDS
+        )
+        return instance
+
+    def summary_values(self):
+        """The (supplier_id, vessel_id, submitted_date, amount_due) bucket api.summaries counts."""
+        return tuple(getattr(self, field) for field in SUMMARY_FIELDS)
+
+    def save(self, *args, **kwargs):
+        # post_save receivers (blob refs, search tokens, summaries) commit
+        # or roll back together with the row.
+        with transaction.atomic():
+            # New uploads are stored content-addressed instead of via upload_to.
+            if self.pdf_file and not self.pdf_file._committed:
+                self.pdf_blob = PdfBlob.store(self.pdf_file.file)
+                self.pdf_file = self.pdf_blob.file.name
+            elif not self.pdf_file:
+                self.pdf_blob = None
+
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "pdf_file" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "pdf_blob"}
+            super().save(*args, **kwargs)
+
+
+class InvoiceSearchToken(models.Model):
+    """
+    Denormalized search index for Invoice, one row per normalized token.
+
+    Maintained by api.search on Invoice/Supplier/Vessel saves so the staff
+    search box can use an indexed prefix match instead of icontains scans.
+    """
+    INVOICE_NUMBER = "invoice_number"
+    SUPPLIER = "supplier"
+    VESSEL = "vessel"
+    SOURCE_CHOICES = [
+        (INVOICE_NUMBER, "Invoice number"),
+        (SUPPLIER, "Supplier name"),
+        (VESSEL, "Vessel name"),
+    ]
+
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.CASCADE,
+        related_name="search_tokens"
+    )
+    source = models.CharField(max_length=16, choices=SOURCE_CHOICES)
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["token", "invoice"], name="invoice_search_token"),
+        ]
+
+    def __str__(self):
+        return f"{self.token} ({self.source})"
+
+
+def upload_session_expiry():
+    return timezone.now() + timedelta(hours=settings.RESUMABLE_UPLOAD_TTL_HOURS)
+
+
+class UploadSession(models.Model):
+    """
+    A resumable invoice PDF upload. Chunks are appended in order to a file
+    under RESUMABLE_UPLOAD_DIR; received_size is the offset the client
+    resumes from after a dropped connection.
+    """
+    upload_id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    supplier = models.ForeignKey(
+        Supplier,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions"
+    )
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_size = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=upload_session_expiry, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Upload {self.upload_id} ({self.received_size}/{self.total_size})"
+
+    @property
+    def temp_path(self):
+        return os.path.join(settings.RESUMABLE_UPLOAD_DIR, f"{self.upload_id.hex}.part")
+
+    @property
+    def is_complete(self):
+        return self.received_size == self.total_size
+
+    def discard(self):
+        """Delete the session row, and its partial file once that commits."""
+        temp_path = self.temp_path
+        self.delete()
+        transaction.on_commit(lambda: self._remove_file(temp_path))
+
+    @staticmethod
+    def _remove_file(temp_path):
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+
+class TableVersion(models.Model):
+    """
+    Change counter per table, bumped after every committed write by
+    api.conditional. List endpoints derive their ETag/Last-Modified from
+    these rows instead of from the payload.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class InvoiceChange(models.Model):
+    """
+    Append-only log of invoice writes behind the sync feed (api.sync).
+    The auto-increment id is the feed cursor. Rows outlive their invoice,
+    so deletes reach clients as tombstones; prune_invoice_changes drops
+    rows older than INVOICE_SYNC_RETENTION_DAYS.
+
+    A vessel rename is one row with only vessel_id set, read as an update
+    of every invoice of that vessel.
+    """
+    id = models.BigAutoField(primary_key=True)
+    invoice_id = models.UUIDField(null=True)
+    supplier_id = models.UUIDField(null=True)
+    vessel_id = models.UUIDField(null=True)
+    deleted = models.BooleanField(default=False)
+    # Set for the entry written when the invoice was first saved.
+    created = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["supplier_id", "id"], name="invoice_change_supplier"),
+            models.Index(fields=["vessel_id", "id"], name="invoice_change_vessel"),
+        ]
+
+    def __str__(self):
+        if self.vessel_id:
+            return f"#{self.id} vessel {self.vessel_id}"
+        return f"#{self.id} {'delete' if self.deleted else 'upsert'} {self.invoice_id}"
+
+
+class SupplierMonthlySummary(models.Model):
+    """
+    Invoice count and amount_due total per supplier and calendar month
+    (local time) of submitted_date. Kept in step with Invoice writes by
+    api.summaries; rebuild with manage.py rebuild_invoice_summaries.
+    """
+    supplier = models.ForeignKey(
+        Supplier,
+        on_delete=models.CASCADE,
+        related_name="monthly_summaries"
+    )
+    month = models.DateField()
+    invoice_count = models.PositiveIntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["-month"]
+        verbose_name_plural = "Supplier monthly summaries"
+        constraints = [
+            models.UniqueConstraint(fields=["supplier", "month"], name="supplier_summary_month"),
+        ]
+
+    def __str__(self):
+        return f"{self.supplier_id} {self.month:%Y-%m}: {self.invoice_count}"
+
+
+class VesselMonthlySummary(models.Model):
+    """Per-vessel counterpart of SupplierMonthlySummary."""
+    vessel = models.ForeignKey(
+        Vessel,
+        on_delete=models.CASCADE,
+        related_name="monthly_summaries"
+    )
+    month = models.DateField()
+    invoice_count = models.PositiveIntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["-month"]
+        verbose_name_plural = "Vessel monthly summaries"
+        constraints = [
+            models.UniqueConstraint(fields=["vessel", "month"], name="vessel_summary_month"),
+        ]
 
     def __str__(self):
-        return f"Invoice {self.invoice_number} - {self.vessel.vessel_name} ({self.supplier.supplier_name})"
+        return f"{self.vessel_id} {self.month:%Y-%m}: {self.invoice_count}"
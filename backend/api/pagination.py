@@ -0,0 +1,122 @@
+import base64
+import json
+import uuid
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvoiceCursorPagination(BasePagination):
+    """
+    Keyset pagination over (date_created, invoice_id), newest first.
+
+    The cursor is an opaque token holding the last row's sort key, so every
+    page is a single index range scan no matter how deep the client scrolls.
+    When rank_field is set (ranked search results), rows are ordered by that
+    annotation first and it becomes part of the cursor.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, rank_field=None):
+        self.rank_field = rank_field
+        self.page_size = settings.INVOICE_PAGE_SIZE
+        self.max_page_size = settings.INVOICE_MAX_PAGE_SIZE
+        self.next_cursor = None
+        self.request = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, on the async ORM."""
+        return self.get_page([row async for row in self.get_page_queryset(queryset, request)])
+
+    def get_page_queryset(self, queryset, request):
+        """The rows after the cursor, one more than a page to spot the next."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        fields = self.get_ordering_fields()
+        position = self.decode_cursor(request)
+        if position is not None:
+            # (a, b, c) < (x, y, z) spelled out for databases without row comparisons.
+            after = Q()
+            for index, field in enumerate(fields):
+                equal = {fields[i]: position[i] for i in range(index)}
+                after |= Q(**equal, **{f"{field}__lt": position[index]})
+            queryset = queryset.filter(after)
+
+        ordering = [f"-{field}" for field in fields]
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def get_page(self, rows):
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_cursor = self.encode_cursor(rows[-1])
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return {
+            "next": next_url,
+            "next_cursor": self.next_cursor,
+            "results": data,
+        }
+
+    def get_ordering_fields(self):
+        fields = ["date_created", "invoice_id"]
+        if self.rank_field:
+            fields.insert(0, self.rank_field)
+        return fields
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, invoice):
+        # Rows are model instances or .values() dicts (FastInvoiceListSerializer).
+        row = invoice if isinstance(invoice, dict) else vars(invoice)
+        position = [row["date_created"].isoformat(), str(row["invoice_id"])]
+        if self.rank_field:
+            position.insert(0, row[self.rank_field])
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded))
+            if self.rank_field:
+                rank, date_created, invoice_id = position
+                rank = int(rank)
+            else:
+                date_created, invoice_id = position
+            date_created = parse_datetime(date_created)
+            invoice_id = uuid.UUID(invoice_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if date_created is None:
+            raise NotFound(self.invalid_cursor_message)
+        if self.rank_field:
+            return rank, date_created, invoice_id
+        return date_created, invoice_id
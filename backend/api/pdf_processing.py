@@ -0,0 +1,62 @@
+import io
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+def derived_path(kind, sha256, ext):
+    return f"invoices/{kind}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def process_pdf(sha256, name):
+    """
+    Extract page count and text, render a first-page PNG thumbnail and
+    write a linearized copy for fast web view.
+
+    Runs inside a process_pdfs pool worker: it only touches storage, never
+    the database, and returns the values for the parent to record.
+    """
+    import pikepdf
+    import pymupdf
+
+    with default_storage.open(name, "rb") as source:
+        data = source.read()
+
+    with pymupdf.open(stream=data, filetype="pdf") as document:
+        page_count = document.page_count
+        text = []
+        length = 0
+        for page in document:
+            if length >= settings.PDF_TEXT_MAX_CHARS:
+                break
+            page_text = page.get_text()
+            text.append(page_text)
+            length += len(page_text)
+
+        thumbnail_name = ""
+        if page_count:
+            first_page = document[0]
+            zoom = settings.PDF_THUMBNAIL_WIDTH / first_page.rect.width
+            pixmap = first_page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
+            thumbnail_name = save_derived(
+                derived_path("thumbnails", sha256, ".png"), pixmap.tobytes("png")
+            )
+
+    linearized = io.BytesIO()
+    with pikepdf.open(io.BytesIO(data)) as pdf:
+        pdf.save(linearized, linearize=True)
+    web_name = save_derived(derived_path("web", sha256, ".pdf"), linearized.getvalue())
+
+    return {
+        "page_count": page_count,
+        "text": "".join(text)[:settings.PDF_TEXT_MAX_CHARS],
+        "thumbnail": thumbnail_name,
+        "web_file": web_name,
+    }
+
+
+def save_derived(name, content):
+    # Content-addressed, so an existing file is already the right one.
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(content))
@@ -0,0 +1,9 @@
+from rest_framework import permissions
+from .models import Supplier
+
+
+class IsSupplier(permissions.BasePermission):
+    """Allow only requests authenticated as a Supplier by JWTAuthentication."""
+
+    def has_permission(self, request, view):
+        return isinstance(request.user, Supplier)
@@ -0,0 +1,34 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes plain data (str, int, bool, None, dict, list;
+    e.g. FastInvoiceListSerializer output) with orjson, producing the same
+    bytes as the compact, unicode JSONRenderer output. Other types raise
+    in orjson and, like indented output, go through JSONRenderer instead.
+    Floats would be formatted differently, so keep them out of such data.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.reject, option=orjson.OPT_PASSTHROUGH_SUBCLASS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping JSONRenderer adds for JavaScript embedding.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+    @staticmethod
+    def reject(obj):
+        raise TypeError(type(obj).__name__)
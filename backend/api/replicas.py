@@ -0,0 +1,133 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Replica chosen for the current view by @replica_reads; None reads the primary.
+_replica = ContextVar("db_replica", default=None)
+# Set once anything in the current request writes; reads after that stay
+# on the primary so the request sees its own writes.
+_wrote = ContextVar("db_wrote", default=False)
+
+
+class ReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to a replica only inside a
+    view decorated with @replica_reads, and only until that request
+    writes; everything else reads the primary as before.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or _wrote.get():
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows, so objects read from either may mix.
+        pool = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+def sticky_key(request):
+    """Cache key for the client: its bearer token, else its address."""
+    client = request.headers.get("Authorization") or request.META.get("REMOTE_ADDR", "")
+    return "db_sticky:" + hashlib.blake2b(client.encode(), digest_size=16).hexdigest()
+
+
+def choose_replica(request):
+    """
+    A replica for this request's reads, or None for the primary: with no
+    replicas configured, or within DB_STICKY_PRIMARY_SECONDS of the client's
+    last write, so it reads what it just wrote despite replication lag.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas or cache.get(sticky_key(request)):
+        return None
+    return random.choice(replicas)
+
+
+def replica_reads(view_func):
+    """
+    Decorator for view handlers (sync or async) that only read: their
+    queries go to a replica. Put it above @conditional_list so the ETag
+    and the rows come from the same database.
+    """
+    if iscoroutinefunction(view_func):
+        # The async ORM runs queries in threads with a copy of this context.
+        @wraps(view_func)
+        async def async_wrapper(self, request, *args, **kwargs):
+            token = _replica.set(choose_replica(request))
+            try:
+                return await view_func(self, request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        token = _replica.set(choose_replica(request))
+        try:
+            return view_func(self, request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary():
+    """Read the primary inside the block, e.g. to build shared caches."""
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class StickyPrimaryMiddleware:
+    """
+    Notes requests that wrote to the database and keeps their client on the
+    primary for DB_STICKY_PRIMARY_SECONDS afterwards.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            self.mark_sticky(request)
+        finally:
+            _wrote.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            self.mark_sticky(request)
+        finally:
+            _wrote.reset(token)
+        return response
+
+    def mark_sticky(self, request):
+        if _wrote.get() and settings.DATABASE_REPLICAS:
+            cache.set(sticky_key(request), True, settings.DB_STICKY_PRIMARY_SECONDS)
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import re
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.files import File
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ParseError
+from .models import UploadSession
+from .upload_handlers import PDF_MAGIC, PDF_HEADER_WINDOW, InvalidPdf, UploadTooLarge
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+READ_SIZE = 64 * 1024
+
+
+class ChunkConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Chunk does not start at the current upload offset."
+    default_code = "chunk_conflict"
+
+
+def create_session(supplier, filename, total_size, sha256=""):
+    if total_size <= 0:
+        raise ParseError("total_size must be positive.")
+    if total_size > settings.INVOICE_UPLOAD_MAX_SIZE:
+        raise UploadTooLarge(f"Uploaded file exceeds {settings.INVOICE_UPLOAD_MAX_SIZE} bytes.")
+
+    session = UploadSession.objects.create(
+        supplier=supplier,
+        filename=os.path.basename(filename)[:255] or "invoice.pdf",
+        total_size=total_size,
+        sha256=sha256.lower(),
+    )
+    os.makedirs(settings.RESUMABLE_UPLOAD_DIR, exist_ok=True)
+    open(session.temp_path, "wb").close()
+    return session
+
+
+def get_session(supplier, upload_id, lock=False):
+    """
+    The supplier's unexpired session, or NotFound. With lock, the row is
+    locked until the surrounding transaction ends.
+    """
+    sessions = UploadSession.objects.select_for_update() if lock else UploadSession.objects
+    try:
+        return sessions.get(
+            upload_id=upload_id,
+            supplier=supplier,
+            expires_at__gt=datetime.now(timezone.utc),
+        )
+    except UploadSession.DoesNotExist:
+        raise NotFound("No such upload")
+
+
+def parse_content_range(header, session):
+    """Return (start, end_exclusive) from a "bytes a-b/total" header."""
+    match = CONTENT_RANGE_RE.match(header or "")
+    if not match:
+        raise ParseError("Content-Range must look like 'bytes start-end/total'.")
+
+    start, last, total = (int(value) for value in match.groups())
+    if total != session.total_size or last < start or last >= total:
+        raise ParseError("Content-Range does not fit this upload.")
+    if last - start + 1 > settings.RESUMABLE_UPLOAD_CHUNK_SIZE:
+        raise UploadTooLarge(f"Chunks may not exceed {settings.RESUMABLE_UPLOAD_CHUNK_SIZE} bytes.")
+    return start, last + 1
+
+
+def write_chunk(session, start, end, stream, checksum):
+    """
+    Write the byte range [start, end) from stream at its offset and move
+    received_size forward if the chunk's SHA-256 matches checksum.
+
+    Re-sent chunks that were already stored are accepted without writing,
+    so a client that lost the response can simply retry.
+    """
+    if end <= session.received_size:
+        return session
+    if start != session.received_size:
+        raise ChunkConflict()
+    if not checksum:
+        raise ParseError("X-Chunk-SHA256 header is required.")
+
+    digest = hashlib.sha256()
+    remaining = end - start
+    header = b""
+    with open(session.temp_path, "r+b") as target:
+        target.seek(start)
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining)) if stream else b""
+            if not data:
+                break
+            if start == 0 and len(header) < PDF_HEADER_WINDOW:
+                header += data[:PDF_HEADER_WINDOW]
+            digest.update(data)
+            target.write(data)
+            remaining -= len(data)
+
+    if remaining:
+        raise ParseError("Request body is shorter than Content-Range.")
+    if digest.hexdigest() != checksum.lower():
+        # The bytes past received_size are simply overwritten by the retry.
+        raise ParseError("Chunk checksum mismatch.")
+    if start == 0 and PDF_MAGIC not in header and (
+        len(header) >= PDF_HEADER_WINDOW or end == session.total_size
+    ):
+        raise InvalidPdf()
+
+    updated = UploadSession.objects.filter(
+        pk=session.pk, received_size=start
+    ).update(received_size=end)
+    if not updated:
+        raise ChunkConflict()
+
+    session.received_size = end
+    return session
+
+
+def assembled_file(session):
+    """
+    Open the completed upload as a File carrying its size and sha256,
+    ready for InvoiceUploadSerializer and PdfBlob.store().
+    """
+    if not session.is_complete:
+        raise ChunkConflict("Upload is not complete yet.")
+
+    digest = hashlib.sha256()
+    handle = open(session.temp_path, "rb")
+    for data in iter(lambda: handle.read(READ_SIZE), b""):
+        digest.update(data)
+    handle.seek(0)
+    header = handle.read(PDF_HEADER_WINDOW)
+    handle.seek(0)
+
+    sha256 = digest.hexdigest()
+    if session.sha256 and session.sha256 != sha256:
+        handle.close()
+        raise ParseError("File checksum mismatch.")
+    if PDF_MAGIC not in header:
+        handle.close()
+        raise InvalidPdf()
+
+    uploaded_file = File(handle, name=session.filename)
+    uploaded_file.sha256 = sha256
+    return uploaded_file
@@ -0,0 +1,142 @@
+import re
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .models import Invoice, InvoiceSearchToken
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+TOKEN_MAX_LENGTH = 64
+
+# How much a match in each source contributes to the rank. Exact token
+# matches count double; suffix tokens (substring matches inside invoice
+# numbers) count least.
+SOURCE_WEIGHTS = {
+    InvoiceSearchToken.INVOICE_NUMBER: 4,
+    InvoiceSearchToken.SUPPLIER: 2,
+    InvoiceSearchToken.VESSEL: 2,
+}
+SUFFIX_WEIGHT = 1
+
+
+def tokenize(text):
+    """Split text into casefolded word tokens, without duplicates, in order."""
+    tokens = []
+    for token in TOKEN_RE.findall((text or "").casefold()):
+        token = token[:TOKEN_MAX_LENGTH]
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def build_tokens(invoice_id, source, text):
+    weight = SOURCE_WEIGHTS[source]
+    rows = {}
+    for token in tokenize(text):
+        rows[token] = weight
+        if source == InvoiceSearchToken.INVOICE_NUMBER:
+            # Suffixes turn a prefix lookup into a substring match,
+            # so "123" still finds "INV-00123".
+            for start in range(1, len(token) - 1):
+                rows.setdefault(token[start:], SUFFIX_WEIGHT)
+
+    return [
+        InvoiceSearchToken(invoice_id=invoice_id, source=source, token=token, weight=weight)
+        for token, weight in rows.items()
+    ]
+
+
+def invoice_tokens(invoice_id, invoice_number, supplier_name, vessel_name):
+    return (
+        build_tokens(invoice_id, InvoiceSearchToken.INVOICE_NUMBER, invoice_number)
+        + build_tokens(invoice_id, InvoiceSearchToken.SUPPLIER, supplier_name)
+        + build_tokens(invoice_id, InvoiceSearchToken.VESSEL, vessel_name)
+    )
+
+
+def index_invoices(invoices, batch_size=1000):
+    """(Re)build every search token of the given invoices."""
+    InvoiceSearchToken.objects.filter(invoice_id__in=[invoice.pk for invoice in invoices]).delete()
+    InvoiceSearchToken.objects.bulk_create(
+        [
+            token
+            for invoice in invoices
+            for token in invoice_tokens(
+                invoice.pk,
+                invoice.invoice_number,
+                invoice.supplier.supplier_name,
+                invoice.vessel.vessel_name,
+            )
+        ],
+        batch_size=batch_size,
+    )
+
+
+def index_invoice(invoice):
+    """(Re)build every search token of a single invoice."""
+    index_invoices([invoice])
+
+
+def reindex_source(source, invoices, text, batch_size=1000):
+    """Rebuild one source's tokens for many invoices, e.g. after a rename."""
+    invoice_ids = list(invoices.values_list("pk", flat=True))
+    InvoiceSearchToken.objects.filter(source=source, invoice_id__in=invoice_ids).delete()
+    InvoiceSearchToken.objects.bulk_create(
+        [token for invoice_id in invoice_ids for token in build_tokens(invoice_id, source, text)],
+        batch_size=batch_size,
+    )
+
+
+def rebuild_index(batch_size=1000):
+    """Rebuild the whole index from Invoice rows. Returns the invoice count."""
+    InvoiceSearchToken.objects.all().delete()
+    rows = (
+        Invoice.objects.order_by()
+        .values_list("pk", "invoice_number", "supplier__supplier_name", "vessel__vessel_name")
+        .iterator(chunk_size=batch_size)
+    )
+
+    count = 0
+    pending = []
+    for row in rows:
+        pending.extend(invoice_tokens(*row))
+        count += 1
+        if len(pending) >= batch_size:
+            InvoiceSearchToken.objects.bulk_create(pending, batch_size=batch_size)
+            pending = []
+    InvoiceSearchToken.objects.bulk_create(pending, batch_size=batch_size)
+    return count
+
+
+def search_invoices(queryset, search):
+    """
+    Filter queryset to invoices matching every term of search as a token
+    prefix, annotated with a search_rank (higher is better).
+    """
+    terms = tokenize(search)[:settings.INVOICE_SEARCH_MAX_TERMS]
+    if not terms:
+        return queryset.none()
+
+    for term in terms:
+        queryset = queryset.filter(
+            pk__in=InvoiceSearchToken.objects.filter(token__startswith=term).values("invoice_id")
+        )
+
+    matches = Q()
+    exact_matches = Q()
+    for term in terms:
+        matches |= Q(token__startswith=term)
+        exact_matches |= Q(token=term)
+
+    rank = (
+        InvoiceSearchToken.objects
+        .filter(matches, invoice_id=OuterRef("pk"))
+        .order_by()
+        .values("invoice_id")
+        .annotate(score=Sum(Case(
+            When(exact_matches, then=F("weight")),
+            default=Value(0),
+            output_field=IntegerField(),
+        ) + F("weight")))
+        .values("score")
+    )
+    return queryset.annotate(search_rank=Coalesce(Subquery(rank), Value(0)))
@@ -1,5 +1,9 @@
+import decimal
+from django.conf import settings
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
-from .models import Pin, Supplier, Invoice, Vessel
+from .models import Pin, Supplier, Invoice, Vessel, PdfPreview, SupplierMonthlySummary, VesselMonthlySummary
 
 # --------------------------
 # Supplier Serializer
@@ -48,11 +52,38 @@ class InvoiceUploadSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["invoice_id", "date_created", "date_modified"]
     
+class InvoiceBatchItemSerializer(serializers.ModelSerializer):
+    """
+    One invoice of a staff batch submission. Supplier and vessel stay plain
+    ids and invoice_number has no per-row UniqueValidator: the batch view
+    resolves and checks them for the whole batch in one query each.
+    """
+    supplier = serializers.UUIDField()
+    vessel = serializers.UUIDField()
+
+    class Meta:
+        model = Invoice
+        fields = [
+            "supplier",
+            "vessel",
+            "invoice_number",
+            "submitted_date",
+            "amount_due",
+            "description",
+            "pdf_file",
+        ]
+        extra_kwargs = {"invoice_number": {"validators": []}}
+
 # -----------------------------
 # Invoice List per Supplier
 # -----------------------------
 class InvoiceListSerializer(serializers.ModelSerializer):
     vessel_name = serializers.CharField(source='vessel.vessel_name', read_only=True)
+    # Filled in by the process_pdfs worker; null until the PDF is processed.
+    thumbnail = serializers.FileField(source='pdf_blob.preview.thumbnail', read_only=True, default=None)
+    page_count = serializers.IntegerField(source='pdf_blob.preview.page_count', read_only=True, default=None)
+    # Linearized copy that browsers can show before the whole file arrives.
+    web_file = serializers.FileField(source='pdf_blob.preview.web_file', read_only=True, default=None)
     
     class Meta:
         model = Invoice
@@ -63,9 +94,163 @@ class InvoiceListSerializer(serializers.ModelSerializer):
             "amount_due",
             "description",
             "pdf_file",
+            "thumbnail",
+            "page_count",
+            "web_file",
             "vessel_name",
             "date_created",
             "date_modified",
         ]
 
 
+def file_url_builder(storage):
+    """
+    Return a name -> URL function for storage. When the storage's URLs are
+    a fixed prefix plus the quoted name (file system, public S3), URLs are
+    built by concatenation instead of a storage.url() call per file.
+    """
+    probe = "probe/file.pdf"
+    probe_url = storage.url(probe)
+    if not probe_url.endswith(probe):
+        # Signed or otherwise per-file URLs.
+        return storage.url
+    prefix = probe_url[:-len(probe)]
+    return lambda name: prefix + filepath_to_uri(name).lstrip("/")
+
+
+class FastInvoiceListSerializer:
+    """
+    Read-only twin of InvoiceListSerializer for the invoice list endpoints.
+
+    Works on .values() rows (see values()) and produces exactly the same
+    output, without DRF's per-row field machinery or per-file storage
+    calls. test_fast_serializer keeps the two in step.
+    """
+    sources = {
+        "invoice_id": "invoice_id",
+        "invoice_number": "invoice_number",
+        "submitted_date": "submitted_date",
+        "amount_due": "amount_due",
+        "description": "description",
+        "pdf_file": "pdf_file",
+        "thumbnail": "pdf_blob__preview__thumbnail",
+        "page_count": "pdf_blob__preview__page_count",
+        "web_file": "pdf_blob__preview__web_file",
+        "vessel_name": "vessel__vessel_name",
+        "date_created": "date_created",
+        "date_modified": "date_modified",
+    }
+
+    @classmethod
+    def values(cls, queryset, *extra):
+        return queryset.values(*cls.sources.values(), *extra)
+
+    def __init__(self):
+        self.timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        self.pdf_url = file_url_builder(Invoice._meta.get_field("pdf_file").storage)
+        self.thumbnail_url = file_url_builder(PdfPreview._meta.get_field("thumbnail").storage)
+        self.web_file_url = file_url_builder(PdfPreview._meta.get_field("web_file").storage)
+
+        amount_field = Invoice._meta.get_field("amount_due")
+        self.amount_quantum = decimal.Decimal(".1") ** amount_field.decimal_places
+        self.amount_context = decimal.getcontext().copy()
+        self.amount_context.prec = amount_field.max_digits
+
+    def datetime(self, value):
+        # Same as DRF's DateTimeField with the default ISO 8601 format.
+        if value is None:
+            return None
+        if self.timezone is not None:
+            value = value.astimezone(self.timezone)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    def to_representation(self, rows):
+        datetime, pdf_url, thumbnail_url = self.datetime, self.pdf_url, self.thumbnail_url
+        web_file_url = self.web_file_url
+        quantum, context = self.amount_quantum, self.amount_context
+        return [
+            {
+                "invoice_id": str(row["invoice_id"]),
+                "invoice_number": row["invoice_number"],
+                "submitted_date": datetime(row["submitted_date"]),
+                "amount_due": "{:f}".format(row["amount_due"].quantize(quantum, context=context)),
+                "description": row["description"],
+                "pdf_file": pdf_url(row["pdf_file"]) if row["pdf_file"] else None,
+                "thumbnail": (
+                    thumbnail_url(row["pdf_blob__preview__thumbnail"])
+                    if row["pdf_blob__preview__thumbnail"] else None
+                ),
+                "page_count": row["pdf_blob__preview__page_count"],
+                "web_file": (
+                    web_file_url(row["pdf_blob__preview__web_file"])
+                    if row["pdf_blob__preview__web_file"] else None
+                ),
+                "vessel_name": row["vessel__vessel_name"],
+                "date_created": datetime(row["date_created"]),
+                "date_modified": datetime(row["date_modified"]),
+            }
+            for row in rows
+        ]
+
+# -----------------------------
+# Invoice change feed
+# -----------------------------
+class InvoiceSyncQuerySerializer(serializers.Serializer):
+    # Omitted to start: returns the current cursor and no changes.
+    cursor = serializers.IntegerField(min_value=0, required=False)
+
+
+# -----------------------------
+# Invoice export filters
+# -----------------------------
+class InvoiceExportFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    supplier = serializers.UUIDField(required=False)
+    vessel = serializers.UUIDField(required=False)
+    # "format" itself is taken by DRF's format suffix override.
+    output = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+
+    def validate(self, attrs):
+        if attrs.get("date_from") and attrs.get("date_to") and attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return attrs
+
+
+# -----------------------------
+# Invoice summaries
+# -----------------------------
+class InvoiceSummaryFilterSerializer(serializers.Serializer):
+    group = serializers.ChoiceField(choices=["supplier", "vessel"], default="vessel")
+    month_from = serializers.DateField(input_formats=["%Y-%m"], required=False)
+    month_to = serializers.DateField(input_formats=["%Y-%m"], required=False)
+    supplier = serializers.UUIDField(required=False)
+    vessel = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        # Each summary table is keyed by one owner only.
+        other = "vessel" if attrs["group"] == "supplier" else "supplier"
+        if other in attrs:
+            raise serializers.ValidationError({other: [f"Not available with group={attrs['group']}."]})
+        return attrs
+
+
+class SupplierMonthlySummarySerializer(serializers.ModelSerializer):
+    supplier_name = serializers.CharField(source="supplier.supplier_name", read_only=True)
+    month = serializers.DateField(format="%Y-%m")
+
+    class Meta:
+        model = SupplierMonthlySummary
+        fields = ["supplier", "supplier_name", "month", "invoice_count", "amount_total"]
+
+
+class VesselMonthlySummarySerializer(serializers.ModelSerializer):
+    vessel_name = serializers.CharField(source="vessel.vessel_name", read_only=True)
+    month = serializers.DateField(format="%Y-%m")
+
+    class Meta:
+        model = VesselMonthlySummary
+        fields = ["vessel", "vessel_name", "month", "invoice_count", "amount_total"]
@@ -0,0 +1,227 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .authentication import principal_cache, supplier_cache_key, user_cache_key
+from .models import (
+    SUMMARY_FIELDS, Supplier, Pin, Vessel, Invoice, InvoiceSearchToken, PdfBlob, PdfPreview,
+)
+from . import search
+from .typeahead import vessel_index, supplier_index
+from .bloom import invoice_number_filter
+from . import conditional, summaries, sync
+
+
+# ------------------------------------
+#  Authenticated principal eviction  -
+# ------------------------------------
+# queryset.update() skips these signals; AUTH_CACHE_TTL bounds how long
+# such a change can go unnoticed, as it does for other worker processes.
+
+@receiver(post_delete, sender=Supplier)
+def evict_deleted_supplier(sender, instance, **kwargs):
+    principal_cache.delete(supplier_cache_key(instance.supplier_id))
+
+
+@receiver(post_save, sender=Pin)
+@receiver(post_delete, sender=Pin)
+def evict_pin_supplier(sender, instance, **kwargs):
+    principal_cache.delete(supplier_cache_key(instance.supplier_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user(sender, instance, **kwargs):
+    principal_cache.delete(user_cache_key(instance.pk))
+
+
+# ------------------------------------
+#  Invoice search index maintenance  -
+# ------------------------------------
+# Deleting an invoice cascades to its tokens. Bulk writes that bypass
+# post_save must call api.search.index_invoice / rebuild_index themselves.
+
+@receiver(post_save, sender=Invoice)
+def index_saved_invoice(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_invoice(instance)
+
+
+@receiver(post_save, sender=Supplier)
+def reindex_supplier_name(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.reindex_source(
+            InvoiceSearchToken.SUPPLIER, instance.invoices.all(), instance.supplier_name
+        )
+
+
+@receiver(post_save, sender=Vessel)
+def reindex_vessel_name(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.reindex_source(
+            InvoiceSearchToken.VESSEL, instance.invoices.all(), instance.vessel_name
+        )
+
+
+# ------------------------------------
+#  Typeahead index generations       -
+# ------------------------------------
+
+@receiver(post_save, sender=Vessel)
+@receiver(post_delete, sender=Vessel)
+def bump_vessel_index(sender, **kwargs):
+    vessel_index.invalidate()
+
+
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def bump_supplier_index(sender, **kwargs):
+    supplier_index.invalidate()
+
+
+# ------------------------------------
+#  Invoice number Bloom filter       -
+# ------------------------------------
+# Other workers catch up from date_modified; see api.bloom.
+
+@receiver(post_save, sender=Invoice)
+def remember_invoice_number(sender, instance, **kwargs):
+    invoice_number_filter.add([instance.invoice_number])
+
+
+# ------------------------------------
+#  List endpoint change counters     -
+# ------------------------------------
+# Writes that bypass signals call api.conditional.bump themselves.
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def bump_invoice_version(sender, **kwargs):
+    conditional.bump(conditional.INVOICE)
+
+
+@receiver(post_save, sender=Vessel)
+@receiver(post_delete, sender=Vessel)
+def bump_vessel_version(sender, **kwargs):
+    conditional.bump(conditional.VESSEL)
+
+
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def bump_supplier_version(sender, **kwargs):
+    conditional.bump(conditional.SUPPLIER)
+
+
+@receiver(post_save, sender=PdfPreview)
+@receiver(post_delete, sender=PdfPreview)
+def bump_preview_version(sender, **kwargs):
+    conditional.bump(conditional.PDF_PREVIEW)
+
+
+# ------------------------------------
+#  PDF blob reference counting       -
+# ------------------------------------
+
+@receiver(post_save, sender=Invoice)
+def count_blob_references(sender, instance, raw=False, **kwargs):
+    old_blob_id = getattr(instance, "_loaded_pdf_blob_id", None)
+    new_blob_id = instance.pdf_blob_id
+    if raw or old_blob_id == new_blob_id:
+        return
+
+    PdfBlob.count_references(added=[new_blob_id], removed=[old_blob_id])
+    instance._loaded_pdf_blob_id = new_blob_id
+
+
+@receiver(post_delete, sender=Invoice)
+def release_blob_reference(sender, instance, **kwargs):
+    PdfBlob.count_references(removed=[instance.pdf_blob_id])
+
+
+# ------------------------------------
+#  Invoice summary tables            -
+# ------------------------------------
+# Invoice.save() and deletes run these in the row's own transaction.
+# bulk_create callers use api.summaries.record_changes directly.
+
+@receiver(pre_save, sender=Invoice)
+def load_summary_values(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    loaded = getattr(instance, "_loaded_summary_values", None)
+    if loaded is None or None in loaded:
+        # Built by hand or loaded with deferred fields: read the stored bucket.
+        instance._loaded_summary_values = (
+            Invoice.objects.filter(pk=instance.pk).values_list(*SUMMARY_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Invoice)
+def update_summaries_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, "_loaded_summary_values", None)
+    if update_fields is not None and old is not None:
+        # Fields left out of update_fields still hold their stored value.
+        new = tuple(
+            getattr(instance, field) if field.removesuffix("_id") in update_fields or field in update_fields else value
+            for field, value in zip(SUMMARY_FIELDS, old)
+        )
+    else:
+        new = instance.summary_values()
+
+    if new != old:
+        summaries.record_changes(added=[new], removed=[old] if old else [])
+    instance._loaded_summary_values = new
+
+
+@receiver(post_delete, sender=Invoice)
+def update_summaries_on_delete(sender, instance, **kwargs):
+    old = getattr(instance, "_loaded_summary_values", None)
+    if old is None or None in old:
+        old = instance.summary_values()
+    summaries.record_changes(removed=[old])
+
+
+# ------------------------------------
+#  Invoice change feed               -
+# ------------------------------------
+# Logged in the write's own transaction, after every other receiver (so
+# keep this section last): the entry's id and created_at are taken as
+# close to commit as the transaction allows, which is what
+# INVOICE_SYNC_SETTLE_SECONDS has to cover. Bulk writes call
+# api.sync.record_changes / record_invoices themselves, as their last write.
+
+@receiver(pre_save, sender=Invoice)
+def load_logged_supplier(sender, instance, raw=False, **kwargs):
+    # Runs after load_summary_values; post_save replaces the loaded values.
+    loaded = None if raw else getattr(instance, "_loaded_summary_values", None)
+    instance._logged_supplier_id = loaded[0] if loaded else None
+
+
+@receiver(post_save, sender=Invoice)
+def log_saved_invoice(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    sync.record_changes([(instance.pk, instance.supplier_id)], created=created)
+    previous = getattr(instance, "_logged_supplier_id", None)
+    if not created and previous and previous != instance.supplier_id:
+        # Moved to another supplier: the old one's feed reports a delete.
+        sync.record_changes([(instance.pk, previous)])
+
+
+@receiver(post_delete, sender=Invoice)
+def log_deleted_invoice(sender, instance, **kwargs):
+    sync.record_changes([(instance.pk, instance.supplier_id)], deleted=True)
+
+
+@receiver(post_save, sender=Vessel)
+def log_vessel_change(sender, instance, created, raw=False, **kwargs):
+    # vessel_name is part of every invoice row; readers expand the entry.
+    if not created and not raw:
+        sync.record_vessel_change(instance.pk)
+
+
+@receiver(post_save, sender=PdfPreview)
+def log_preview_invoices(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record_invoices(Invoice.objects.filter(pdf_blob_id=instance.blob_id))
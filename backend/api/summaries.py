@@ -0,0 +1,79 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import SUMMARY_FIELDS, Invoice, SupplierMonthlySummary, VesselMonthlySummary
+
+
+OWNER_FIELDS = {SupplierMonthlySummary: "supplier_id", VesselMonthlySummary: "vessel_id"}
+
+
+def month_of(submitted_date):
+    """First day of the local calendar month an invoice is bucketed under."""
+    return timezone.localtime(submitted_date).date().replace(day=1)
+
+
+def collect_deltas(added=(), removed=()):
+    """
+    Turn (supplier_id, vessel_id, submitted_date, amount_due) tuples that
+    were added to / removed from the Invoice table into per-bucket
+    [count, amount] deltas for both summary tables.
+    """
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for sign, rows in ((1, added), (-1, removed)):
+        for supplier_id, vessel_id, submitted_date, amount_due in rows:
+            month = month_of(submitted_date)
+            for key in ((SupplierMonthlySummary, supplier_id, month), (VesselMonthlySummary, vessel_id, month)):
+                deltas[key][0] += sign
+                deltas[key][1] += sign * Decimal(amount_due)
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Add deltas to the summary rows with F() updates, creating missing rows.
+
+    Negative deltas never create a row: a missing row means its supplier or
+    vessel is being deleted along with its invoices.
+    """
+    for (model, owner_id, month), (count, amount) in deltas.items():
+        if not count and not amount:
+            continue
+        owner = {OWNER_FIELDS[model]: owner_id}
+        rows = model.objects.filter(month=month, **owner)
+        if rows.update(invoice_count=F("invoice_count") + count, amount_total=F("amount_total") + amount):
+            continue
+        if count < 0:
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(month=month, invoice_count=count, amount_total=amount, **owner)
+        except IntegrityError:
+            # Created concurrently since the update above.
+            rows.update(invoice_count=F("invoice_count") + count, amount_total=F("amount_total") + amount)
+
+
+def record_changes(added=(), removed=()):
+    apply_deltas(collect_deltas(added=added, removed=removed))
+
+
+def rebuild_summaries():
+    """Recompute both summary tables from Invoice rows. Returns the invoice count."""
+    with transaction.atomic():
+        SupplierMonthlySummary.objects.all().delete()
+        VesselMonthlySummary.objects.all().delete()
+
+        rows = Invoice.objects.order_by().values_list(*SUMMARY_FIELDS)
+        deltas = collect_deltas(added=rows.iterator(chunk_size=5000))
+
+        for model, owner_field in OWNER_FIELDS.items():
+            model.objects.bulk_create(
+                [
+                    model(month=month, invoice_count=count, amount_total=amount, **{owner_field: owner_id})
+                    for (key_model, owner_id, month), (count, amount) in deltas.items()
+                    if key_model is model
+                ],
+                batch_size=1000,
+            )
+    return sum(count for (model, _, _), (count, _) in deltas.items() if model is SupplierMonthlySummary)
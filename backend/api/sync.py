@@ -0,0 +1,138 @@
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from .models import Invoice, InvoiceChange
+from .serializers import FastInvoiceListSerializer
+
+
+def record_changes(rows, deleted=False, created=False):
+    """
+    Append (invoice_id, supplier_id) pairs to the change log in the
+    caller's transaction, so a rolled back write leaves no entry.
+    """
+    now = timezone.now()
+    rows = iter(rows)
+    while batch := list(islice(rows, 1000)):
+        InvoiceChange.objects.bulk_create(
+            InvoiceChange(
+                invoice_id=invoice_id,
+                supplier_id=supplier_id,
+                deleted=deleted,
+                created=created,
+                created_at=now,
+            )
+            for invoice_id, supplier_id in batch
+        )
+
+
+def record_invoices(invoices):
+    """Log an update for every invoice in a queryset."""
+    record_changes(invoices.order_by().values_list("invoice_id", "supplier_id").iterator(chunk_size=2000))
+
+
+def record_vessel_change(vessel_id):
+    """Log one entry that updates every invoice of a vessel, e.g. after a rename."""
+    InvoiceChange.objects.create(vessel_id=vessel_id, created_at=timezone.now())
+
+
+def expand_vessel_changes(entries, invoices, *extra):
+    """
+    Load the FastInvoiceListSerializer.values() rows that log entries
+    refer to, with vessel entries standing for every invoice of their
+    vessel. entries are (invoice_id, vessel_id) pairs; returns the rows by
+    invoice id and the invoice ids of each vessel entry.
+    """
+    invoice_ids = {invoice_id for invoice_id, _ in entries if invoice_id}
+    vessel_ids = {vessel_id for _, vessel_id in entries if vessel_id}
+    lookup = Q(invoice_id__in=invoice_ids)
+    if vessel_ids:
+        lookup |= Q(vessel_id__in=vessel_ids)
+    rows = {
+        row["invoice_id"]: row
+        for row in FastInvoiceListSerializer.values(invoices.filter(lookup), "vessel_id", *extra)
+    }
+    by_vessel = defaultdict(list)
+    for invoice_id, row in rows.items():
+        if row["vessel_id"] in vessel_ids:
+            by_vessel[row["vessel_id"]].append(invoice_id)
+    return rows, by_vessel
+
+
+def latest_cursor():
+    return InvoiceChange.objects.aggregate(latest=Max("id"))["latest"] or 0
+
+
+def is_known_cursor(cursor):
+    """
+    A cursor is the id of a logged change (or 0 for an empty log). Log
+    rows are only ever removed by pruning, so a missing one means the
+    client fell further behind than INVOICE_SYNC_RETENTION_DAYS.
+    """
+    return cursor == 0 or InvoiceChange.objects.filter(id=cursor).exists()
+
+
+def read_changes(after, supplier_id=None, limit=None):
+    """
+    Changes logged after the `after` cursor, collapsed to the latest
+    state of each invoice.
+
+    Returns a dict with `upserts` (rows shaped like the invoice list),
+    `deletes` (invoice ids), the next `cursor` and `has_more`. With
+    supplier_id, invoices that left that supplier are reported as deletes.
+    """
+    limit = limit or settings.INVOICE_SYNC_PAGE_SIZE
+    changes = InvoiceChange.objects.filter(id__gt=after).order_by("id")
+    fields = ("id", "invoice_id", "vessel_id", "created_at")
+    if supplier_id is None:
+        entries = list(changes.values_list(*fields)[:limit + 1])
+    else:
+        # Vessel entries belong to no supplier; one query per index.
+        entries = sorted([
+            *changes.filter(supplier_id=supplier_id).values_list(*fields)[:limit + 1],
+            *changes.filter(vessel_id__isnull=False).values_list(*fields)[:limit + 1],
+        ])[:limit + 1]
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Ids are allocated at insert but become visible at commit, so a slow
+    # transaction can still add ids below the newest ones seen here. Stop
+    # the cursor before the settle window; those entries are resent.
+    settled = timezone.now() - timedelta(seconds=settings.INVOICE_SYNC_SETTLE_SECONDS)
+    cursor = after
+    for change_id, _, _, created_at in entries:
+        if created_at > settled:
+            break
+        cursor = change_id
+
+    invoices = Invoice.objects.all()
+    if supplier_id is not None:
+        invoices = invoices.filter(supplier_id=supplier_id)
+    rows, by_vessel = expand_vessel_changes([entry[1:3] for entry in entries], invoices)
+    invoice_ids = {}
+    for _, invoice_id, vessel_id, _ in entries:
+        invoice_ids.update(dict.fromkeys(by_vessel[vessel_id] if vessel_id else [invoice_id]))
+
+    return {
+        "cursor": str(cursor),
+        "has_more": has_more and cursor != after,
+        "upserts": FastInvoiceListSerializer().to_representation(
+            rows[invoice_id] for invoice_id in invoice_ids if invoice_id in rows
+        ),
+        "deletes": [str(invoice_id) for invoice_id in invoice_ids if invoice_id not in rows],
+    }
+
+
+def prune_changes(days=None):
+    """Delete log rows older than `days`, keeping the newest row. Returns the count."""
+    days = settings.INVOICE_SYNC_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    # The newest row is the cursor handed to clients starting from scratch.
+    deleted, _ = (
+        InvoiceChange.objects.filter(created_at__lt=cutoff)
+        .exclude(id=latest_cursor())
+        .delete()
+    )
+    return deleted
@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+import jwt
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from api.authentication import principal_cache, token_cache
+from api.models import Invoice
+
+
+def make_token(claims, lifetime=timedelta(minutes=30)):
+    """Signed token for claims (user_id or supplier_id), expiring after lifetime."""
+    return jwt.encode(
+        {"exp": datetime.now(timezone.utc) + lifetime, **claims},
+        settings.SECRET_KEY,
+        algorithm="HS256",
+    )
+
+
+def bearer(claims):
+    return f"Bearer {make_token(claims)}"
+
+
+class ApiTestCase(TestCase):
+    """
+    TestCase with an APIClient and empty authentication caches. With
+    temp_media_root, each test stores files under its own MEDIA_ROOT
+    (self.media_root), removed afterwards.
+    """
+    temp_media_root = False
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        principal_cache.clear()
+        self.client = APIClient()
+        if self.temp_media_root:
+            self.media_root = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, self.media_root)
+            self.override_settings(MEDIA_ROOT=self.media_root)
+
+    def override_settings(self, **options):
+        """override_settings() for the rest of the test."""
+        override = override_settings(**options)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def authenticate(self, client=None, **claims):
+        """Send a bearer token for claims, e.g. user_id=... or supplier_id=..."""
+        (client or self.client).credentials(HTTP_AUTHORIZATION=bearer(claims))
+
+    def build_invoice(self, supplier, pdf=None, **overrides):
+        """
+        Unsaved invoice for supplier on self.vessel, submitted now for
+        10.00; pass invoice_number and any field to override. pdf is the
+        content of an uploaded <invoice_number>.pdf.
+        """
+        if pdf is not None:
+            overrides["pdf_file"] = SimpleUploadedFile(f"{overrides['invoice_number']}.pdf", pdf)
+        fields = {
+            "vessel": getattr(self, "vessel", None),
+            "submitted_date": datetime.now(timezone.utc),
+            "amount_due": "10.00",
+            **overrides,
+        }
+        return Invoice(supplier=supplier, **fields)
+
+    def create_invoice(self, supplier, **overrides):
+        """build_invoice(), saved."""
+        invoice = self.build_invoice(supplier, **overrides)
+        invoice.save(force_insert=True)
+        return invoice
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from api.models import Supplier, Vessel, Invoice, Pin
+
+
+class AdminQueryCountTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="secret-pass")
+        self.client.force_login(user)
+        self.add_rows(5)
+
+    def add_rows(self, count):
+        start = Supplier.objects.count()
+        for n in range(start, start + count):
+            supplier = Supplier.objects.create(supplier_name=f"Supplier {n}")
+            vessel = Vessel.objects.create(vessel_name=f"MV {n}")
+            Pin.objects.create(supplier=supplier, pin_code=f"{n:04d}9")
+            for m in range(3):
+                Invoice.objects.create(
+                    supplier=supplier,
+                    vessel=vessel,
+                    invoice_number=f"INV-{n}-{m}",
+                    submitted_date=datetime(2025, 1, 1 + m, tzinfo=timezone.utc),
+                    amount_due="10.00",
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_are_bounded(self):
+        """Changelist query counts do not grow with the rows on the page."""
+        urls = [
+            "/admin/api/invoice/",
+            "/admin/api/supplier/",
+            "/admin/api/vessel/",
+            "/admin/api/pin/",
+            "/admin/api/invoice/?q=inv",
+        ]
+        small = {url: self.count_queries(url) for url in urls}
+        self.add_rows(20)
+        large = {url: self.count_queries(url) for url in urls}
+
+        self.assertEqual(small, large)
+        for url, count in large.items():
+            self.assertLessEqual(count, 5, url)
+
+    def test_supplier_page_does_not_render_every_invoice(self):
+        """The supplier change page shows recent invoices, not an inline per row."""
+        supplier = Supplier.objects.get(supplier_name="Supplier 0")
+        response = self.client.get(f"/admin/api/supplier/{supplier.pk}/change/")
+        self.assertContains(response, "INV-0-2")
+        self.assertContains(response, f"?supplier__exact={supplier.pk}")
+        self.assertLessEqual(self.count_queries(f"/admin/api/supplier/{supplier.pk}/change/"), 8)
+
+    def test_supplier_filter_link_works(self):
+        """The invoice changelist accepts the supplier filter used by that link."""
+        supplier = Supplier.objects.get(supplier_name="Supplier 1")
+        response = self.client.get(f"/admin/api/invoice/?supplier__exact={supplier.pk}")
+        self.assertEqual(response.context["cl"].result_count, 3)
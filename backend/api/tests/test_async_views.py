@@ -0,0 +1,81 @@
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from api.authentication import principal_cache
+from api.bloom import invoice_number_filter
+from api.models import Supplier, Vessel
+from api.typeahead import vessel_index
+from api.tests import ApiTestCase, bearer
+
+
+class AsyncReadViewsTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        invoice_number_filter.clear()
+        vessel_index.invalidate()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.staff_auth = bearer({"user_id": user.pk})
+
+        self.supplier = Supplier.objects.create(supplier_name="Async Supplier")
+        self.supplier_auth = bearer({"supplier_id": str(self.supplier.pk)})
+        self.vessel = Vessel.objects.create(vessel_name="MV Async")
+        for number in ("INV-1", "INV-2", "INV-3"):
+            self.create_invoice(self.supplier, invoice_number=number)
+
+    async def get(self, path, auth, **headers):
+        return await self.async_client.get(path, headers={"Authorization": auth, **headers})
+
+    async def test_lists_paginate_and_revalidate(self):
+        """Both invoice lists page through the async ORM and answer 304s."""
+        first = await self.get("/user/invoices/?page_size=2", self.staff_auth)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([row["invoice_number"] for row in first.json()["results"]], ["INV-3", "INV-2"])
+
+        second = await self.get(f"/user/invoices/?page_size=2&cursor={first.json()['next_cursor']}", self.staff_auth)
+        self.assertEqual([row["invoice_number"] for row in second.json()["results"]], ["INV-1"])
+        self.assertIsNone(second.json()["next"])
+
+        cached = await self.get("/user/invoices/?page_size=2", self.staff_auth, If_None_Match=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+        own = await self.get("/invoices/", self.supplier_auth)
+        self.assertEqual(len(own.json()["results"]), 3)
+
+    async def test_typeahead_and_check_invoice(self):
+        """Vessel search and both invoice checks answer like the sync views did."""
+        response = await self.get("/vessels/?search=async", self.staff_auth)
+        self.assertEqual(response.json(), [{"vessel_id": str(self.vessel.pk), "vessel_name": "MV Async"}])
+
+        response = await self.get("/invoices/check-invoice/?invoice_number=INV-2", self.staff_auth)
+        self.assertTrue(response.json()["exists"])
+
+        response = await self.async_client.post(
+            "/invoices/check-invoice/",
+            json.dumps({"invoice_numbers": ["INV-3", "INV-9"]}),
+            content_type="application/json",
+            headers={"Authorization": self.staff_auth},
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"invoice_number": "INV-3", "exists": True}, {"invoice_number": "INV-9", "exists": False}],
+        )
+
+    async def test_errors_match_drf(self):
+        """Bad tokens, missing principals and bad bodies get DRF's answers."""
+        response = await self.get("/user/invoices/", "Bearer not-a-token")
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("detail", response.json())
+
+        response = await self.async_client.get("/invoices/")
+        self.assertEqual(response.status_code, 403)
+
+        response = await self.async_client.post(
+            "/invoices/check-invoice/", "{", content_type="application/json",
+            headers={"Authorization": self.staff_auth},
+        )
+        self.assertEqual(response.status_code, 400)
+
+        await sync_to_async(self.supplier.delete)()
+        principal_cache.clear()
+        response = await self.get("/invoices/", self.supplier_auth)
+        self.assertEqual(response.json(), {"detail": "No such supplier"})
@@ -0,0 +1,95 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from api.authentication import token_cache, principal_cache, authenticate_principal, aauthenticate_principal
+from api.models import Supplier, Pin
+from api.tests import ApiTestCase, make_token
+
+
+class AuthenticationCacheTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = Supplier.objects.create(supplier_name="Cached Supplier")
+        self.pin = Pin.objects.create(supplier=self.supplier, pin_code="2468")
+        self.user = User.objects.create_user(username="clerk", password="secret-pass")
+
+    def test_supplier_steady_state_adds_no_queries(self):
+        """After the first request, supplier authentication is served from cache."""
+        self.authenticate(supplier_id=str(self.supplier.supplier_id))
+        self.client.get("/invoices/")
+
+        # Only the view's own queries remain: ETag versions and invoices.
+        with self.assertNumQueries(2):
+            response = self.client.get("/invoices/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(principal_cache.stats()["hits"], 1)
+        self.assertGreaterEqual(token_cache.stats()["hits"], 1)
+
+    def test_locking_pin_evicts_supplier(self):
+        """Locking a PIN takes effect on the next request."""
+        self.authenticate(supplier_id=str(self.supplier.supplier_id))
+        self.assertEqual(self.client.get("/invoices/").status_code, 200)
+
+        self.pin.is_locked = True
+        self.pin.save()
+
+        self.assertEqual(self.client.get("/invoices/").status_code, 403)
+
+    def test_deleting_supplier_evicts_supplier(self):
+        """A deleted supplier's token stops working immediately."""
+        self.authenticate(supplier_id=str(self.supplier.supplier_id))
+        self.assertEqual(self.client.get("/invoices/").status_code, 200)
+
+        self.supplier.delete()
+
+        self.assertEqual(self.client.get("/invoices/").status_code, 403)
+
+    def test_user_promoted_to_staff_is_rejected(self):
+        """Making a user staff evicts the cached principal."""
+        self.authenticate(user_id=self.user.pk)
+        self.assertEqual(self.client.get("/user/invoices/").status_code, 200)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        self.assertEqual(self.client.get("/user/invoices/").status_code, 403)
+
+    def test_expired_cached_token(self):
+        """A cached payload is still rejected once its exp has passed."""
+        token = make_token({"user_id": self.user.pk})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.client.get("/user/invoices/")
+
+        payload, expires_at = token_cache._data[token]
+        token_cache._data[token] = ({**payload, "exp": 0}, expires_at)
+
+        self.assertEqual(self.client.get("/user/invoices/").status_code, 403)
+
+    def test_token_for_newer_pin_reloads_supplier(self):
+        """A cached supplier older than the token's PIN version is reloaded, not rejected."""
+        self.authenticate(supplier_id=str(self.supplier.supplier_id), pin_version=self.pin.token_version)
+        self.assertEqual(self.client.get("/invoices/").status_code, 200)
+
+        # Another worker changed the PIN; this one's cache was not evicted.
+        Pin.objects.filter(pk=self.pin.pk).update(token_version=self.pin.token_version + 1)
+        self.authenticate(supplier_id=str(self.supplier.supplier_id), pin_version=self.pin.token_version + 1)
+        self.assertEqual(self.client.get("/invoices/").status_code, 200)
+
+        self.authenticate(supplier_id=str(self.supplier.supplier_id), pin_version=self.pin.token_version)
+        self.assertEqual(self.client.get("/invoices/").status_code, 403)
+
+    async def test_sync_and_async_resolve_alike(self):
+        """Both entry points pick the principal by claim and share the cache."""
+        factory = RequestFactory()
+
+        def request(**claims):
+            return factory.get("/", HTTP_AUTHORIZATION=f"Bearer {make_token(claims)}")
+
+        supplier_request = request(supplier_id=str(self.supplier.supplier_id))
+        supplier, _ = await sync_to_async(authenticate_principal)(supplier_request)
+        self.assertEqual(supplier, self.supplier)
+        self.assertIs((await aauthenticate_principal(supplier_request))[0], supplier)
+
+        user, _ = await aauthenticate_principal(request(user_id=self.user.pk))
+        self.assertEqual(user, self.user)
+        self.assertEqual(await aauthenticate_principal(request(sub="nobody")), (None, None))
@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from api.models import Supplier, Vessel
+from api.tests import ApiTestCase, bearer
+
+
+class ConditionalGetTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.staff_auth = bearer({"user_id": user.pk})
+
+        self.supplier = Supplier.objects.create(supplier_name="Etag Supplier")
+        self.other_supplier = Supplier.objects.create(supplier_name="Other Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Etag")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_invoice(self.supplier, invoice_number="INV-1")
+
+    def get(self, url, auth=None, etag=None):
+        headers = {"HTTP_AUTHORIZATION": auth or self.staff_auth}
+        if etag:
+            headers["HTTP_IF_NONE_MATCH"] = etag
+        return self.client.get(url, **headers)
+
+    def test_unchanged_list_is_not_modified(self):
+        """A matching If-None-Match gets a 304 from a single query."""
+        first = self.get("/user/invoices/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("private", first["Cache-Control"])
+
+        with self.assertNumQueries(1):
+            second = self.get("/user/invoices/", etag=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """Invoice and vessel writes change the invoice list ETag."""
+        etag = self.get("/user/invoices/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_invoice(self.supplier, invoice_number="INV-2")
+        response = self.get("/user/invoices/", etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vessel.vessel_name = "MV Renamed"
+            self.vessel.save()
+        self.assertEqual(self.get("/user/invoices/", etag=etag).status_code, 200)
+
+    def test_etag_depends_on_query_and_supplier(self):
+        """Pages, searches and suppliers never share an ETag."""
+        self.assertNotEqual(
+            self.get("/user/invoices/")["ETag"],
+            self.get("/user/invoices/?search=inv")["ETag"],
+        )
+
+        supplier_auth = bearer({"supplier_id": str(self.supplier.supplier_id)})
+        other_auth = bearer({"supplier_id": str(self.other_supplier.supplier_id)})
+        etag = self.get("/invoices/", auth=supplier_auth)["ETag"]
+        self.assertEqual(self.get("/invoices/", auth=other_auth, etag=etag).status_code, 200)
+
+    def test_vessel_list(self):
+        """The vessel typeahead revalidates against its in-process index."""
+        etag = self.get("/vessels/")["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get("/vessels/", etag=etag).status_code, 304)
+
+        Vessel.objects.create(vessel_name="MV Second")
+        self.assertEqual(self.get("/vessels/", etag=etag).status_code, 200)
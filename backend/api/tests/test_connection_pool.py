@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import time
+from django.test import SimpleTestCase
+from api.connection_pool import ConnectionPool, PoolTimeout
+
+
+def connect():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def test_connections_are_reused(self):
+        """Checkouts after the first reuse the same connection."""
+        pool = ConnectionPool(connect, max_size=2)
+        first = pool.getconn()
+        pool.putconn(first)
+        for _ in range(5):
+            conn = pool.getconn()
+            self.assertIs(conn, first)
+            pool.putconn(conn)
+
+        stats = pool.stats()
+        self.assertEqual((stats["checkouts"], stats["opened"], stats["size"]), (6, 1, 1))
+        self.assertAlmostEqual(stats["churn"], 1 / 6, places=3)
+
+    def test_min_size_opened_up_front(self):
+        """open() fills the pool to min_size."""
+        pool = ConnectionPool(connect, min_size=2, max_size=4)
+        pool.open()
+        self.assertEqual((pool.stats()["idle"], pool.stats()["opened"]), (2, 2))
+
+    def test_waits_for_a_free_connection(self):
+        """At max_size, checkouts wait for a checkin and are counted."""
+        pool = ConnectionPool(connect, max_size=1, timeout=5)
+        held = pool.getconn()
+        threading.Timer(0.05, pool.putconn, [held]).start()
+
+        self.assertIs(pool.getconn(), held)
+        stats = pool.stats()
+        self.assertEqual((stats["waits"], stats["opened"]), (1, 1))
+        self.assertGreater(stats["wait_ms_max"], 0)
+
+    def test_timeout_when_exhausted(self):
+        """A checkout that cannot be served in time raises PoolTimeout."""
+        pool = ConnectionPool(connect, max_size=1, timeout=0.01)
+        pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_failed_health_check_replaces_connection(self):
+        """A connection failing the checkout check is closed and replaced."""
+        broken = set()
+        pool = ConnectionPool(connect, max_size=1, check=lambda conn: conn not in broken)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        broken.add(conn)
+
+        replacement = pool.getconn()
+        self.assertIsNot(replacement, conn)
+        stats = pool.stats()
+        self.assertEqual((stats["failed_checks"], stats["opened"], stats["closed"], stats["size"]), (1, 2, 1, 1))
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    def test_idle_connections_reaped_down_to_min_size(self):
+        """Connections idle past max_idle are closed, keeping min_size."""
+        pool = ConnectionPool(connect, min_size=1, max_size=3, max_idle=0.01)
+        conns = [pool.getconn() for _ in range(3)]
+        for conn in conns:
+            pool.putconn(conn)
+        time.sleep(0.02)
+
+        pool.putconn(pool.getconn())
+        stats = pool.stats()
+        self.assertEqual((stats["size"], stats["reaped"]), (1, 2))
+
+    def test_reset_failure_discards(self):
+        """A connection that cannot be reset on checkin is not reused."""
+        def reset(conn):
+            if conn.in_transaction:
+                raise sqlite3.OperationalError("still in a transaction")
+
+        pool = ConnectionPool(connect, max_size=1, reset=reset)
+        conn = pool.getconn()
+        conn.execute("CREATE TABLE t (x)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        pool.putconn(conn)
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertEqual(pool.stats()["opened"], 2)
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.renderers import JSONRenderer
+from api.models import Supplier, Vessel, Invoice, PdfPreview
+from api.renderers import FastJSONRenderer
+from api.serializers import InvoiceListSerializer, FastInvoiceListSerializer
+from api.tests import ApiTestCase
+
+
+class FastInvoiceListSerializerTest(ApiTestCase):
+    temp_media_root = True
+
+    def setUp(self):
+        super().setUp()
+
+        self.supplier = Supplier.objects.create(supplier_name="Fast Supplier")
+        vessel = Vessel.objects.create(vessel_name="MV Ñandú   Line")
+        Invoice.objects.create(
+            supplier=self.supplier,
+            vessel=vessel,
+            invoice_number="INV-PLAIN",
+            submitted_date=datetime(2025, 3, 1, 8, 30, tzinfo=timezone.utc),
+            amount_due="1234.5",
+            description=None,
+        )
+        Invoice.objects.create(
+            supplier=self.supplier,
+            vessel=vessel,
+            invoice_number="INV-ÜNICODE \"quoted\"",
+            submitted_date=datetime(2025, 3, 2, 0, 0, 0, 123456, tzinfo=timezone.utc),
+            amount_due="0.10",
+            description="Line one\nline two   tab\t😀 \x01",
+            pdf_file=SimpleUploadedFile("bunker delivery #1.pdf", b"%PDF-1.4 fast"),
+        )
+        Invoice.objects.create(
+            supplier=self.supplier,
+            vessel=vessel,
+            invoice_number="INV-PREVIEW",
+            submitted_date=datetime(2025, 3, 3, tzinfo=timezone.utc),
+            amount_due="99999999.99",
+            pdf_file=SimpleUploadedFile("preview.pdf", b"%PDF-1.4 preview"),
+        )
+        preview_blob = Invoice.objects.get(invoice_number="INV-PREVIEW").pdf_blob
+        PdfPreview.objects.filter(blob=preview_blob).update(
+            status=PdfPreview.DONE, page_count=3, thumbnail="pdf_previews/thumb é.png",
+            web_file="pdf_previews/web é.pdf",
+        )
+
+    def test_matches_drf_serializer_bytes(self):
+        """The values() path renders the same bytes as InvoiceListSerializer."""
+        invoices = Invoice.objects.order_by("invoice_number")
+        expected = JSONRenderer().render(
+            InvoiceListSerializer(invoices.select_related("vessel", "pdf_blob__preview"), many=True).data
+        )
+        fast = FastJSONRenderer().render(
+            FastInvoiceListSerializer().to_representation(FastInvoiceListSerializer.values(invoices))
+        )
+        self.assertEqual(fast, expected)
+        self.assertIn(b"\\u2028", fast)
+        self.assertIn(b"page_count\":3", fast)
+
+    def test_endpoints_match_drf_serializer(self):
+        """Both list endpoints return the DRF serializer's output."""
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=user.pk)
+
+        invoices = Invoice.objects.select_related("vessel", "pdf_blob__preview").order_by("-date_created", "-invoice_id")
+        expected = JSONRenderer().render(InvoiceListSerializer(invoices, many=True).data)
+
+        response = self.client.get("/user/invoices/")
+        self.assertEqual(response.status_code, 200)
+        body = response.content
+        self.assertIn(expected[1:-1], body)
+
+        response = self.client.get("/user/invoices/", {"search": "preview"})
+        self.assertEqual([row["invoice_number"] for row in response.json()["results"]], ["INV-PREVIEW"])
+
+    def test_renderer_falls_back_for_other_types(self):
+        """Data orjson would format differently goes through JSONRenderer."""
+        data = {"amount": 1.1, "big": 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
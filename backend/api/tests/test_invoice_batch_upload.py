@@ -0,0 +1,112 @@
+import json
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.authentication import principal_cache
+from api.bloom import invoice_number_filter
+from api.models import Supplier, Vessel, Invoice, InvoiceSearchToken, PdfBlob
+from api import batch
+from api.tests import ApiTestCase
+
+
+class InvoiceBatchUploadTest(ApiTestCase):
+    temp_media_root = True
+
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=user.pk)
+
+        self.supplier = Supplier.objects.create(supplier_name="Batch Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Batch")
+
+    def item(self, number, **overrides):
+        return {
+            "supplier": str(self.supplier.supplier_id),
+            "vessel": str(self.vessel.vessel_id),
+            "invoice_number": number,
+            "submitted_date": "2025-01-01T00:00:00Z",
+            "amount_due": "10.00",
+            **overrides,
+        }
+
+    def post(self, items, files=None):
+        return self.client.post(
+            "/user/invoices/batch/",
+            {"invoices": json.dumps(items), **(files or {})},
+            format="multipart",
+        )
+
+    def test_batch_is_created_with_blobs_and_tokens(self):
+        """Every item is created, files are deduplicated and indexed."""
+        response = self.post(
+            [
+                self.item("B-1", pdf_file="file_0"),
+                self.item("B-2", pdf_file="file_1"),
+                self.item("B-3"),
+            ],
+            {
+                "file_0": SimpleUploadedFile("a.pdf", b"%PDF-1.4 same", "application/pdf"),
+                "file_1": SimpleUploadedFile("b.pdf", b"%PDF-1.4 same", "application/pdf"),
+            },
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row["status"] for row in response.data["results"]], ["created"] * 3)
+        self.assertEqual(Invoice.objects.count(), 3)
+        self.assertEqual(PdfBlob.objects.get().ref_count, 2)
+        self.assertTrue(InvoiceSearchToken.objects.filter(token="b", source="invoice_number").exists())
+        self.assertTrue(InvoiceSearchToken.objects.filter(token="batch", source="vessel").exists())
+
+    def test_invalid_item_rejects_whole_batch(self):
+        """One bad item returns per-item errors and creates nothing."""
+        self.create_invoice(self.supplier, invoice_number="TAKEN", amount_due="1.00")
+        response = self.post([
+            self.item("OK-1"),
+            self.item("TAKEN"),
+            self.item("DUP"),
+            self.item("DUP"),
+            self.item("OK-2", vessel="00000000-0000-0000-0000-000000000000"),
+            self.item("OK-3", amount_due="lots"),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        results = response.data["results"]
+        self.assertEqual(
+            [row["status"] for row in results],
+            ["valid", "invalid", "invalid", "invalid", "invalid", "invalid"],
+        )
+        self.assertIn("invoice_number", results[1]["errors"])
+        self.assertIn("vessel", results[4]["errors"])
+        self.assertIn("amount_due", results[5]["errors"])
+        self.assertEqual(Invoice.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Lookups and inserts are batched, not issued per item."""
+        def count_queries(numbers):
+            principal_cache.clear()
+            invoice_number_filter.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post([self.item(number) for number in numbers])
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        count_queries(["WARM-1"])  # creates this month's summary rows
+        self.assertEqual(count_queries(["Q-1", "Q-2"]), count_queries([f"Q-{n}" for n in range(3, 13)]))
+
+    def test_failed_batch_removes_new_blobs(self):
+        """Blobs first stored by a batch that fails to insert are deleted again."""
+        item = self.item("F-1")
+        item["supplier"], item["vessel"] = self.supplier, self.vessel
+        item["pdf_file"] = SimpleUploadedFile("f.pdf", b"%PDF-1.4 failed", "application/pdf")
+
+        with mock.patch.object(batch.summaries, "record_changes", side_effect=RuntimeError):
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(RuntimeError):
+                batch.create_invoice_batch([item])
+
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(PdfBlob.objects.exists())
+        self.assertEqual(list(Path(self.media_root).rglob("*.pdf")), [])
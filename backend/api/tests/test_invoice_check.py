@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from api.bloom import BloomFilter, invoice_number_filter
+from api.models import Supplier, Vessel, Invoice
+from api.tests import ApiTestCase
+
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives(self):
+        """Every added key is reported present and few others are."""
+        bloom = BloomFilter(1000, 0.01)
+        for n in range(1000):
+            bloom.add(f"INV-{n}")
+
+        self.assertTrue(all(f"INV-{n}" in bloom for n in range(1000)))
+        false_positives = sum(f"OTHER-{n}" in bloom for n in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class CheckInvoiceTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        invoice_number_filter.clear()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=user.pk)
+
+        self.supplier = Supplier.objects.create(supplier_name="Check Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Check")
+        self.create_invoice(self.supplier, invoice_number="INV-1")
+
+    def check(self, numbers):
+        response = self.client.post("/invoices/check-invoice/", {"invoice_numbers": numbers}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return {row["invoice_number"]: row["exists"] for row in response.json()["results"]}
+
+    def test_single_number(self):
+        """The GET form still answers one number."""
+        response = self.client.get("/invoices/check-invoice/", {"invoice_number": "INV-1"})
+        self.assertTrue(response.json()["exists"])
+
+    def test_bulk_check(self):
+        """Each number in the list gets its own answer."""
+        self.create_invoice(self.supplier, invoice_number="INV-2")
+        self.assertEqual(
+            self.check(["INV-1", "INV-2", "INV-3"]),
+            {"INV-1": True, "INV-2": True, "INV-3": False},
+        )
+
+    def test_free_numbers_skip_database(self):
+        """Numbers the filter rules out are answered without a query."""
+        self.check(["INV-1"])
+        with self.assertNumQueries(0):
+            result = self.check([f"FREE-{n}" for n in range(50)])
+        self.assertFalse(any(result.values()))
+
+    @override_settings(INVOICE_BLOOM_SYNC_SECONDS=0)
+    def test_catches_up_with_other_workers(self):
+        """Rows written without this process's signals are found on the next sync."""
+        self.check(["INV-1"])
+        Invoice.objects.bulk_create([Invoice(
+            supplier=self.supplier,
+            vessel=self.vessel,
+            invoice_number="ELSEWHERE-1",
+            submitted_date=datetime.now(timezone.utc),
+            amount_due="10.00",
+        )])
+        self.assertEqual(self.check(["ELSEWHERE-1"]), {"ELSEWHERE-1": True})
+
+    def test_rejects_too_many_numbers(self):
+        """Lists beyond INVOICE_CHECK_MAX_NUMBERS are refused."""
+        numbers = [f"N-{n}" for n in range(settings.INVOICE_CHECK_MAX_NUMBERS + 1)]
+        response = self.client.post("/invoices/check-invoice/", {"invoice_numbers": numbers}, format="json")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,99 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import override_settings
+from api.events import RESYNC, Subscriber, invoice_event_hub
+from api.models import Supplier, Vessel, Invoice
+from api.serializers import FastInvoiceListSerializer
+from api.tests import ApiTestCase, make_token
+
+
+@override_settings(
+    INVOICE_SYNC_SETTLE_SECONDS=0,
+    INVOICE_EVENTS_POLL_SECONDS=0.01,
+    INVOICE_EVENTS_KEEPALIVE_SECONDS=1,
+)
+class InvoiceEventsTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.acme = Supplier.objects.create(supplier_name="Acme Marine")
+        self.harbor = Supplier.objects.create(supplier_name="Harbor Provisions")
+        self.vessel = Vessel.objects.create(vessel_name="MV Events")
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.staff_token = make_token({"user_id": user.pk})
+        self.addCleanup(self.reset_hub)
+
+    def reset_hub(self):
+        invoice_event_hub.staff.clear()
+        invoice_event_hub.suppliers.clear()
+
+    async def open_stream(self, bearer):
+        response = await self.async_client.get("/invoices/events/", headers={"Authorization": f"Bearer {bearer}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+        # Let the hub take its starting cursor before anything changes.
+        await asyncio.sleep(0.05)
+        return stream
+
+    async def next_event(self, stream):
+        while True:
+            chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+            if not chunk.startswith(":"):
+                fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+                return fields["event"], json.loads(fields["data"])
+
+    async def test_staff_and_supplier_streams(self):
+        """Staff see every invoice; a supplier sees only its own."""
+        staff = await self.open_stream(self.staff_token)
+        supplier = await self.open_stream(make_token({"supplier_id": str(self.harbor.pk)}))
+
+        acme = await sync_to_async(self.create_invoice)(self.acme, invoice_number="INV-ACME")
+        invoice = await sync_to_async(self.create_invoice)(self.harbor, invoice_number="INV-HARBOR")
+        self.assertEqual(await self.next_event(staff), ("invoice-created", await self.list_row(acme)))
+        self.assertEqual((await self.next_event(staff))[1]["invoice_number"], "INV-HARBOR")
+
+        name, data = await self.next_event(supplier)
+        self.assertEqual((name, data["invoice_number"]), ("invoice-created", "INV-HARBOR"))
+
+        invoice.description = "corrected"
+        await sync_to_async(invoice.save)()
+        name, data = await self.next_event(supplier)
+        self.assertEqual((name, data["description"]), ("invoice-updated", "corrected"))
+
+    async def test_vessel_rename_updates_its_invoices(self):
+        """One logged vessel rename reaches each invoice's supplier as an update."""
+        await sync_to_async(self.create_invoice)(self.acme, invoice_number="INV-ACME")
+        await sync_to_async(self.create_invoice)(self.harbor, invoice_number="INV-HARBOR")
+        supplier = await self.open_stream(make_token({"supplier_id": str(self.harbor.pk)}))
+
+        self.vessel.vessel_name = "MV Renamed"
+        await sync_to_async(self.vessel.save)()
+        name, data = await self.next_event(supplier)
+        self.assertEqual(
+            (name, data["invoice_number"], data["vessel_name"]), ("invoice-updated", "INV-HARBOR", "MV Renamed")
+        )
+
+    async def list_row(self, invoice):
+        rows = await sync_to_async(
+            lambda: list(FastInvoiceListSerializer.values(Invoice.objects.filter(pk=invoice.pk)))
+        )()
+        return FastInvoiceListSerializer().to_representation(rows)[0]
+
+    async def test_requires_token(self):
+        """Streams are only opened for a valid bearer token."""
+        response = await self.async_client.get("/invoices/events/")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_slow_subscriber_gets_resync(self):
+        """A full queue is replaced by one resync marker instead of growing."""
+        subscriber = Subscriber(None, maxsize=2)
+        for number in range(5):
+            subscriber.offer(f"event {number}")
+        self.assertEqual(subscriber.queue.qsize(), 1)
+        self.assertIs(await subscriber.next_event(1), RESYNC)
+
+        subscriber.offer("event 5")
+        self.assertEqual(await subscriber.next_event(1), "event 5")
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from api import export
+from api.models import Supplier, Vessel, Invoice
+from api.tests import ApiTestCase, bearer
+
+
+class InvoiceExportTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=self.user.pk)
+
+        self.acme = Supplier.objects.create(supplier_name="Acme Marine")
+        self.harbor = Supplier.objects.create(supplier_name="Harbor Provisions")
+        self.vessel = Vessel.objects.create(vessel_name="MV Export")
+        for day in range(1, 6):
+            self.create_invoice(
+                self.acme, invoice_number=f"A-{day}", submitted_date=datetime(2025, 1, day, 9, tzinfo=timezone.utc)
+            )
+        self.create_invoice(
+            self.harbor, invoice_number="H-1", submitted_date=datetime(2025, 1, 3, 9, tzinfo=timezone.utc)
+        )
+        self.create_invoice(
+            self.acme, invoice_number="FEB-1", submitted_date=datetime(2025, 2, 1, 9, tzinfo=timezone.utc)
+        )
+
+    def export(self, **params):
+        response = self.client.get("/user/invoices/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    @override_settings(INVOICE_EXPORT_CHUNK_SIZE=2)
+    def test_csv_streams_every_row_in_order(self):
+        """Keyset chunks return each January invoice exactly once, without models."""
+        with mock.patch.object(Invoice, "from_db", side_effect=AssertionError("model instantiated")):
+            body = self.export(date_from="2025-01-01", date_to="2025-01-31")
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        expected = Invoice.objects.filter(submitted_date__month=1).order_by("submitted_date", "invoice_id")
+        self.assertEqual(
+            [row["invoice_number"] for row in rows],
+            list(expected.values_list("invoice_number", flat=True)),
+        )
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["supplier"], "Acme Marine")
+        self.assertEqual(rows[0]["vessel"], "MV Export")
+
+    def test_filters_and_ndjson(self):
+        """Supplier filters apply and NDJSON yields one object per line."""
+        body = self.export(supplier=str(self.harbor.supplier_id), output="ndjson")
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([line["invoice_number"] for line in lines], ["H-1"])
+        self.assertEqual(lines[0]["amount_due"], "10.00")
+
+    @override_settings(INVOICE_EXPORT_CHUNK_SIZE=2)
+    async def test_asgi_streams_chunk_by_chunk(self):
+        """Under ASGI the export is an async iterator that reads one chunk at a time."""
+        with mock.patch.object(export, "iter_rows", side_effect=AssertionError("sync iterator")):
+            response = await self.async_client.get(
+                "/user/invoices/export/",
+                {"date_from": "2025-01-01", "date_to": "2025-01-31"},
+                headers={"Authorization": bearer({"user_id": self.user.pk})},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_async)
+            lines = [line async for line in response.streaming_content]
+
+        rows = list(csv.DictReader(io.StringIO(b"".join(lines).decode())))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["invoice_number"], "A-1")
+
+    def test_invalid_filters_rejected(self):
+        """Reversed date ranges are a 400."""
+        response = self.client.get("/user/invoices/export/", {"date_from": "2025-02-01", "date_to": "2025-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_writes_file(self):
+        """export_invoices writes the same export to a file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "feb.csv")
+            call_command("export_invoices", "--date-from", "2025-02-01", "--output", path, "--chunk-size", "1")
+            with open(path, encoding="utf-8") as exported:
+                rows = list(csv.DictReader(exported))
+        self.assertEqual([row["invoice_number"] for row in rows], ["FEB-1"])
@@ -0,0 +1,38 @@
+from io import StringIO
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from api.models import Supplier, Vessel, Invoice, invoice_upload_path
+from api.tests import ApiTestCase
+
+
+class InvoiceFileNamingTest(ApiTestCase):
+    temp_media_root = True
+
+    def setUp(self):
+        super().setUp()
+
+        self.supplier = Supplier.objects.create(supplier_name="File Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Files")
+
+    def test_upload_path_needs_no_query(self):
+        """The path is derived from the primary key alone."""
+        invoice = self.build_invoice(self.supplier, invoice_number="INV-1")
+        hex_id = invoice.invoice_id.hex
+
+        with self.assertNumQueries(0):
+            path = invoice_upload_path(invoice, "Scan.PDF")
+        self.assertEqual(path, f"invoices/pdfs/{hex_id[:2]}/{hex_id[2:4]}/{hex_id}.pdf")
+
+    def test_rename_command_moves_legacy_files(self):
+        """Files stored under the old flat naming are moved and relinked."""
+        invoice = self.build_invoice(self.supplier, invoice_number="INV-2")
+        invoice.save()
+        invoice.pdf_file.storage.save("invoices/pdfs/legacy.pdf", ContentFile(b"%PDF-1.4 legacy"))
+        Invoice.objects.filter(pk=invoice.pk).update(pdf_file="invoices/pdfs/legacy.pdf")
+
+        call_command("rename_invoice_files", stdout=StringIO())
+
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.pdf_file.name, invoice_upload_path(invoice, "legacy.pdf"))
+        self.assertEqual(invoice.pdf_file.read(), b"%PDF-1.4 legacy")
+        self.assertFalse(invoice.pdf_file.storage.exists("invoices/pdfs/legacy.pdf"))
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from django.contrib.auth.models import User
+from api.models import Supplier, Vessel, Invoice
+from api.tests import ApiTestCase
+
+
+class InvoicePaginationTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=user.pk)
+
+        supplier = Supplier.objects.create(supplier_name="Paged Supplier")
+        vessel = Vessel.objects.create(vessel_name="MV Paged")
+        for number in range(7):
+            self.create_invoice(supplier, vessel=vessel, invoice_number=f"INV-{number}")
+        # Two invoices share a timestamp so the invoice_id tiebreaker is exercised.
+        same_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        Invoice.objects.filter(invoice_number__in=["INV-2", "INV-3"]).update(date_created=same_time)
+
+    def test_pages_cover_every_invoice_once(self):
+        """Following next_cursor walks all invoices in order without repeats."""
+        seen = []
+        url = "/user/invoices/?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()["results"]), 3)
+            seen.extend(row["invoice_number"] for row in response.json()["results"])
+            url = response.json()["next"]
+
+        expected = list(
+            Invoice.objects.order_by("-date_created", "-invoice_id")
+            .values_list("invoice_number", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped(self):
+        """page_size cannot exceed INVOICE_MAX_PAGE_SIZE."""
+        with self.settings(INVOICE_MAX_PAGE_SIZE=2):
+            response = self.client.get("/user/invoices/?page_size=1000")
+        self.assertEqual(len(response.json()["results"]), 2)
+        self.assertIsNotNone(response.json()["next_cursor"])
+
+    def test_invalid_cursor(self):
+        """A tampered cursor is rejected."""
+        response = self.client.get("/user/invoices/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,61 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from api.models import Supplier, Vessel, InvoiceSearchToken
+from api.tests import ApiTestCase
+
+
+class InvoiceSearchTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=user.pk)
+
+        self.acme = Supplier.objects.create(supplier_name="Acme Marine Supply")
+        self.harbor = Supplier.objects.create(supplier_name="Harbor Provisions")
+        self.vessel = Vessel.objects.create(vessel_name="MV Pacific Star")
+        self.create_invoice(self.acme, invoice_number="INV-00123")
+        self.create_invoice(self.harbor, invoice_number="ACME-778")
+        self.create_invoice(self.harbor, invoice_number="HP-555")
+
+    def search(self, term):
+        response = self.client.get("/user/invoices/", {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [row["invoice_number"] for row in response.json()["results"]]
+
+    def test_prefix_match(self):
+        """Word prefixes of supplier names match."""
+        self.assertCountEqual(self.search("harb"), ["ACME-778", "HP-555"])
+
+    def test_ranking_prefers_invoice_number(self):
+        """An invoice-number hit ranks above a supplier-name hit."""
+        self.assertEqual(self.search("acme"), ["ACME-778", "INV-00123"])
+
+    def test_substring_of_invoice_number(self):
+        """Digits inside an invoice number still match."""
+        self.assertEqual(self.search("123"), ["INV-00123"])
+
+    def test_all_terms_must_match(self):
+        """Multiple words narrow the result set."""
+        self.assertEqual(self.search("pacific 555"), ["HP-555"])
+
+    def test_renaming_supplier_reindexes(self):
+        """Supplier renames are reflected in search."""
+        self.acme.supplier_name = "Zenith Chandlers"
+        self.acme.save()
+        self.assertEqual(self.search("zenith"), ["INV-00123"])
+
+    def test_rebuild_command(self):
+        """rebuild_search_index restores a wiped index."""
+        InvoiceSearchToken.objects.all().delete()
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("123"), ["INV-00123"])
+
+    def test_ranked_results_paginate(self):
+        """Cursors carry the rank so ranked pages do not repeat rows."""
+        first = self.client.get("/user/invoices/", {"search": "acme", "page_size": 1}).json()
+        second = self.client.get(first["next"]).json()
+
+        self.assertEqual(first["results"][0]["invoice_number"], "ACME-778")
+        self.assertEqual(second["results"][0]["invoice_number"], "INV-00123")
+        self.assertIsNone(second["next"])
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from api.models import Supplier, Vessel, Invoice, SupplierMonthlySummary, VesselMonthlySummary
+from api.tests import ApiTestCase
+
+JANUARY = datetime(2025, 1, 10, 4, tzinfo=timezone.utc)
+FEBRUARY = datetime(2025, 2, 10, 4, tzinfo=timezone.utc)
+
+
+def summary_state():
+    return {
+        "suppliers": sorted(
+            SupplierMonthlySummary.objects.filter(invoice_count__gt=0)
+            .values_list("supplier_id", "month", "invoice_count", "amount_total")
+        ),
+        "vessels": sorted(
+            VesselMonthlySummary.objects.filter(invoice_count__gt=0)
+            .values_list("vessel_id", "month", "invoice_count", "amount_total")
+        ),
+    }
+
+
+class InvoiceSummaryTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.acme = Supplier.objects.create(supplier_name="Acme Marine")
+        self.harbor = Supplier.objects.create(supplier_name="Harbor Provisions")
+        self.star = Vessel.objects.create(vessel_name="MV Star")
+        self.wave = Vessel.objects.create(vessel_name="MV Wave")
+
+    def assertMatchesRebuild(self):
+        incremental = summary_state()
+        call_command("rebuild_invoice_summaries", stdout=StringIO())
+        self.assertEqual(incremental, summary_state())
+
+    def test_create_update_delete_keep_totals(self):
+        """Incremental totals always equal a full rebuild."""
+        first = self.create_invoice(
+            self.acme, invoice_number="INV-1", vessel=self.star, amount_due="100.00", submitted_date=JANUARY
+        )
+        self.create_invoice(
+            self.acme, invoice_number="INV-2", vessel=self.wave, amount_due="50.50", submitted_date=JANUARY
+        )
+        self.create_invoice(
+            self.harbor, invoice_number="INV-3", vessel=self.star, amount_due="20.00", submitted_date=FEBRUARY
+        )
+
+        star_january = VesselMonthlySummary.objects.get(vessel=self.star, month="2025-01-01")
+        self.assertEqual(star_january.invoice_count, 1)
+        self.assertEqual(star_january.amount_total, Decimal("100.00"))
+        self.assertMatchesRebuild()
+
+        first = Invoice.objects.get(pk=first.pk)
+        first.amount_due = Decimal("120.00")
+        first.vessel = self.wave
+        first.submitted_date = datetime(2025, 2, 1, 4, tzinfo=timezone.utc)
+        first.save()
+        self.assertMatchesRebuild()
+
+        Invoice.objects.get(invoice_number="INV-2").delete()
+        self.assertMatchesRebuild()
+
+    def test_month_uses_local_time(self):
+        """Buckets follow TIME_ZONE, not UTC."""
+        # 2025-01-31 20:00 UTC is already February in Manila.
+        self.create_invoice(
+            self.acme,
+            vessel=self.star,
+            invoice_number="EDGE",
+            submitted_date=datetime(2025, 1, 31, 20, tzinfo=timezone.utc),
+            amount_due="1.00",
+        )
+        self.assertEqual(str(SupplierMonthlySummary.objects.get().month), "2025-02-01")
+
+    def test_update_fields_and_cascade(self):
+        """Partial saves and cascaded deletes leave consistent totals."""
+        invoice = self.create_invoice(
+            self.acme, invoice_number="INV-1", vessel=self.star, amount_due="10.00", submitted_date=JANUARY
+        )
+        invoice.amount_due = Decimal("99.00")
+        invoice.description = "note only"
+        invoice.save(update_fields=["description"])
+        self.assertMatchesRebuild()
+
+        self.create_invoice(
+            self.harbor, invoice_number="INV-2", vessel=self.wave, amount_due="5.00", submitted_date=JANUARY
+        )
+        self.star.delete()
+        self.assertMatchesRebuild()
+
+    def test_summary_api(self):
+        """The summary endpoint returns per-vessel monthly totals."""
+        self.create_invoice(
+            self.acme, invoice_number="INV-1", vessel=self.star, amount_due="100.00", submitted_date=JANUARY
+        )
+        self.create_invoice(
+            self.harbor, invoice_number="INV-2", vessel=self.star, amount_due="25.00", submitted_date=JANUARY
+        )
+        self.create_invoice(
+            self.acme, invoice_number="INV-3", vessel=self.wave, amount_due="1.00", submitted_date=FEBRUARY
+        )
+
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=user.pk)
+
+        response = self.client.get("/user/invoices/summary/", {"group": "vessel", "month_from": "2025-01", "month_to": "2025-01"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["vessel_name"], "MV Star")
+        self.assertEqual(response.data[0]["month"], "2025-01")
+        self.assertEqual(response.data[0]["invoice_count"], 2)
+        self.assertEqual(response.data[0]["amount_total"], "125.00")
+
+        response = self.client.get("/user/invoices/summary/", {"group": "supplier"})
+        self.assertEqual({row["supplier_name"] for row in response.data}, {"Acme Marine", "Harbor Provisions"})
+
+        response = self.client.get("/user/invoices/summary/", {"group": "supplier", "supplier": str(self.acme.pk)})
+        self.assertEqual([row["supplier_name"] for row in response.data], ["Acme Marine", "Acme Marine"])
+
+        # Supplier summaries are not broken down by vessel.
+        response = self.client.get("/user/invoices/summary/", {"group": "supplier", "vessel": str(self.star.pk)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("vessel", response.data)
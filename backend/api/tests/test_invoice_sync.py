@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.models import Supplier, Vessel, Invoice, InvoiceChange
+from api.tests import ApiTestCase
+
+
+@override_settings(INVOICE_SYNC_SETTLE_SECONDS=0)
+class InvoiceSyncTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.authenticate(user_id=user.pk)
+
+        self.acme = Supplier.objects.create(supplier_name="Acme Marine")
+        self.harbor = Supplier.objects.create(supplier_name="Harbor Provisions")
+        self.vessel = Vessel.objects.create(vessel_name="MV Sync")
+
+    def sync(self, cursor=None, client=None, path="/user/invoices/sync/"):
+        params = {} if cursor is None else {"cursor": cursor}
+        response = (client or self.client).get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_since_cursor(self):
+        """Creates, updates and deletes after the cursor come back collapsed per invoice."""
+        kept = self.create_invoice(self.acme, invoice_number="INV-KEPT")
+        start = self.sync()
+        self.assertEqual(start["upserts"], [])
+
+        created = self.create_invoice(self.acme, invoice_number="INV-NEW")
+        created.description = "edited twice"
+        created.save()
+        kept_id = str(kept.pk)
+        kept.delete()
+
+        changes = self.sync(start["cursor"])
+        self.assertEqual([row["invoice_number"] for row in changes["upserts"]], ["INV-NEW"])
+        self.assertEqual(changes["upserts"][0]["description"], "edited twice")
+        self.assertEqual(changes["upserts"][0]["vessel_name"], "MV Sync")
+        self.assertEqual(changes["deletes"], [kept_id])
+
+        idle = self.sync(changes["cursor"])
+        self.assertEqual((idle["upserts"], idle["deletes"], idle["cursor"]), ([], [], changes["cursor"]))
+
+    def test_pages_until_caught_up(self):
+        """has_more pages through a long backlog."""
+        start = self.sync()["cursor"]
+        for number in range(5):
+            self.create_invoice(self.acme, invoice_number=f"INV-{number}")
+
+        seen, cursor = [], start
+        with self.settings(INVOICE_SYNC_PAGE_SIZE=2):
+            while True:
+                page = self.sync(cursor)
+                seen += [row["invoice_number"] for row in page["upserts"]]
+                cursor = page["cursor"]
+                if not page["has_more"]:
+                    break
+        self.assertEqual(seen, [f"INV-{number}" for number in range(5)])
+
+    def test_unsettled_changes_are_resent(self):
+        """Fresh changes are returned but the cursor stays before them."""
+        start = self.sync()["cursor"]
+        self.create_invoice(self.acme, invoice_number="INV-FRESH")
+        with self.settings(INVOICE_SYNC_SETTLE_SECONDS=60):
+            page = self.sync(start)
+        self.assertEqual([row["invoice_number"] for row in page["upserts"]], ["INV-FRESH"])
+        self.assertEqual(page["cursor"], start)
+
+    def test_supplier_feed_is_scoped(self):
+        """A supplier sees only its own invoices, and a move away as a delete."""
+        client = APIClient()
+        self.authenticate(client, supplier_id=str(self.acme.pk))
+        cursor = self.sync(client=client, path="/invoices/sync/")["cursor"]
+
+        moved = self.create_invoice(self.acme, invoice_number="INV-ACME")
+        self.create_invoice(self.harbor, invoice_number="INV-HARBOR")
+        page = self.sync(cursor, client=client, path="/invoices/sync/")
+        self.assertEqual([row["invoice_number"] for row in page["upserts"]], ["INV-ACME"])
+
+        moved = Invoice.objects.get(pk=moved.pk)
+        moved.supplier = self.harbor
+        moved.save()
+        page = self.sync(page["cursor"], client=client, path="/invoices/sync/")
+        self.assertEqual((page["upserts"], page["deletes"]), ([], [str(moved.pk)]))
+
+    def test_vessel_rename_and_supplier_delete(self):
+        """Indirect changes to list rows are logged too."""
+        invoice_id = str(self.create_invoice(self.acme, invoice_number="INV-1").pk)
+        cursor = self.sync()["cursor"]
+
+        self.vessel.vessel_name = "MV Renamed"
+        self.vessel.save()
+        page = self.sync(cursor)
+        self.assertEqual(page["upserts"][0]["vessel_name"], "MV Renamed")
+        # Logged once for the vessel, not once per invoice.
+        self.assertEqual(InvoiceChange.objects.filter(id__gt=cursor).count(), 1)
+
+        self.acme.delete()
+        page = self.sync(page["cursor"])
+        self.assertEqual(page["deletes"], [invoice_id])
+
+    def test_supplier_feed_expands_vessel_rename(self):
+        """A supplier's feed lists only its own invoices of a renamed vessel."""
+        client = APIClient()
+        self.authenticate(client, supplier_id=str(self.acme.pk))
+        self.create_invoice(self.acme, invoice_number="INV-ACME")
+        self.create_invoice(self.harbor, invoice_number="INV-HARBOR")
+        cursor = self.sync(client=client, path="/invoices/sync/")["cursor"]
+
+        self.vessel.vessel_name = "MV Renamed"
+        self.vessel.save()
+        page = self.sync(cursor, client=client, path="/invoices/sync/")
+        self.assertEqual([row["invoice_number"] for row in page["upserts"]], ["INV-ACME"])
+        self.assertEqual(page["upserts"][0]["vessel_name"], "MV Renamed")
+        self.assertEqual(page["deletes"], [])
+
+    def test_change_is_logged_last(self):
+        """The log entry is the save's last write, after the summary updates."""
+        with CaptureQueriesContext(connection) as queries:
+            self.create_invoice(self.acme, invoice_number="INV-LAST")
+        writes = [query["sql"] for query in queries if query["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertIn("api_invoicechange", writes[-1])
+
+    def test_pruned_cursor_is_gone(self):
+        """A cursor older than the retained log answers 410 Gone."""
+        self.create_invoice(self.acme, invoice_number="INV-OLD")
+        cursor = self.sync()["cursor"]
+        self.create_invoice(self.acme, invoice_number="INV-NEWER")
+        InvoiceChange.objects.update(created_at=datetime.now(timezone.utc) - timedelta(days=90))
+
+        call_command("prune_invoice_changes", stdout=StringIO())
+        self.assertEqual(InvoiceChange.objects.count(), 1)
+        response = self.client.get("/user/invoices/sync/", {"cursor": cursor})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.sync(self.sync()["cursor"])["upserts"], [])
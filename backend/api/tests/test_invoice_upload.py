@@ -0,0 +1,50 @@
+import hashlib
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from api.models import Supplier, Vessel, Invoice
+from api.tests import ApiTestCase
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 200_000 + b"\n%%EOF"
+
+
+class InvoiceUploadTest(ApiTestCase):
+    temp_media_root = True
+
+    def setUp(self):
+        super().setUp()
+        self.supplier = Supplier.objects.create(supplier_name="Upload Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Upload")
+        self.authenticate(supplier_id=str(self.supplier.supplier_id))
+
+    def upload(self, content, number="INV-1"):
+        return self.client.post("/invoices/upload/", {
+            "vessel": str(self.vessel.vessel_id),
+            "invoice_number": number,
+            "submitted_date": "2025-01-01T00:00:00Z",
+            "amount_due": "10.00",
+            "pdf_file": SimpleUploadedFile("invoice.pdf", content, "application/pdf"),
+        }, format="multipart")
+
+    def test_pdf_is_streamed_and_hashed(self):
+        """A valid PDF is stored under the digest computed while streaming."""
+        response = self.upload(PDF_BYTES)
+
+        self.assertEqual(response.status_code, 201)
+        invoice = Invoice.objects.get()
+        self.assertEqual(invoice.pdf_blob_id, hashlib.sha256(PDF_BYTES).hexdigest())
+        self.assertEqual(invoice.pdf_blob.size, len(PDF_BYTES))
+
+    def test_non_pdf_rejected(self):
+        """Bodies without a PDF header are refused and nothing is saved."""
+        response = self.upload(b"MZ\x90\x00 not a pdf" * 200)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Invoice.objects.exists())
+
+    @override_settings(INVOICE_UPLOAD_MAX_SIZE=100_000)
+    def test_oversized_rejected(self):
+        """Files past INVOICE_UPLOAD_MAX_SIZE are cut off mid-stream."""
+        response = self.upload(PDF_BYTES)
+
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Invoice.objects.exists())
@@ -0,0 +1,104 @@
+import hashlib
+import os
+from io import StringIO
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from api.models import Supplier, Vessel, Invoice, PdfBlob
+from api.tests import ApiTestCase
+
+
+class PdfBlobTest(ApiTestCase):
+    temp_media_root = True
+
+    def setUp(self):
+        super().setUp()
+
+        self.supplier = Supplier.objects.create(supplier_name="Blob Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Blob")
+
+    def test_identical_uploads_share_one_blob(self):
+        """Re-uploading the same bytes stores them once."""
+        first = self.create_invoice(self.supplier, invoice_number="INV-1", pdf=b"%PDF-1.4 same")
+        second = self.create_invoice(self.supplier, invoice_number="INV-2", pdf=b"%PDF-1.4 same")
+
+        self.assertEqual(PdfBlob.objects.count(), 1)
+        self.assertEqual(first.pdf_file.name, second.pdf_file.name)
+        self.assertEqual(PdfBlob.objects.get().ref_count, 2)
+
+    def test_losing_concurrent_store_removes_its_file(self):
+        """When another upload of the same bytes wins the row, our copy is deleted."""
+        PdfBlob.store(SimpleUploadedFile("first.pdf", b"%PDF-1.4 race"))
+        storage = PdfBlob._meta.get_field("file").storage
+
+        # Both uploads looked before either had saved; storage then finds
+        # the name taken and picks an alternate one.
+        exists = storage.exists
+        looked = []
+
+        def exists_once(name):
+            looked.append(name)
+            return len(looked) > 1 and exists(name)
+
+        with mock.patch.object(PdfBlob.objects, "filter", return_value=PdfBlob.objects.none()), \
+                mock.patch.object(storage, "exists", side_effect=exists_once):
+            blob = PdfBlob.store(SimpleUploadedFile("second.pdf", b"%PDF-1.4 race"))
+
+        directory = os.path.dirname(blob.file.name)
+        self.assertEqual(storage.listdir(directory)[1], [os.path.basename(blob.file.name)])
+
+    def test_delete_and_collect(self):
+        """Blobs are collected only once nothing references them."""
+        first = self.create_invoice(self.supplier, invoice_number="INV-1", pdf=b"%PDF-1.4 same")
+        second = self.create_invoice(self.supplier, invoice_number="INV-2", pdf=b"%PDF-1.4 same")
+        blob = PdfBlob.objects.get()
+
+        first.delete()
+        call_command("gc_pdf_blobs", grace_minutes=-1, stdout=StringIO())
+        self.assertEqual(PdfBlob.objects.get().ref_count, 1)
+
+        second.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("gc_pdf_blobs", grace_minutes=-1, stdout=StringIO())
+        self.assertFalse(PdfBlob.objects.exists())
+        self.assertFalse(blob.file.storage.exists(blob.file.name))
+
+    def test_replacing_file_moves_reference(self):
+        """Uploading a new file releases the previous blob."""
+        invoice = Invoice.objects.get(pk=self.create_invoice(
+            self.supplier, invoice_number="INV-1", pdf=b"%PDF-1.4 old").pk
+        )
+        invoice.pdf_file = SimpleUploadedFile("new.pdf", b"%PDF-1.4 new")
+        invoice.save()
+
+        old_sha = hashlib.sha256(b"%PDF-1.4 old").hexdigest()
+        new_sha = hashlib.sha256(b"%PDF-1.4 new").hexdigest()
+        counts = dict(PdfBlob.objects.values_list("sha256", "ref_count"))
+        self.assertEqual(counts, {old_sha: 0, new_sha: 1})
+
+    def test_collect_skips_blob_picked_up_again(self):
+        """A blob referenced again before its row is locked is kept, files and all."""
+        invoice = self.create_invoice(self.supplier, invoice_number="INV-1", pdf=b"%PDF-1.4 same")
+        invoice.delete()
+        blob = PdfBlob.objects.get()
+        garbage = PdfBlob.objects.filter(ref_count=0)
+
+        self.create_invoice(self.supplier, invoice_number="INV-2", pdf=b"%PDF-1.4 same")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(PdfBlob.delete_unreferenced(blob.pk, garbage))
+        self.assertTrue(PdfBlob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+    def test_files_deleted_only_after_commit(self):
+        """Blob files outlive the transaction that deletes the row until it commits."""
+        invoice = self.create_invoice(self.supplier, invoice_number="INV-1", pdf=b"%PDF-1.4 same")
+        invoice.delete()
+        blob = PdfBlob.objects.get()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            PdfBlob.delete_unreferenced(blob.pk)
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(blob.file.storage.exists(blob.file.name))
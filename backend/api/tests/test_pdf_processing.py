@@ -0,0 +1,102 @@
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.utils import timezone as django_timezone
+from django.test import override_settings
+from api.management.commands import process_pdfs
+from api.models import Supplier, Vessel, Invoice, PdfPreview
+from api.serializers import InvoiceListSerializer
+from api.tests import ApiTestCase
+
+
+def make_pdf(text, pages=1):
+    import pymupdf
+
+    document = pymupdf.open()
+    for number in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"{text} page {number + 1}")
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+class PdfProcessingTest(ApiTestCase):
+    temp_media_root = True
+
+    def setUp(self):
+        super().setUp()
+
+        self.supplier = Supplier.objects.create(supplier_name="Preview Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Preview")
+
+    def process(self):
+        call_command("process_pdfs", once=True, workers=1, stdout=StringIO(), stderr=StringIO())
+
+    def test_new_blob_is_processed(self):
+        """A new PDF is queued once and gets page count, text and a thumbnail."""
+        content = make_pdf("Bunker delivery", pages=2)
+        invoice = self.create_invoice(self.supplier, invoice_number="INV-1", pdf=content)
+        self.create_invoice(self.supplier, invoice_number="INV-2", pdf=content)
+        self.assertEqual(PdfPreview.objects.filter(status=PdfPreview.PENDING).count(), 1)
+
+        self.process()
+
+        preview = PdfPreview.objects.get(blob=invoice.pdf_blob)
+        self.assertEqual(preview.status, PdfPreview.DONE)
+        self.assertEqual(preview.page_count, 2)
+        self.assertIn("Bunker delivery page 2", preview.text)
+        self.assertTrue(preview.thumbnail.storage.exists(preview.thumbnail.name))
+        with preview.web_file.open("rb") as web_file:
+            self.assertTrue(web_file.read(5).startswith(b"%PDF-"))
+
+        data = InvoiceListSerializer(Invoice.objects.get(pk=invoice.pk)).data
+        self.assertEqual(data["page_count"], 2)
+        self.assertTrue(data["thumbnail"].endswith(".png"))
+        self.assertTrue(data["web_file"].endswith(".pdf"))
+
+    @override_settings(PDF_PROCESSING_MAX_ATTEMPTS=2)
+    def test_broken_pdf_fails_after_retries(self):
+        """Unreadable PDFs are retried, then marked failed."""
+        invoice = self.create_invoice(self.supplier, invoice_number="INV-1", pdf=b"%PDF-1.4 not really a pdf")
+
+        self.process()
+        preview = PdfPreview.objects.get(blob=invoice.pdf_blob)
+        self.assertEqual(preview.status, PdfPreview.FAILED)
+        self.assertEqual(preview.attempts, 2)
+        self.assertTrue(preview.error)
+
+        data = InvoiceListSerializer(invoice).data
+        self.assertIsNone(data["thumbnail"])
+        self.assertIsNone(data["page_count"])
+
+    @override_settings(PDF_PROCESSING_MAX_ATTEMPTS=2)
+    def test_stale_job_out_of_attempts_fails(self):
+        """A job whose worker died on its last attempt is not claimed again."""
+        invoice = self.create_invoice(self.supplier, invoice_number="INV-1", pdf=make_pdf("Crash"))
+        PdfPreview.objects.update(
+            status=PdfPreview.RUNNING,
+            attempts=2,
+            started_at=django_timezone.now() - timedelta(hours=1),
+        )
+
+        self.process()
+        preview = PdfPreview.objects.get(blob=invoice.pdf_blob)
+        self.assertEqual(preview.status, PdfPreview.FAILED)
+        self.assertEqual(preview.attempts, 2)
+
+    def test_broken_pool_is_replaced(self):
+        """Submitting to a pool broken by a dead worker starts a new pool."""
+        command = process_pdfs.Command(stdout=StringIO(), stderr=StringIO())
+        command.workers = 2
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool()
+        command.pool = broken
+        with mock.patch.object(command, "new_pool") as new_pool:
+            future = command.submit("0" * 64, "invoices/blobs/x.pdf")
+
+        broken.shutdown.assert_called_once_with(wait=False)
+        self.assertIs(command.pool, new_pool.return_value)
+        self.assertIs(future, new_pool.return_value.submit.return_value)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.models import Supplier, Pin
+
+
+class PinUniquenessTest(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(supplier_name="First Supplier")
+        Pin.objects.create(supplier=self.supplier, pin_code="1234")
+
+    def test_duplicate_pin_rejected(self):
+        """Another supplier cannot reuse an existing PIN."""
+        other = Supplier.objects.create(supplier_name="Second Supplier")
+        with self.assertRaises(ValidationError):
+            Pin.objects.create(supplier=other, pin_code="1234")
+
+    def test_duplicate_of_legacy_pin_rejected(self):
+        """A PIN without a fingerprint yet is still compared, by its hash."""
+        Pin.objects.filter(supplier=self.supplier).update(pin_lookup=None)
+        other = Supplier.objects.create(supplier_name="Second Supplier")
+        with self.assertRaises(ValidationError):
+            pin = Pin(supplier=other)
+            pin.set_pin("1234")
+            pin.save()
+
+    def test_resave_own_pin(self):
+        """Saving a PIN again does not collide with itself."""
+        pin = Pin.objects.get(supplier=self.supplier)
+        pin.is_locked = True
+        pin.save()
+        self.assertTrue(Pin.objects.get(pk=pin.pk).is_locked)
+
+
+class ProvisionPinsCommandTest(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(supplier_name="Existing Supplier")
+        Pin.objects.create(supplier=self.supplier, pin_code="1111")
+
+    def write_csv(self, content):
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        handle.write(content)
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_provision_and_rotate(self):
+        """New suppliers get PINs and existing ones are rotated."""
+        path = self.write_csv(
+            "supplier_id,supplier_name,pin\n"
+            f"{self.supplier.supplier_id},,2222\n"
+            ",New Supplier,3333\n"
+        )
+        call_command("provision_pins", path, workers=1, stdout=open(os.devnull, "w"))
+
+        rotated = Pin.objects.select_related("supplier").get(supplier=self.supplier)
+        self.assertTrue(rotated.check_pin("2222"))
+        self.assertEqual(Pin.find_by_pin("3333").supplier.supplier_name, "New Supplier")
+
+    def test_rotation_revokes_tokens(self):
+        """Tokens issued for the old PIN stop working once it is rotated."""
+        client = APIClient()
+        tokens = client.post("/verify-pin/", {"pin_code": "1111"}, format="json").json()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access_token']}")
+        self.assertEqual(client.get("/invoices/").status_code, 200)
+
+        path = self.write_csv(f"supplier_id,supplier_name,pin\n{self.supplier.supplier_id},,2222\n")
+        call_command("provision_pins", path, workers=1, stdout=open(os.devnull, "w"))
+
+        self.assertEqual(client.get("/invoices/").status_code, 403)
+        response = client.post("/token/refresh/", {"refresh_token": tokens["refresh_token"]}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_pin_taken_by_other_supplier(self):
+        """The whole file is rejected if a PIN belongs to someone else."""
+        path = self.write_csv("supplier_id,supplier_name,pin\n,New Supplier,1111\n")
+        with self.assertRaises(CommandError):
+            call_command("provision_pins", path, workers=1)
+        self.assertFalse(Supplier.objects.filter(supplier_name="New Supplier").exists())
+
+    def test_pin_taken_by_legacy_supplier(self):
+        """PINs without a fingerprint are compared by hash before anything is written."""
+        Pin.objects.filter(supplier=self.supplier).update(pin_lookup=None)
+        path = self.write_csv("supplier_id,supplier_name,pin\n,New Supplier,1111\n")
+        with self.assertRaises(CommandError):
+            call_command("provision_pins", path, workers=1, stdout=open(os.devnull, "w"))
+        self.assertFalse(Supplier.objects.filter(supplier_name="New Supplier").exists())
+
+        # The legacy supplier may keep its own PIN.
+        path = self.write_csv(f"supplier_id,supplier_name,pin\n{self.supplier.supplier_id},,1111\n")
+        call_command("provision_pins", path, workers=1, stdout=open(os.devnull, "w"))
+        self.assertEqual(Pin.find_by_pin("1111").supplier, self.supplier)
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.bloom import invoice_number_filter
+from api.models import Supplier, Vessel, Invoice
+from api.replicas import StickyPrimaryMiddleware, replica_reads
+from api.tests import ApiTestCase, make_token
+
+
+HAS_REPLICA = "replica" in settings.DATABASES
+
+
+@skipUnless(HAS_REPLICA, "needs a second database (server.test_settings)")
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTest(ApiTestCase):
+    """
+    "replica" is not replicated to, so each database gets its own invoice:
+    the number a view returns shows which database it read.
+    """
+    databases = {"default", "replica"} if HAS_REPLICA else {"default"}
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        invoice_number_filter.clear()
+        user = User.objects.create_user(username="clerk", password="secret-pass")
+        self.token = make_token({"user_id": user.pk})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+        supplier = Supplier.objects.create(supplier_name="Acme Marine")
+        vessel = Vessel.objects.create(vessel_name="MV Routed")
+        for alias, number in [("default", "INV-PRIMARY"), ("replica", "INV-REPLICA")]:
+            if alias == "replica":
+                # bulk_create sends no signals, which would write to the primary.
+                Supplier.objects.using(alias).bulk_create([Supplier(supplier_id=supplier.pk, supplier_name="Acme Marine")])
+                Vessel.objects.using(alias).bulk_create([Vessel(vessel_id=vessel.pk, vessel_name="MV Routed")])
+            Invoice.objects.using(alias).bulk_create([Invoice(
+                supplier_id=supplier.pk,
+                vessel_id=vessel.pk,
+                invoice_number=number,
+                submitted_date=datetime.now(timezone.utc),
+                amount_due="10.00",
+            )])
+
+    def listed(self):
+        response = self.client.get("/user/invoices/")
+        self.assertEqual(response.status_code, 200)
+        return [row["invoice_number"] for row in response.json()["results"]]
+
+    def test_list_reads_replica(self):
+        """The invoice list is served from the replica."""
+        self.assertEqual(self.listed(), ["INV-REPLICA"])
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.listed(), ["INV-PRIMARY"])
+
+    def test_check_invoice_reads_primary(self):
+        """The Bloom filter and the confirming lookup both read the primary."""
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.post(
+                "/invoices/check-invoice/", {"invoice_numbers": ["INV-PRIMARY", "INV-REPLICA"]}, format="json"
+            )
+            single = self.client.get("/invoices/check-invoice/?invoice_number=INV-PRIMARY")
+        self.assertEqual(response.status_code, 200)
+        # INV-REPLICA is not in the primary, so the filter rules it out;
+        # INV-PRIMARY passes the filter and is confirmed on the primary.
+        self.assertEqual([row["exists"] for row in response.json()["results"]], [True, False])
+        self.assertTrue(single.json()["exists"])
+        self.assertEqual(len(replica_queries), 0)
+
+    def test_writes_stick_to_primary(self):
+        """After a write, the request and then the client read the primary."""
+        reads = []
+
+        @replica_reads
+        def view(self, request):
+            reads.append(list(Invoice.objects.values_list("invoice_number", flat=True)))
+            Vessel.objects.create(vessel_name="MV Written")
+            reads.append(list(Invoice.objects.values_list("invoice_number", flat=True)))
+            return None
+
+        request = RequestFactory().post("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        StickyPrimaryMiddleware(lambda request: view(None, request))(request)
+        self.assertEqual(reads, [["INV-REPLICA"], ["INV-PRIMARY"]])
+        self.assertTrue(Vessel.objects.filter(vessel_name="MV Written").exists())
+
+        self.assertEqual(self.listed(), ["INV-PRIMARY"])
+        other = APIClient()
+        self.authenticate(other, user_id=User.objects.create_user(username="other").pk)
+        self.assertEqual(
+            [row["invoice_number"] for row in other.get("/user/invoices/").json()["results"]], ["INV-REPLICA"]
+        )
+
+        cache.clear()  # the sticky window has passed
+        self.assertEqual(self.listed(), ["INV-REPLICA"])
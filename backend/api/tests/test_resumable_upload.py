@@ -0,0 +1,127 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from api.models import Supplier, Vessel, Invoice, UploadSession
+from api.tests import ApiTestCase
+
+PDF_BYTES = b"%PDF-1.4\n" + b"1" * 5000 + b"\n%%EOF"
+
+
+class ResumableUploadTest(ApiTestCase):
+    temp_media_root = True
+
+    def setUp(self):
+        super().setUp()
+        self.override_settings(
+            RESUMABLE_UPLOAD_DIR=f"{self.media_root}/sessions",
+            RESUMABLE_UPLOAD_CHUNK_SIZE=2048,
+        )
+
+        self.supplier = Supplier.objects.create(supplier_name="Ship Supplier")
+        self.vessel = Vessel.objects.create(vessel_name="MV Remote")
+        self.authenticate(supplier_id=str(self.supplier.supplier_id))
+
+    def create_session(self):
+        response = self.client.post("/invoices/uploads/", {
+            "filename": "invoice.pdf",
+            "total_size": len(PDF_BYTES),
+            "sha256": hashlib.sha256(PDF_BYTES).hexdigest(),
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["upload_id"]
+
+    def send_chunk(self, upload_id, start, end, checksum=None):
+        chunk = PDF_BYTES[start:end]
+        return self.client.put(
+            f"/invoices/uploads/{upload_id}/",
+            data=chunk,
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{end - 1}/{len(PDF_BYTES)}",
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(chunk).hexdigest(),
+        )
+
+    def test_resume_and_finalize(self):
+        """Chunks can be resent after a drop and finalize creates the invoice."""
+        upload_id = self.create_session()
+        self.assertEqual(self.send_chunk(upload_id, 0, 2048).status_code, 200)
+        # A retried chunk whose response was lost is accepted idempotently.
+        self.assertEqual(self.send_chunk(upload_id, 0, 2048).status_code, 200)
+
+        status_response = self.client.get(f"/invoices/uploads/{upload_id}/")
+        self.assertEqual(status_response.data["received_size"], 2048)
+
+        for start in range(2048, len(PDF_BYTES), 2048):
+            self.send_chunk(upload_id, start, min(start + 2048, len(PDF_BYTES)))
+
+        response = self.client.post(f"/invoices/uploads/{upload_id}/finalize/", {
+            "vessel": str(self.vessel.vessel_id),
+            "invoice_number": "INV-SEA-1",
+            "submitted_date": "2025-01-01T00:00:00Z",
+            "amount_due": "99.50",
+        }, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        invoice = Invoice.objects.get(invoice_number="INV-SEA-1")
+        self.assertEqual(invoice.pdf_blob_id, hashlib.sha256(PDF_BYTES).hexdigest())
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_bad_checksum_does_not_advance(self):
+        """A corrupted chunk leaves the resume offset where it was."""
+        upload_id = self.create_session()
+        response = self.send_chunk(upload_id, 0, 2048, checksum="0" * 64)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get().received_size, 0)
+
+    def test_gap_is_rejected(self):
+        """Chunks must start at the current offset."""
+        upload_id = self.create_session()
+        self.assertEqual(self.send_chunk(upload_id, 2048, 4096).status_code, 409)
+
+    def test_chunk_write_locks_session(self):
+        """Chunks are written under a row lock on the session."""
+        upload_id = self.create_session()
+        sessions = UploadSession.objects
+        with mock.patch.object(sessions, "select_for_update", wraps=sessions.select_for_update) as lock:
+            self.assertEqual(self.send_chunk(upload_id, 0, 2048).status_code, 200)
+        lock.assert_called_once_with()
+
+    def test_finalize_locks_session(self):
+        """Finalize runs under the session's row lock and works once."""
+        upload_id = self.create_session()
+        for start in range(0, len(PDF_BYTES), 2048):
+            self.send_chunk(upload_id, start, min(start + 2048, len(PDF_BYTES)))
+        fields = {
+            "vessel": str(self.vessel.vessel_id),
+            "invoice_number": "INV-SEA-2",
+            "submitted_date": "2025-01-01T00:00:00Z",
+            "amount_due": "10.00",
+        }
+
+        sessions = UploadSession.objects
+        with mock.patch.object(sessions, "select_for_update", wraps=sessions.select_for_update) as lock:
+            response = self.client.post(f"/invoices/uploads/{upload_id}/finalize/", fields, format="json")
+        self.assertEqual(response.status_code, 201)
+        lock.assert_called_once_with()
+
+        response = self.client.post(f"/invoices/uploads/{upload_id}/finalize/", fields, format="json")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Invoice.objects.filter(invoice_number="INV-SEA-2").count(), 1)
+
+    def test_finalize_only_accepts_post(self):
+        """The finalize URL does not answer the session's GET or PUT."""
+        upload_id = self.create_session()
+        self.assertEqual(self.client.get(f"/invoices/uploads/{upload_id}/finalize/").status_code, 405)
+        self.assertEqual(self.client.put(f"/invoices/uploads/{upload_id}/finalize/").status_code, 405)
+
+    def test_cleanup_removes_expired_sessions(self):
+        """Expired sessions are purged by the cleanup command."""
+        upload_id = self.create_session()
+        UploadSession.objects.update(expires_at=datetime.now(timezone.utc) - timedelta(hours=1))
+
+        call_command("cleanup_upload_sessions", stdout=StringIO())
+
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(self.client.get(f"/invoices/uploads/{upload_id}/").status_code, 404)
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+import jwt
+from django.core.cache import cache
+from django.core.management import call_command
+from api.models import Supplier, Pin, RevokedRefreshToken
+from api.tests import ApiTestCase, make_token
+
+
+class TokenRefreshTest(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.supplier = Supplier.objects.create(supplier_name="Test Supplier")
+        self.pin = Pin(supplier=self.supplier)
+        self.pin.set_pin("1234")
+        self.pin.save()
+        self.tokens = self.client.post("/verify-pin/", {"pin_code": "1234"}, format="json").json()
+
+    def refresh(self, token):
+        return self.client.post("/token/refresh/", {"refresh_token": token}, format="json")
+
+    def test_refresh_rotates_without_hashing(self):
+        """A refresh token buys new tokens with no PIN hash check."""
+        with mock.patch("api.models.check_password") as check:
+            response = self.refresh(self.tokens["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        check.assert_not_called()
+
+        data = response.json()
+        self.assertEqual(data["supplier_name"], "Test Supplier")
+        self.assertNotEqual(data["refresh_token"], self.tokens["refresh_token"])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {data['access_token']}")
+        self.assertEqual(self.client.get("/invoices/").status_code, 200)
+
+    def test_refresh_token_works_once(self):
+        """A rotated refresh token is denylisted; replaying it fails."""
+        first = self.refresh(self.tokens["refresh_token"]).json()
+        self.assertEqual(self.refresh(first["refresh_token"]).status_code, 200)
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 401)
+
+    def test_revoked_on_logout(self):
+        """token/revoke/ denylists the refresh token."""
+        response = self.client.post("/token/revoke/", {"refresh_token": self.tokens["refresh_token"]}, format="json")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 401)
+
+    def test_locked_pin_cannot_refresh(self):
+        """A locked PIN gets 403 and its token stays usable after unlock."""
+        self.pin.lock()
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 403)
+        self.pin.unlock()
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 200)
+
+    def test_reuse_revokes_the_session(self):
+        """Replaying a rotated token ends every token of its session."""
+        newest = self.refresh(self.tokens["refresh_token"]).json()
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 401)
+        self.assertEqual(self.refresh(newest["refresh_token"]).status_code, 401)
+
+        # A new PIN entry starts a new session.
+        fresh = self.client.post("/verify-pin/", {"pin_code": "1234"}, format="json").json()
+        self.assertEqual(self.refresh(fresh["refresh_token"]).status_code, 200)
+
+    def test_session_is_capped(self):
+        """Rotation keeps auth_time, so no token outlives PIN_SESSION_DAYS."""
+        self.override_settings(PIN_SESSION_DAYS=1)
+        tokens = self.client.post("/verify-pin/", {"pin_code": "1234"}, format="json").json()
+        rotated = self.refresh(tokens["refresh_token"]).json()
+        first, second = (jwt.decode(t["refresh_token"], options={"verify_signature": False}) for t in (tokens, rotated))
+        self.assertEqual(second["auth_time"], first["auth_time"])
+        self.assertLessEqual(second["exp"], first["auth_time"] + 86400)
+
+        self.override_settings(PIN_SESSION_DAYS=0)
+        self.assertEqual(self.refresh(rotated["refresh_token"]).status_code, 401)
+
+    def test_changing_the_pin_ends_sessions(self):
+        """Tokens issued before set_pin() can neither refresh nor authenticate."""
+        self.pin.set_pin("5678")
+        self.pin.save()
+        self.assertEqual(self.refresh(self.tokens["refresh_token"]).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access_token']}")
+        self.assertEqual(self.client.get("/invoices/").status_code, 403)
+
+    def test_token_types_are_not_interchangeable(self):
+        """Access tokens cannot refresh and refresh tokens cannot authenticate."""
+        self.assertEqual(self.refresh(self.tokens["access_token"]).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['refresh_token']}")
+        self.assertEqual(self.client.get("/invoices/").status_code, 403)
+
+    def test_prune_expired_entries(self):
+        """Only denylist entries past their token's expiry are pruned."""
+        self.refresh(self.tokens["refresh_token"])
+        expired = make_token(
+            {"supplier_id": str(self.supplier.pk), "pin_id": self.pin.pk, "type": "refresh", "jti": "0" * 32},
+            lifetime=-timedelta(seconds=1),
+        )
+        self.assertEqual(self.refresh(expired).status_code, 401)
+        RevokedRefreshToken.objects.create(jti="0" * 32, expires_at=datetime.now(timezone.utc) - timedelta(days=1))
+
+        out = StringIO()
+        call_command("prune_revoked_tokens", stdout=out)
+        self.assertIn("Removed 1", out.getvalue())
+        self.assertEqual(RevokedRefreshToken.objects.count(), 1)
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from api.models import Supplier, Vessel
+
+
+class TypeaheadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for name in ["Star Voyager", "MV Pacific Star", "Northstar", "Sea Breeze"]:
+            Vessel.objects.create(vessel_name=name)
+
+    def vessel_names(self, search):
+        response = self.client.get("/vessels/", {"search": search})
+        self.assertEqual(response.status_code, 200)
+        return [row["vessel_name"] for row in response.json()]
+
+    def test_prefix_ranked_above_substring(self):
+        """Name prefix first, then word prefix, then plain substring."""
+        self.assertEqual(self.vessel_names("star"), ["Star Voyager", "MV Pacific Star", "Northstar"])
+
+    def test_empty_search_lists_alphabetically(self):
+        """Without a search term the first vessels are listed by name."""
+        self.assertEqual(
+            self.vessel_names(""),
+            ["MV Pacific Star", "Northstar", "Sea Breeze", "Star Voyager"],
+        )
+
+    def test_steady_state_uses_no_queries(self):
+        """Once built, the index answers without touching the database."""
+        self.vessel_names("sea")
+        with self.assertNumQueries(0):
+            names = self.vessel_names("sea")
+        self.assertEqual(names, ["Sea Breeze"])
+
+    def test_save_and_delete_rebuild_index(self):
+        """Signals bump the generation so changes show up on the next request."""
+        self.assertEqual(self.vessel_names("sea"), ["Sea Breeze"])
+
+        Vessel.objects.create(vessel_name="Seahorse")
+        self.assertEqual(self.vessel_names("sea"), ["Sea Breeze", "Seahorse"])
+
+        Vessel.objects.get(vessel_name="Sea Breeze").delete()
+        self.assertEqual(self.vessel_names("sea"), ["Seahorse"])
+
+    def test_supplier_search(self):
+        """Supplier matching ignores case and accents."""
+        Supplier.objects.create(supplier_name="Ãcme Marine")
+        response = self.client.get("/supplier/", {"search": "acme"})
+        self.assertEqual([row["supplier_name"] for row in response.json()], ["Ãcme Marine"])
+
+    def test_index_expires_without_generation_bump(self):
+        """A worker rebuilds an index older than TYPEAHEAD_MAX_AGE_SECONDS."""
+        self.assertEqual(self.vessel_names("sea"), ["Sea Breeze"])
+        # update() sends no signal, like a change made in another worker.
+        Vessel.objects.filter(vessel_name="Sea Breeze").update(vessel_name="Seaside")
+        self.assertEqual(self.vessel_names("sea"), ["Sea Breeze"])
+
+        with override_settings(TYPEAHEAD_MAX_AGE_SECONDS=0):
+            self.assertEqual(self.vessel_names("sea"), ["Seaside"])
@@ -1,5 +1,17 @@
-from django.test import TestCase
-from api.models import Supplier, Pin
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import Supplier, Pin, pin_lookup_digest
+from api.throttling import VerifyPinIPThrottle
 
 
 class PinModelTest(TestCase):
@@ -7,11 +19,15 @@ class PinModelTest(TestCase):
         # Create a supplier for testing
         self.supplier = Supplier.objects.create(supplier_name="Test Supplier")
 
+    def make_pin(self, raw_pin, **fields):
+        pin = Pin(supplier=self.supplier, **fields)
+        pin.set_pin(raw_pin)
+        pin.save()
+        return pin
+
     def test_set_and_check_pin(self):
         """Ensure that setting and checking a PIN works correctly."""
-        pin = Pin.objects.create(supplier=self.supplier)
-        pin.set_pin("1234")
-        pin.save()
+        pin = self.make_pin("1234")
 
         # Check correct pin
         self.assertTrue(pin.check_pin("1234"), "PIN should match the stored hash")
@@ -21,10 +37,7 @@ class PinModelTest(TestCase):
 
     def test_locked_pin(self):
         """Ensure that a locked PIN cannot be validated unless ignored."""
-        pin = Pin.objects.create(supplier=self.supplier)
-        pin.set_pin("5678")
-        pin.is_locked = True
-        pin.save()
+        pin = self.make_pin("5678", is_locked=True)
 
         # Normal check should fail because it’s locked
         self.assertFalse(pin.check_pin("5678"), "Locked PIN should not validate")
@@ -34,8 +47,197 @@ class PinModelTest(TestCase):
 
     def test_str_representation(self):
         """Ensure that __str__ returns a readable string."""
-        pin = Pin.objects.create(supplier=self.supplier)
-        pin.set_pin("1111")
-        pin.save()
+        pin = self.make_pin("1111")
 
         self.assertEqual(str(pin), f"PIN for {self.supplier.supplier_name}")
+
+    def test_retired_pepper_is_refingerprinted(self):
+        """A PIN fingerprinted under an old pepper is found and moved to the current one."""
+        pin = self.make_pin("2468")
+        Pin.objects.filter(pk=pin.pk).update(pin_lookup=pin_lookup_digest("2468", "old-pepper"))
+
+        self.assertIsNone(Pin.find_by_pin("2468"))
+        with override_settings(PIN_LOOKUP_OLD_PEPPERS=["old-pepper"]):
+            self.assertEqual(Pin.find_by_pin("2468"), pin)
+        pin.refresh_from_db()
+        self.assertEqual(pin.pin_lookup, pin_lookup_digest("2468"))
+
+    def test_reset_pin_lookups(self):
+        """Cleared fingerprints fall back to the scan and are backfilled on login."""
+        pin = self.make_pin("1357")
+        call_command("reset_pin_lookups", "--noinput", stdout=StringIO())
+        pin.refresh_from_db()
+        self.assertIsNone(pin.pin_lookup)
+
+        self.assertEqual(Pin.find_by_pin("1357"), pin)
+        pin.refresh_from_db()
+        self.assertEqual(pin.pin_lookup, pin_lookup_digest("1357"))
+
+
+class VerifyPinViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.supplier = Supplier.objects.create(supplier_name="Test Supplier")
+        self.pin = Pin(supplier=self.supplier)
+        self.pin.set_pin("1234")
+        self.pin.save()
+
+    def test_valid_pin(self):
+        """A correct PIN returns tokens for its supplier."""
+        response = self.client.post("/verify-pin/", {"pin_code": "1234"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["supplier_name"], "Test Supplier")
+        self.assertIn("access_token", response.data)
+        self.assertIn("refresh_token", response.data)
+
+    def test_invalid_pin(self):
+        """An unknown PIN is rejected."""
+        response = self.client.post("/verify-pin/", {"pin_code": "0000"}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_locked_pin(self):
+        """A correct PIN on a locked account is refused."""
+        Pin.objects.filter(pk=self.pin.pk).update(is_locked=True)
+
+        response = self.client.post("/verify-pin/", {"pin_code": "1234"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_missing_pin(self):
+        """pin_code is required."""
+        response = self.client.post("/verify-pin/", {}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_hash_per_login(self):
+        """Login runs exactly one check_password regardless of how many PINs exist."""
+        other = Supplier.objects.create(supplier_name="Other Supplier")
+        Pin.objects.create(
+            supplier=other,
+            pin_code=self.pin.pin_code,
+            pin_lookup=pin_lookup_digest("9999"),
+        )
+
+        with mock.patch("api.models.check_password", return_value=True) as check:
+            response = self.client.post("/verify-pin/", {"pin_code": "1234"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(check.call_count, 1)
+
+    def test_legacy_pin_is_backfilled(self):
+        """PINs stored before pin_lookup existed still log in and gain a fingerprint."""
+        legacy_supplier = Supplier.objects.create(supplier_name="Legacy Supplier")
+        legacy = Pin.objects.create(supplier=legacy_supplier, pin_code=make_password("4321"))
+        Pin.objects.filter(pk=legacy.pk).update(pin_lookup=None)
+
+        response = self.client.post("/verify-pin/", {"pin_code": "4321"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.pin_lookup, pin_lookup_digest("4321"))
+
+
+@override_settings(VERIFY_PIN_IP_RATE="6/15m", VERIFY_PIN_DEVICE_RATE="3/15m", PIN_LOCK_AFTER_FAILURES=4)
+class VerifyPinThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.supplier = Supplier.objects.create(supplier_name="Test Supplier")
+        self.pin = Pin(supplier=self.supplier)
+        self.pin.set_pin("1234")
+        self.pin.save()
+
+    def attempt(self, raw_pin, device="device-a", ip="10.0.0.1"):
+        return self.client.post(
+            "/verify-pin/", {"pin_code": raw_pin}, format="json",
+            HTTP_X_DEVICE_ID=device, REMOTE_ADDR=ip,
+        )
+
+    def test_device_is_throttled_before_hashing(self):
+        """Past the device limit, requests get 429 without any check_password."""
+        for _ in range(3):
+            self.assertEqual(self.attempt("0000").status_code, 401)
+
+        with mock.patch("api.models.check_password") as check:
+            response = self.attempt("1234")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        check.assert_not_called()
+
+        # Another device on the same address still gets through.
+        self.assertEqual(self.attempt("1234", device="device-b").status_code, 200)
+
+    def test_ip_limit_covers_rotating_devices(self):
+        """Changing the device id does not escape the per-IP window."""
+        for n in range(6):
+            self.attempt("0000", device=f"device-{n}")
+        self.assertEqual(self.attempt("1234", device="fresh").status_code, 429)
+        self.assertEqual(self.attempt("1234", device="fresh", ip="10.0.0.2").status_code, 200)
+
+    def test_valid_pin_after_guessing_answers_like_a_wrong_pin(self):
+        """A valid PIN from a client past PIN_LOCK_AFTER_FAILURES is locked and refused as invalid."""
+        for n in range(4):
+            wrong = self.attempt("0000", device=f"device-{n}")
+        response = self.attempt("1234", device="guesser")
+        self.assertEqual((response.status_code, response.json()), (wrong.status_code, wrong.json()))
+
+        self.pin.refresh_from_db()
+        self.assertTrue(self.pin.is_locked)
+        self.assertIsNotNone(self.pin.locked_until)
+
+        # Refused the same way for everyone while the lock lasts.
+        self.assertEqual(self.attempt("1234", ip="10.0.0.9").status_code, 401)
+
+        # Once it runs out, the guessing client only renews it...
+        Pin.objects.filter(pk=self.pin.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.attempt("1234", device="guesser").status_code, 401)
+        self.pin.refresh_from_db()
+        self.assertGreater(self.pin.locked_until, timezone.now())
+
+        # ...while a client with no failures logs in, without clearing it.
+        Pin.objects.filter(pk=self.pin.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.attempt("1234", device="owner", ip="10.0.0.10").status_code, 200)
+        self.pin.refresh_from_db()
+        self.assertTrue(self.pin.is_locked)
+
+        self.pin.unlock()
+        self.assertEqual(self.attempt("1234", device="owner", ip="10.0.0.10").status_code, 200)
+
+    def test_concurrent_failures_all_count(self):
+        """Failures from parallel requests are all counted against the window."""
+        workers = 8
+        ready = threading.Barrier(workers)
+
+        def guess(n):
+            ready.wait()
+            return self.attempt("0000", device=f"device-{n}").status_code
+
+        def find_by_pin(raw_pin):
+            # Threads cannot read this test's transaction; stand in for
+            # the hashing time, during which the requests overlap.
+            time.sleep(0.05)
+
+        with mock.patch.object(Pin, "find_by_pin", side_effect=find_by_pin), \
+                override_settings(VERIFY_PIN_IP_RATE="100/15m"), ThreadPoolExecutor(workers) as executor:
+            statuses = list(executor.map(guess, range(workers)))
+        self.assertEqual(statuses, [401] * workers)
+
+        with override_settings(VERIFY_PIN_IP_RATE="100/15m"):
+            throttle = VerifyPinIPThrottle()
+            throttle.allow_request(RequestFactory().post("/verify-pin/", REMOTE_ADDR="10.0.0.1"), None)
+        self.assertEqual(throttle.failure_count(), workers)
+
+    def test_metrics_count_avoided_work(self):
+        """Throttled attempts are counted and priced at the average verify cost."""
+        from api.throttling import metrics
+
+        for _ in range(5):
+            self.attempt("0000")
+        stats = metrics()
+        self.assertEqual((stats["verified"], stats["failures"], stats["throttled"]), (3, 3, 2))
+        self.assertAlmostEqual(stats["cpu_ms_avoided"], stats["cpu_ms_per_verify"] * 2)
+
+        out = StringIO()
+        call_command("verify_pin_stats", "--reset", stdout=out)
+        self.assertIn("throttled attempts  2", out.getvalue())
+        self.assertEqual(metrics()["verified"], 0)
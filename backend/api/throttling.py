@@ -0,0 +1,186 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import SimpleRateThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def device_fingerprint(request):
+    """
+    Stable id for the client device: the X-Device-Id header the frontend
+    keeps in localStorage, else its user agent and languages. Clients can
+    forge either, which is why the client IP is throttled as well.
+    """
+    device = request.headers.get("X-Device-Id") or "|".join(
+        [request.headers.get("User-Agent", ""), request.headers.get("Accept-Language", "")]
+    )
+    return hashlib.blake2b(device.encode(), digest_size=16).hexdigest()
+
+
+class FailedAttemptThrottle(SimpleRateThrottle):
+    """
+    Sliding-window throttle over failed attempts only, kept in the default
+    cache like DRF's own throttles.
+
+    allow_request() refuses once `rate` failures fall inside the window,
+    before the view runs; views record failures with record_failure()
+    (see FailedAttemptThrottleMixin). Rates read from a Django setting
+    and accept a period multiple, e.g. "5/15m".
+
+    The window is split into `buckets` counters, one cache key each, that
+    record_failure() bumps with cache.add()/cache.incr(). Concurrent
+    failures therefore all count, which a cached list of timestamps
+    written back with cache.set() cannot promise; the window slides a
+    bucket (duration / buckets) at a time.
+    """
+    rate_setting = None
+    buckets = 15
+
+    def get_rate(self):
+        return getattr(settings, self.rate_setting)
+
+    def parse_rate(self, rate):
+        if rate is None:
+            return (None, None)
+        num, period = rate.split("/")
+        multiple, unit = period[:-1], period[-1]
+        if multiple and not multiple.isdigit():
+            # "min", "hour", ...: DRF's own spelling.
+            return super().parse_rate(rate)
+        return (int(num), int(multiple or 1) * PERIODS[unit])
+
+    def bucket_size(self):
+        return self.duration / self.buckets
+
+    def bucket_key(self, bucket):
+        return f"{self.key}:{bucket}"
+
+    def allow_request(self, request, view):
+        self.key = self.get_cache_key(request, view)
+        if self.rate is None or self.key is None:
+            return True
+        self.now = self.timer()
+        current = int(self.now // self.bucket_size())
+        window = range(current - self.buckets + 1, current + 1)
+        values = self.cache.get_many([self.bucket_key(bucket) for bucket in window])
+        self.counts = {bucket: values.get(self.bucket_key(bucket), 0) for bucket in window}
+        if self.failure_count() >= self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def record_failure(self):
+        if self.rate is None or self.key is None:
+            return
+        size = self.bucket_size()
+        key = self.bucket_key(int(self.timer() // size))
+        timeout = self.duration + size
+        if self.cache.add(key, 1, timeout):
+            return
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr().
+            self.cache.set(key, 1, timeout)
+
+    def failure_count(self):
+        return sum(getattr(self, "counts", {}).values())
+
+    def wait(self):
+        """Seconds until the oldest counted bucket leaves the window."""
+        oldest = min(bucket for bucket, failures in self.counts.items() if failures)
+        return max((oldest + self.buckets) * self.bucket_size() - self.now, 0)
+
+
+class VerifyPinIPThrottle(FailedAttemptThrottle):
+    scope = "verify_pin_ip"
+    rate_setting = "VERIFY_PIN_IP_RATE"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class VerifyPinDeviceThrottle(FailedAttemptThrottle):
+    scope = "verify_pin_device"
+    rate_setting = "VERIFY_PIN_DEVICE_RATE"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": device_fingerprint(request)}
+
+
+class FailedAttemptThrottleMixin:
+    """
+    APIView mixin keeping the throttles DRF checked for this request, so
+    the handler can record a failure against the same windows.
+    """
+
+    def get_throttles(self):
+        if not hasattr(self, "_throttles"):
+            self._throttles = super().get_throttles()
+        return self._throttles
+
+    def record_failure(self):
+        for throttle in self.get_throttles():
+            if isinstance(throttle, FailedAttemptThrottle):
+                throttle.record_failure()
+
+    def failure_count(self):
+        """Most failures any of this request's windows already holds."""
+        return max(
+            (t.failure_count() for t in self.get_throttles() if isinstance(t, FailedAttemptThrottle)),
+            default=0,
+        )
+
+
+# ------------------------------------
+#  verify-pin/ metrics               -
+# ------------------------------------
+# Counters live in the default cache, so with a shared backend they cover
+# every worker. `verified` attempts reached Pin.find_by_pin, which spent
+# verify_cpu_us of thread CPU on them; `throttled` ones never did.
+
+METRIC_KEYS = ("verified", "failures", "throttled", "locked", "verify_cpu_us")
+
+
+def metric_key(name):
+    return f"verify_pin_metrics:{name}"
+
+
+def count(name, amount=1):
+    key = metric_key(name)
+    if cache.add(key, amount, timeout=None):
+        return
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # Evicted between add() and incr().
+        cache.set(key, amount, timeout=None)
+
+
+@contextmanager
+def measure_verify_cpu():
+    """Add the thread CPU time of the block to verify_cpu_us."""
+    started = time.thread_time()
+    try:
+        yield
+    finally:
+        count("verify_cpu_us", round((time.thread_time() - started) * 1_000_000))
+
+
+def metrics():
+    """
+    The counters, the average CPU of a verified attempt, and the CPU the
+    throttled attempts would have cost at that average.
+    """
+    values = cache.get_many([metric_key(name) for name in METRIC_KEYS])
+    stats = {name: values.get(metric_key(name), 0) for name in METRIC_KEYS}
+    verified = stats["verified"]
+    stats["cpu_ms_per_verify"] = stats["verify_cpu_us"] / verified / 1000 if verified else 0.0
+    stats["cpu_ms_avoided"] = stats["cpu_ms_per_verify"] * stats["throttled"]
+    return stats
+
+
+def reset_metrics():
+    cache.delete_many([metric_key(name) for name in METRIC_KEYS])
@@ -0,0 +1,140 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+import jwt
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import exceptions
+from .models import Pin, RevokedRefreshToken
+
+REFRESH = "refresh"
+
+
+def issue_supplier_tokens(pin, session=None):
+    """
+    Return (access_token, refresh_token) for the supplier owning `pin`.
+    Refresh tokens carry a type and a unique jti, so they cannot be used
+    as access tokens and can be revoked one by one.
+
+    Both carry the session: `sid`, shared by every token rotated from the
+    same PIN entry, and `auth_time`, when the PIN was entered. A new
+    session starts unless `session` (the claims of the refresh token
+    being rotated) is given. No token outlives auth_time plus
+    PIN_SESSION_DAYS, and `pin_version` ties them to the PIN they were
+    issued for (Pin.token_version).
+    """
+    now = datetime.now(timezone.utc)
+    if session is None:
+        session = {"sid": uuid.uuid4(), "auth_time": int(now.timestamp())}
+    ends = session_end(session)
+    claims = {
+        "supplier_id": str(pin.supplier_id),
+        "pin_id": pin.pk,
+        "pin_version": pin.token_version,
+        "sid": session["sid"].hex,
+        "auth_time": session["auth_time"],
+        "iat": now,
+    }
+    access_token = jwt.encode(
+        {**claims, "exp": min(now + timedelta(minutes=settings.PIN_ACCESS_TOKEN_MINUTES), ends)},
+        settings.SECRET_KEY,
+        algorithm="HS256",
+    )
+    refresh_token = jwt.encode(
+        {
+            **claims,
+            "type": REFRESH,
+            "jti": uuid.uuid4().hex,
+            "exp": min(now + timedelta(days=settings.PIN_REFRESH_TOKEN_DAYS), ends),
+        },
+        settings.SECRET_KEY,
+        algorithm="HS256",
+    )
+    return access_token, refresh_token
+
+
+def session_end(payload):
+    """When the session of a token's claims runs out, however often it is rotated."""
+    return datetime.fromtimestamp(payload["auth_time"], timezone.utc) + timedelta(days=settings.PIN_SESSION_DAYS)
+
+
+def decode_refresh_token(token):
+    """Return the claims of a valid refresh token; raises AuthenticationFailed."""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=["HS256"],
+            options={"require": ["exp", "jti", "pin_id", "pin_version", "sid", "auth_time"]},
+        )
+        payload["jti"] = uuid.UUID(payload["jti"])
+        payload["sid"] = uuid.UUID(payload["sid"])
+        session_end(payload)
+    except jwt.ExpiredSignatureError:
+        raise exceptions.AuthenticationFailed("Refresh token expired")
+    except (jwt.InvalidTokenError, ValueError, TypeError, AttributeError, OverflowError):
+        raise exceptions.AuthenticationFailed("Invalid refresh token")
+    if payload.get("type") != REFRESH:
+        raise exceptions.AuthenticationFailed("Invalid refresh token")
+    return payload
+
+
+def deny(jti, expires_at):
+    """
+    Add an id to the denylist. Returns False when it already was there:
+    the insert is the check, so two concurrent callers cannot both win.
+    """
+    try:
+        with transaction.atomic():
+            RevokedRefreshToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def revoke(payload):
+    """
+    Add the token to the denylist. Returns False when it already was, in
+    which case the token has been used before and must be refused.
+    """
+    return deny(payload["jti"], datetime.fromtimestamp(payload["exp"], timezone.utc))
+
+
+def rotate_refresh_token(token):
+    """
+    Exchange a refresh token for (pin, access_token, refresh_token).
+
+    One signature check, one Pin lookup by primary key, one denylist
+    lookup for the session and one insert into the denylist; no PIN
+    hashing. Raises AuthenticationFailed for a bad, expired, reused or
+    revoked token and PermissionDenied for a locked PIN.
+
+    Presenting a token that was already rotated means it was copied, so
+    the whole session is denylisted: every token rotated from the same
+    PIN entry stops working, whichever holder has the newest one.
+    """
+    payload = decode_refresh_token(token)
+    try:
+        pin = Pin.objects.select_related("supplier").get(pk=payload["pin_id"])
+    except Pin.DoesNotExist:
+        raise exceptions.AuthenticationFailed("Invalid refresh token")
+    if str(pin.supplier_id) != payload.get("supplier_id"):
+        raise exceptions.AuthenticationFailed("Invalid refresh token")
+    if payload["pin_version"] != pin.token_version:
+        # The PIN was changed since the session started.
+        raise exceptions.AuthenticationFailed("Refresh token revoked")
+    if session_end(payload) <= datetime.now(timezone.utc):
+        raise exceptions.AuthenticationFailed("Session expired, enter the PIN again")
+    if pin.lock_active:
+        raise exceptions.PermissionDenied("Account is locked")
+    if RevokedRefreshToken.objects.filter(jti=payload["sid"]).exists():
+        raise exceptions.AuthenticationFailed("Refresh token revoked")
+    if not revoke(payload):
+        deny(payload["sid"], session_end(payload))
+        raise exceptions.AuthenticationFailed("Refresh token already used")
+    return (pin, *issue_supplier_tokens(pin, session=payload))
+
+
+def prune_revoked_tokens():
+    """Forget denylisted tokens that have expired anyway; returns the count."""
+    removed, _ = RevokedRefreshToken.objects.filter(expires_at__lte=datetime.now(timezone.utc)).delete()
+    return removed
@@ -0,0 +1,140 @@
+import bisect
+import hashlib
+import threading
+import time
+import unicodedata
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from .models import Supplier, Vessel
+from .replicas import primary
+
+
+def normalize(text):
+    """Casefold, strip accents and collapse whitespace for matching."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Immutable sorted array of normalized names.
+
+    Whole-name prefix matches come from a bisect range; word-prefix and
+    substring matches fall back to a scan, which is cheap at the size of
+    the vessel and supplier tables.
+    """
+
+    def __init__(self, rows):
+        entries = sorted((normalize(name), name, pk) for pk, name in rows)
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+        # Content hash, so workers holding the same names share ETags.
+        self.fingerprint = hashlib.blake2b(
+            "\n".join(f"{pk}\t{name}" for _, name, pk in entries).encode(), digest_size=16
+        ).hexdigest()
+
+    def search(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return [(pk, name) for _, name, pk in self.entries[:limit]]
+
+        start = bisect.bisect_left(self.keys, query)
+        end = bisect.bisect_left(self.keys, query + "\uffff", lo=start)
+        matches = list(self.entries[start:end])
+
+        if len(matches) < limit:
+            word_prefix, substring = [], []
+            for entry in self.entries[:start] + self.entries[end:]:
+                key = entry[0]
+                position = key.find(query)
+                if position < 0:
+                    continue
+                if key[position - 1] == " ":
+                    word_prefix.append(entry)
+                else:
+                    substring.append(entry)
+            matches.extend(word_prefix)
+            matches.extend(substring)
+
+        return [(pk, name) for _, name, pk in matches[:limit]]
+
+
+class TypeaheadIndex:
+    """
+    Per-process PrefixIndex for one model, built lazily.
+
+    A generation counter in Django's cache is bumped by api.signals on every
+    save/delete; a worker rebuilds its copy when the generation it was built
+    from no longer matches. Only a shared cache backend carries the counter
+    between workers, so a copy is also rebuilt once it is older than
+    TYPEAHEAD_MAX_AGE_SECONDS: with the default per-process locmem cache,
+    that bounds how long other workers serve names from before a change.
+    """
+
+    def __init__(self, model, id_field, name_field):
+        self.model = model
+        self.id_field = id_field
+        self.name_field = name_field
+        self.generation_key = f"typeahead:{model._meta.label_lower}:generation"
+        self._index = None
+        self._generation = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def current_generation(self):
+        generation = cache.get(self.generation_key)
+        if generation is None:
+            # Seed with the clock so an evicted counter never repeats a value.
+            cache.add(self.generation_key, time.time_ns())
+            generation = cache.get(self.generation_key)
+        return generation
+
+    def invalidate(self):
+        try:
+            cache.incr(self.generation_key)
+        except ValueError:
+            cache.add(self.generation_key, time.time_ns())
+
+    def _is_current(self, generation):
+        return (
+            self._index is not None
+            and generation == self._generation
+            and time.monotonic() - self._built_at < settings.TYPEAHEAD_MAX_AGE_SECONDS
+        )
+
+    def get_index(self):
+        generation = self.current_generation()
+        index = self._index
+        if self._is_current(generation):
+            return index
+
+        with self._lock:
+            if not self._is_current(generation):
+                # From the primary: a lagging replica would pin stale names
+                # to the new generation until the next change.
+                with primary():
+                    rows = list(self.model.objects.order_by().values_list(self.id_field, self.name_field))
+                self._index = PrefixIndex(rows)
+                self._generation = generation
+                self._built_at = time.monotonic()
+            return self._index
+
+    async def aget_index(self):
+        """get_index() for async views; a rebuild runs in a worker thread."""
+        generation = await cache.aget(self.generation_key)
+        index = self._index
+        if generation is not None and self._is_current(generation):
+            return index
+        return await sync_to_async(self.get_index)()
+
+    def search(self, query, limit=20):
+        return self.get_index().search(query, limit)
+
+    async def asearch(self, query, limit=20):
+        return (await self.aget_index()).search(query, limit)
+
+
+vessel_index = TypeaheadIndex(Vessel, "vessel_id", "vessel_name")
+supplier_index = TypeaheadIndex(Supplier, "supplier_id", "supplier_name")
@@ -0,0 +1,104 @@
+import hashlib
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+PDF_MAGIC = b"%PDF-"
+# PDF readers accept the header anywhere in the first kilobyte.
+PDF_HEADER_WINDOW = 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Uploaded file is too large."
+    default_code = "upload_too_large"
+
+
+class InvalidPdf(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Uploaded file is not a PDF."
+    default_code = "invalid_pdf"
+
+
+class PdfUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream every uploaded file straight to a temporary file while hashing
+    it, counting its size and checking the PDF header as chunks arrive.
+
+    Oversized or non-PDF uploads stop the upload immediately; the error is
+    left on the request for PdfUploadMixin to raise. Completed files carry
+    a sha256 attribute so PdfBlob.store() does not have to read them again.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.INVOICE_UPLOAD_MAX_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.header = b""
+        self.header_checked = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            self.reject(UploadTooLarge(
+                f"Uploaded file exceeds {self.max_size} bytes."
+            ))
+
+        if not self.header_checked:
+            self.header += raw_data[:PDF_HEADER_WINDOW]
+            if PDF_MAGIC in self.header:
+                self.header_checked = True
+            elif len(self.header) >= PDF_HEADER_WINDOW:
+                self.reject(InvalidPdf())
+
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not self.header_checked:
+            self.reject(InvalidPdf())
+
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.sha256 = self.digest.hexdigest()
+        return uploaded_file
+
+    def reject(self, error):
+        self.request.pdf_upload_error = error
+        self.upload_interrupted()
+        raise StopUpload(connection_reset=True)
+
+
+class PdfUploadMixin:
+    """
+    APIView mixin that parses multipart bodies with PdfUploadHandler and
+    turns its errors, or a Content-Length that is already too large, into
+    error responses before the view runs.
+    """
+
+    def get_upload_limit(self):
+        """Largest request body accepted, excluding multipart overhead."""
+        return settings.INVOICE_UPLOAD_MAX_SIZE
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [PdfUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        # Allow for the multipart framing and the other form fields.
+        limit = self.get_upload_limit() + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > limit:
+            raise UploadTooLarge()
+
+        request.data  # parse now so handler errors surface here
+        error = getattr(request._request, "pdf_upload_error", None)
+        if error is not None:
+            raise error
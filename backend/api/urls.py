@@ -1,6 +1,8 @@
 from django.urls import path
 from .views import (
     VerifyPinView, 
+    RefreshTokenView,
+    RevokeTokenView,
     InvoiceUploadView, 
     CheckInvoiceView, 
     VesselListView,
@@ -8,18 +10,38 @@ from .views import (
     UserLoginView,
     SupplierSearchView,
     AllSupplierInvoicesView,
+    SupplierInvoiceSyncView,
+    AllInvoicesSyncView,
+    InvoiceEventsView,
     StaffInvoiceUploadView,
+    StaffInvoiceBatchUploadView,
+    InvoiceExportView,
+    InvoiceSummaryView,
+    UploadSessionCreateView,
+    UploadSessionView,
+    UploadSessionFinalizeView,
 )
 
 urlpatterns = [
     path('verify-pin/',VerifyPinView.as_view(), name="verify-pin"),
+    path("token/refresh/", RefreshTokenView.as_view(), name="token-refresh"),
+    path("token/revoke/", RevokeTokenView.as_view(), name="token-revoke"),
     path("invoices/upload/", InvoiceUploadView.as_view(), name="invoice-upload"),
+    path("invoices/uploads/", UploadSessionCreateView.as_view(), name="upload-session-create"),
+    path("invoices/uploads/<uuid:upload_id>/", UploadSessionView.as_view(), name="upload-session"),
+    path("invoices/uploads/<uuid:upload_id>/finalize/", UploadSessionFinalizeView.as_view(), name="upload-session-finalize"),
     path("invoices/check-invoice/", CheckInvoiceView.as_view(), name='check-invoice'),
     path("invoices/", SupplierInvoiceListView.as_view(), name='supplier-invoices'),
+    path("invoices/sync/", SupplierInvoiceSyncView.as_view(), name="supplier-invoice-sync"),
+    path("invoices/events/", InvoiceEventsView.as_view(), name="invoice-events"),
     path("vessels/", VesselListView.as_view(), name='vessel-list'),
      path("supplier/", SupplierSearchView.as_view(), name="supplier-search"),
 
     path('user/login/', UserLoginView.as_view()),
     path("user/invoices/", AllSupplierInvoicesView.as_view(), name="all_supplier_invoices"),
      path("user/invoices/upload/", StaffInvoiceUploadView.as_view(), name="all_supplier_invoices"),
+    path("user/invoices/sync/", AllInvoicesSyncView.as_view(), name="invoice-sync"),
+    path("user/invoices/summary/", InvoiceSummaryView.as_view(), name="invoice-summary"),
+    path("user/invoices/export/", InvoiceExportView.as_view(), name="invoice-export"),
+    path("user/invoices/batch/", StaffInvoiceBatchUploadView.as_view(), name="staff-invoice-batch"),
 ]
\ No newline at end of file
@@ -1,30 +1,72 @@
 
+import json
 import jwt
 from datetime import datetime, timedelta, timezone
 from django.contrib.auth import authenticate
 from django.conf import settings
-from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from rest_framework.exceptions import AuthenticationFailed, ParseError, PermissionDenied
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from .models import (
     Pin, 
     Invoice, 
     Vessel, 
-    Supplier
+    Supplier,
+    SupplierMonthlySummary,
+    VesselMonthlySummary,
 )
 from .serializers import ( 
     InvoiceUploadSerializer,
-    InvoiceListSerializer,
+    FastInvoiceListSerializer,
+    InvoiceSyncQuerySerializer,
+    InvoiceBatchItemSerializer,
+    InvoiceExportFilterSerializer,
+    InvoiceSummaryFilterSerializer,
+    SupplierMonthlySummarySerializer,
+    VesselMonthlySummarySerializer,
 )
-from .authentication import JWTAuthentication,UserJWTAuthentication 
+from .authentication import JWTAuthentication,UserJWTAuthentication, aauthenticate_principal
+from .permissions import IsSupplier
+from .pagination import InvoiceCursorPagination
+from .async_views import AsyncAPIView
+from .renderers import FastJSONRenderer
+from .search import search_invoices
+from .typeahead import vessel_index, supplier_index
+from .bloom import invoice_number_filter
+from .events import invoice_event_hub
+from .conditional import conditional_list, conditional_typeahead, INVOICE, VESSEL, SUPPLIER, PDF_PREVIEW
+from .upload_handlers import PdfUploadMixin
+from .replicas import replica_reads
+from .throttling import FailedAttemptThrottleMixin, VerifyPinIPThrottle, VerifyPinDeviceThrottle
+from . import batch, export, resumable, sync, throttling, tokens
 
 
 # ---------------------------
 # Verify PIN and issue tokens
 # ---------------------------
-class VerifyPinView(APIView):
+class VerifyPinView(FailedAttemptThrottleMixin, APIView):
+    # Checked before post() runs, so throttled clients cost no hashing.
+    throttle_classes = [VerifyPinIPThrottle, VerifyPinDeviceThrottle]
+
+    def throttled(self, request, wait):
+        throttling.count("throttled")
+        super().throttled(request, wait)
+
+    def invalid_pin(self):
+        self.record_failure()
+        throttling.count("failures")
+        return Response(
+            {"error": "Invalid PIN"},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
     def post(self, request):
         raw_pin = request.data.get("pin_code")
 
@@ -34,61 +76,104 @@ class VerifyPinView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        for pin in Pin.objects.select_related('supplier').all(): 
-            if pin.check_pin(raw_pin, ignore_lock=True):
-                if pin.is_locked:
-                    return Response(
-                        {"message": "Account is locked"},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-
-                try:
-                    supplier_id = str(pin.supplier.supplier_id)
-
-                    payload = {
-                        "supplier_id": supplier_id,
-                        "pin_id": pin.pk,
-                        "exp": datetime.now(timezone.utc) + timedelta(minutes=30),
-                        "iat": datetime.now(timezone.utc)
-                    }
-                    access_token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
-
-                    refresh_payload = {
-                        "supplier_id": supplier_id,
-                        "pin_id": pin.pk,
-                        "exp": datetime.now(timezone.utc) + timedelta(days=7),
-                        "iat": datetime.now(timezone.utc)
-                    }
-                    refresh_token = jwt.encode(refresh_payload, settings.SECRET_KEY, algorithm="HS256")
-                except Exception as e:
-                    return Response(
-                        {"error": f"Token generation failed: {str(e)}"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-
-                return Response({
-                    "message": "PIN verified successfully",
-                    "supplier_id": pin.supplier.supplier_id,
-                    "supplier_name": pin.supplier.supplier_name,
-                    "access_token": access_token,
-                    "refresh_token": refresh_token,
-                }, status=status.HTTP_200_OK)
+        throttling.count("verified")
+        with throttling.measure_verify_cpu():
+            pin = Pin.find_by_pin(raw_pin)
+        if pin is None:
+            return self.invalid_pin()
+
+        # A timed lock is only ever set here, when a client that had been
+        # guessing found the PIN. Once it runs out the PIN stays marked,
+        # and only a client with no failures in its windows may log in
+        # with it until an admin unlocks it.
+        guessed = pin.is_locked and pin.locked_until is not None
+        failures = self.failure_count()
+        if failures >= settings.PIN_LOCK_AFTER_FAILURES or (guessed and (pin.lock_active or failures)):
+            if not pin.lock_active:
+                pin.lock(timedelta(minutes=settings.PIN_LOCK_MINUTES))
+                throttling.count("locked")
+            # Answered like a wrong PIN, so the guess is not confirmed.
+            return self.invalid_pin()
+
+        if pin.lock_active:
+            return Response(
+                {"message": "Account is locked"},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-        return Response(
-            {"error": "Invalid PIN"},
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+        try:
+            access_token, refresh_token = tokens.issue_supplier_tokens(pin)
+        except Exception as e:
+            return Response(
+                {"error": f"Token generation failed: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({
+            "message": "PIN verified successfully",
+            "supplier_id": pin.supplier.supplier_id,
+            "supplier_name": pin.supplier.supplier_name,
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+        }, status=status.HTTP_200_OK)
+
+# ---------------------------
+# Refresh and revoke tokens
+# ---------------------------
+class RefreshTokenView(APIView):
+    """
+    Exchange a supplier refresh token for a new access and refresh token,
+    without re-entering the PIN. The old refresh token is denylisted, so
+    each one works once.
+    """
+    authentication_classes = []
+
+    def post(self, request):
+        refresh_token = request.data.get("refresh_token")
+        if not refresh_token:
+            return Response(
+                {"error": "refresh_token is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            pin, access_token, refresh_token = tokens.rotate_refresh_token(refresh_token)
+        except AuthenticationFailed as e:
+            return Response({"error": e.detail}, status=status.HTTP_401_UNAUTHORIZED)
+        except PermissionDenied:
+            return Response(
+                {"message": "Account is locked"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response({
+            "supplier_id": pin.supplier.supplier_id,
+            "supplier_name": pin.supplier.supplier_name,
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+        }, status=status.HTTP_200_OK)
+
+
+class RevokeTokenView(APIView):
+    """Denylist a refresh token on logout. Invalid or expired tokens are ignored."""
+    authentication_classes = []
+
+    def post(self, request):
+        try:
+            tokens.revoke(tokens.decode_refresh_token(request.data.get("refresh_token") or ""))
+        except AuthenticationFailed:
+            pass
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 # ---------------------------
 # Invoice Upload Endpoint
 # ---------------------------
-class InvoiceUploadView(APIView):
+class InvoiceUploadView(PdfUploadMixin, APIView):
     authentication_classes = [JWTAuthentication]   # ✅ now imported from authentication.py
     parser_classes = [MultiPartParser, FormParser] # ✅ handle file uploads
 
     def post(self, request):
         supplier = request.user   # ✅ supplier is set by JWTAuthentication
-        data = request.data.copy()
+        data = request.data.dict()  # shallow, the uploaded file is not copied
         data["supplier"] = supplier.supplier_id     # link invoice to supplier
 
         serializer = InvoiceUploadSerializer(data=data)
@@ -100,108 +185,372 @@ class InvoiceUploadView(APIView):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+# ---------------------------
+# Resumable Invoice Upload
+# ---------------------------
+class UploadSessionCreateView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsSupplier]
+
+    def post(self, request):
+        try:
+            total_size = int(request.data.get("total_size"))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "total_size is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        session = resumable.create_session(
+            request.user,
+            request.data.get("filename", ""),
+            total_size,
+            request.data.get("sha256", ""),
+        )
+        return Response(
+            self.describe(session),
+            status=status.HTTP_201_CREATED
+        )
+
+    @staticmethod
+    def describe(session):
+        return {
+            "upload_id": session.upload_id,
+            "received_size": session.received_size,
+            "total_size": session.total_size,
+            "chunk_size": settings.RESUMABLE_UPLOAD_CHUNK_SIZE,
+            "expires_at": session.expires_at,
+        }
+
+
+class UploadSessionView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsSupplier]
+
+    def get(self, request, upload_id):
+        session = resumable.get_session(request.user, upload_id)
+        return Response(UploadSessionCreateView.describe(session), status=status.HTTP_200_OK)
+
+    def put(self, request, upload_id):
+        # The row lock makes a concurrent PUT at the same offset wait and
+        # then see the moved offset, instead of both writing the range.
+        with transaction.atomic():
+            session = resumable.get_session(request.user, upload_id, lock=True)
+            start, end = resumable.parse_content_range(request.headers.get("Content-Range"), session)
+            resumable.write_chunk(
+                session, start, end, request.stream, request.headers.get("X-Chunk-SHA256")
+            )
+        return Response(UploadSessionCreateView.describe(session), status=status.HTTP_200_OK)
+
+
+class UploadSessionFinalizeView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsSupplier]
+
+    def post(self, request, upload_id):
+        # As for chunks: a double-submitted finalize waits on the row lock,
+        # then finds the session gone (404) instead of saving it twice.
+        with transaction.atomic():
+            session = resumable.get_session(request.user, upload_id, lock=True)
+            pdf_file = resumable.assembled_file(session)
+
+            data = dict(request.data.items())
+            data["supplier"] = request.user.supplier_id
+            data["pdf_file"] = pdf_file
+            try:
+                serializer = InvoiceUploadSerializer(data=data)
+                if not serializer.is_valid():
+                    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+                serializer.save()
+            finally:
+                pdf_file.close()
+
+            session.discard()
+        return Response(
+            {"message": "Invoice uploaded successfully", "invoice": serializer.data},
+            status=status.HTTP_201_CREATED
+        )
+
 # ---------------------------
 # Check Invoice Existence
 # ---------------------------
-class CheckInvoiceView(APIView):
+class CheckInvoiceView(AsyncAPIView):
+    """
+    GET ?invoice_number=... checks one number. POST {"invoice_numbers": [...]}
+    checks many and returns {"results": [{"invoice_number", "exists"}]} in
+    request order. Both go through api.bloom, so free numbers are usually
+    answered without a query and the rest share one IN query, on the
+    primary: a lagging replica would call a just-taken number free.
+    """
     authentication_classes = [UserJWTAuthentication]
 
-    def get(self, request):
-        invoice_number = request.query_params.get("invoice_number")
+    async def get(self, request):
+        invoice_number = request.GET.get("invoice_number")
 
         if not invoice_number:
-            return Response(
+            return self.render(
                 {"error": "invoice_number is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        exists = Invoice.objects.filter(invoice_number=invoice_number).exists()
+        exists = bool(await invoice_number_filter.aexisting([invoice_number]))
 
         if exists:
-            return Response(
+            return self.render(
                 {"exists": True, "message": "Invoice already exists"},
                 status=status.HTTP_200_OK
             )
         else:
-            return Response(
+            return self.render(
                 {"exists": False, "message": "Invoice number is available"},
                 status=status.HTTP_200_OK
             )
-        
+
+    async def post(self, request):
+        data = self.get_json(request)
+        numbers = data.get("invoice_numbers") if isinstance(data, dict) else None
+
+        if not isinstance(numbers, list) or not all(isinstance(number, str) and number for number in numbers):
+            return self.render(
+                {"error": "invoice_numbers must be a list of invoice numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(numbers) > settings.INVOICE_CHECK_MAX_NUMBERS:
+            return self.render(
+                {"error": f"At most {settings.INVOICE_CHECK_MAX_NUMBERS} invoice numbers per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        taken = await invoice_number_filter.aexisting(numbers)
+        results = [{"invoice_number": number, "exists": number in taken} for number in numbers]
+        return self.render({"results": results}, status=status.HTTP_200_OK)
+
 # ---------------------------
 # Vessel List Endpoint
 # ---------------------------
-class VesselListView(APIView):
+class VesselListView(AsyncAPIView):
     authentication_classes = [UserJWTAuthentication]  
 
-    def get(self, request):
-        search = request.query_params.get("search", "").strip()
-        vessels = Vessel.objects.all().order_by("vessel_name")
-        
-        if search:
-            vessels = vessels.filter(Q(vessel_name__icontains=search))
-        
-        vessels = vessels[:20]
+    @conditional_typeahead(vessel_index)
+    async def get(self, request):
+        search = request.GET.get("search", "").strip()
+
         data = [
-            {"vessel_id": v.vessel_id, "vessel_name": v.vessel_name}
-            for v in vessels
+            {"vessel_id": vessel_id, "vessel_name": vessel_name}
+            for vessel_id, vessel_name in await vessel_index.asearch(search, limit=20)
         ]
-        return Response(data, status=status.HTTP_200_OK)
+        return self.render(data, status=status.HTTP_200_OK)
 
 # ---------------------------
 # View Supplier
 # ---------------------------
 
-class SupplierSearchView(APIView):
+class SupplierSearchView(AsyncAPIView):
     authentication_classes = [UserJWTAuthentication]
 
-    def get(self, request):
-        search = request.query_params.get("search", "").strip()
+    @conditional_typeahead(supplier_index)
+    async def get(self, request):
+        search = request.GET.get("search", "").strip()
 
         if not search:
-            return Response([], status=status.HTTP_200_OK)
+            return self.render([], status=status.HTTP_200_OK)
 
-        suppliers = Supplier.objects.filter(supplier_name__icontains=search)[:20]
         data = [
-            {"supplier_id": s.supplier_id, "supplier_name": s.supplier_name}
-            for s in suppliers
+            {"supplier_id": supplier_id, "supplier_name": supplier_name}
+            for supplier_id, supplier_name in await supplier_index.asearch(search, limit=20)
         ]
-        return Response(data, status=status.HTTP_200_OK)
+        return self.render(data, status=status.HTTP_200_OK)
    
 # ----------------------------------
 # - List all invoices by supplier  -
 # ----------------------------------
-class SupplierInvoiceListView(APIView):
+class SupplierInvoiceListView(AsyncAPIView):
     authentication_classes = [JWTAuthentication]
+    permission_classes = [IsSupplier]
 
-    def get(self, request):
+    @conditional_list(INVOICE, VESSEL, PDF_PREVIEW, per_user=True)
+    async def get(self, request):
         supplier = request.user  # ✅ JWTAuthentication sets this to the Supplier instance
-        invoices = Invoice.objects.filter(supplier=supplier).order_by('-date_created')
+        invoices = FastInvoiceListSerializer.values(Invoice.objects.filter(supplier=supplier))
 
-        serializer = InvoiceListSerializer(invoices, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = InvoiceCursorPagination()
+        page = await paginator.apaginate_queryset(invoices, request, view=self)
+        return self.render(paginator.get_paginated_data(FastInvoiceListSerializer().to_representation(page)))
     
 # ----------------------------------
 # -     List all invoices          -
 # ----------------------------------
 
-class AllSupplierInvoicesView(APIView):
+class AllSupplierInvoicesView(AsyncAPIView):
     authentication_classes = [UserJWTAuthentication]
 
-    def get(self,request):
+    @replica_reads
+    @conditional_list(INVOICE, VESSEL, SUPPLIER, PDF_PREVIEW)
+    async def get(self,request):
         
-        search = request.query_params.get("search", "").strip()
-        invoices = Invoice.objects.select_related("supplier", "vessel").order_by("-date_created")
+        search = request.GET.get("search", "").strip()
+        invoices = Invoice.objects.all()
 
+        rank_field = None
         if search:
-            invoices = invoices.filter(
-                Q(supplier__supplier_name__icontains=search)
-                | Q(vessel__vessel_name__icontains=search)
-                | Q(invoice_number__icontains=search)
+            invoices = search_invoices(invoices, search)
+            rank_field = "search_rank"
+        invoices = FastInvoiceListSerializer.values(invoices, *filter(None, [rank_field]))
+
+        paginator = InvoiceCursorPagination(rank_field=rank_field)
+        page = await paginator.apaginate_queryset(invoices, request, view=self)
+        return self.render(paginator.get_paginated_data(FastInvoiceListSerializer().to_representation(page)))
+
+
+# ----------------------------------
+# -     Invoice change feed        -
+# ----------------------------------
+
+class InvoiceSyncMixin:
+    """
+    GET ?cursor=<n> returns the invoices created, updated (upserts) or
+    deleted (deletes) since that cursor plus the cursor to send next.
+    Without a cursor only the current cursor is returned: take it before
+    loading the full list so nothing falls between the two.
+    """
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get_supplier_id(self, request):
+        return None
+
+    def get(self, request):
+        params = InvoiceSyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        cursor = params.validated_data.get("cursor")
+
+        if cursor is None:
+            return Response({"cursor": str(sync.latest_cursor()), "has_more": False, "upserts": [], "deletes": []})
+        if not sync.is_known_cursor(cursor):
+            return Response(
+                {"detail": "Cursor has expired; reload the invoice list."},
+                status=status.HTTP_410_GONE,
             )
+        return Response(sync.read_changes(cursor, supplier_id=self.get_supplier_id(request)))
 
-        serializer = InvoiceListSerializer(invoices, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class SupplierInvoiceSyncView(InvoiceSyncMixin, APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsSupplier]
+
+    def get_supplier_id(self, request):
+        return request.user.supplier_id
+
+
+class AllInvoicesSyncView(InvoiceSyncMixin, APIView):
+    authentication_classes = [UserJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+
+# ----------------------------------
+# -     Invoice event stream       -
+# ----------------------------------
+
+class InvoiceEventsView(View):
+    """
+    Server-sent events for invoice changes: invoice-created,
+    invoice-updated and invoice-deleted with the invoice list row, plus
+    resync when events were dropped. Staff tokens receive every invoice,
+    supplier tokens their own. The stream ends when the token expires.
+
+    Async, so an open stream holds no worker thread; serve with ASGI.
+    """
+
+    async def get(self, request):
+        try:
+            principal, expires_at = await aauthenticate_principal(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": e.detail}, status=status.HTTP_401_UNAUTHORIZED)
+        if principal is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        supplier_id = principal.supplier_id if isinstance(principal, Supplier) else None
+        response = StreamingHttpResponse(
+            invoice_event_hub.stream(supplier_id, expires_at, resync="Last-Event-ID" in request.headers),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # Keep nginx from buffering the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+# ----------------------------------
+# -     Export invoices            -
+# ----------------------------------
+
+class InvoiceExportView(APIView):
+    """
+    Stream every matching invoice as CSV or NDJSON for accounting.
+    Rows come from keyset batches of values_list, so memory stays flat
+    however many invoices match.
+    """
+    authentication_classes = [UserJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        filters = InvoiceExportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = dict(filters.validated_data)
+        output = params.pop("output")
+
+        invoices = export.export_queryset(**params)
+        # Each server streams only its own kind of iterator; the other one
+        # would be read whole before the first byte is sent.
+        export_lines = export.aexport_lines if isinstance(request._request, ASGIRequest) else export.export_lines
+        response = StreamingHttpResponse(
+            export_lines(invoices, output, chunk_size=settings.INVOICE_EXPORT_CHUNK_SIZE),
+            content_type=export.EXPORT_FORMATS[output],
+        )
+        period = "-".join(str(params[key]) for key in ("date_from", "date_to") if key in params)
+        filename = f"invoices-{period}.{output}" if period else f"invoices.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+# ----------------------------------
+# -     Invoice summaries          -
+# ----------------------------------
+
+class InvoiceSummaryView(APIView):
+    """
+    Invoice count and amount_due total per vessel (or supplier) and month,
+    read from the summary tables maintained by api.summaries.
+    """
+    authentication_classes = [UserJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @conditional_list(INVOICE, VESSEL, SUPPLIER)
+    def get(self, request):
+        filters = InvoiceSummaryFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        if params["group"] == "supplier":
+            rows = SupplierMonthlySummary.objects.select_related("supplier").order_by("-month", "supplier__supplier_name")
+            serializer_class = SupplierMonthlySummarySerializer
+        else:
+            rows = VesselMonthlySummary.objects.select_related("vessel").order_by("-month", "vessel__vessel_name")
+            serializer_class = VesselMonthlySummarySerializer
+
+        rows = rows.filter(invoice_count__gt=0)
+        if "month_from" in params:
+            rows = rows.filter(month__gte=params["month_from"])
+        if "month_to" in params:
+            rows = rows.filter(month__lte=params["month_to"])
+        if "supplier" in params:
+            rows = rows.filter(supplier_id=params["supplier"])
+        if "vessel" in params:
+            rows = rows.filter(vessel_id=params["vessel"])
+
+        return Response(serializer_class(rows, many=True).data, status=status.HTTP_200_OK)
 
 
 # --------------------------------
@@ -263,7 +612,7 @@ class UserLoginView(APIView):
 # -      User submitted invoice      -
 # ------------------------------------
 
-class StaffInvoiceUploadView(APIView):
+class StaffInvoiceUploadView(PdfUploadMixin, APIView):
     authentication_classes = [UserJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
@@ -287,5 +636,89 @@ class StaffInvoiceUploadView(APIView):
         if serializer.is_valid():
             serializer.save(supplier=supplier, vessel=vessel)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)    
-    
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# ------------------------------------
+# -   User submitted invoice batch   -
+# ------------------------------------
+class StaffInvoiceBatchUploadView(PdfUploadMixin, APIView):
+    """
+    Create many invoices from one multipart request.
+
+    "invoices" is a JSON list of invoice objects; an item's "pdf_file" names
+    the multipart field holding its PDF. The batch is all-or-nothing: any
+    invalid item returns 400 and nothing is created. Either way "results"
+    has one entry per item, in request order.
+    """
+    authentication_classes = [UserJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_upload_limit(self):
+        return settings.INVOICE_BATCH_MAX_SIZE
+
+    def post(self, request):
+        try:
+            entries = json.loads(request.data.get("invoices") or "null")
+        except ValueError:
+            entries = None
+        if not isinstance(entries, list) or not entries:
+            raise ParseError('"invoices" must be a non-empty JSON list.')
+        if len(entries) > settings.INVOICE_BATCH_MAX_ITEMS:
+            raise ParseError(f"A batch may hold at most {settings.INVOICE_BATCH_MAX_ITEMS} invoices.")
+
+        items, errors = [], []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                items.append(None)
+                errors.append({"non_field_errors": ["Expected an invoice object."]})
+                continue
+
+            data = dict(entry)
+            file_field = data.pop("pdf_file", None)
+            if file_field:
+                data["pdf_file"] = request.FILES.get(str(file_field))
+                if data["pdf_file"] is None:
+                    items.append(None)
+                    errors.append({"pdf_file": [f'No file was sent in field "{file_field}".']})
+                    continue
+
+            serializer = InvoiceBatchItemSerializer(data=data)
+            if serializer.is_valid():
+                items.append(dict(serializer.validated_data))
+                errors.append({})
+            else:
+                items.append(None)
+                errors.append(serializer.errors)
+
+        valid = [(index, item) for index, item in enumerate(items) if item is not None]
+        for (index, _), item_errors in zip(valid, batch.validate_batch([item for _, item in valid])):
+            errors[index] = item_errors
+
+        if any(errors):
+            results = [
+                {"index": index, "status": "invalid", "errors": item_errors}
+                if item_errors else {"index": index, "status": "valid"}
+                for index, item_errors in enumerate(errors)
+            ]
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            invoices = batch.create_invoice_batch(items)
+        except IntegrityError:
+            # Another request took one of the invoice numbers since validation.
+            return Response(
+                {"detail": "An invoice number in this batch was submitted concurrently."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        results = [
+            {
+                "index": index,
+                "status": "created",
+                "invoice_id": invoice.invoice_id,
+                "invoice_number": invoice.invoice_number,
+            }
+            for index, invoice in enumerate(invoices)
+        ]
+        return Response({"results": results}, status=status.HTTP_201_CREATED)
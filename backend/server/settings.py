@@ -3,6 +3,7 @@ import os
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -14,6 +15,17 @@ load_dotenv(BASE_DIR / ".env")
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('SECRET_KEY') 
 
+# Server-side pepper for Pin.pin_lookup fingerprints. Required, and kept
+# apart from SECRET_KEY so rotating that key does not lock out suppliers.
+# To rotate the pepper, move the old value to PIN_LOOKUP_OLD_PEPPERS
+# (comma separated): PINs are still found under it and re-fingerprinted
+# with the new one on their next login. If an old pepper is lost, run
+# `manage.py reset_pin_lookups` instead.
+PIN_LOOKUP_PEPPER = os.getenv('PIN_LOOKUP_PEPPER')
+if not PIN_LOOKUP_PEPPER:
+    raise ImproperlyConfigured("PIN_LOOKUP_PEPPER must be set (and differ from SECRET_KEY)")
+PIN_LOOKUP_OLD_PEPPERS = [pepper for pepper in os.getenv('PIN_LOOKUP_OLD_PEPPERS', '').split(',') if pepper]
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "yes")
 
@@ -47,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.replicas.StickyPrimaryMiddleware',
 
 ]
 
@@ -69,17 +82,53 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'server.wsgi.application'
 
+# Connection pooling (api.backends.mysql): each worker process shares
+# DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections between its threads instead
+# of connecting per request. Connections idle for DB_POOL_MAX_IDLE seconds
+# are closed, checkouts wait up to DB_POOL_TIMEOUT seconds for a free one,
+# and each is pinged before reuse. DB_POOL=false connects per request, or
+# keeps a connection per thread for DB_CONN_MAX_AGE seconds.
+DB_POOL = os.getenv('DB_POOL', 'True').lower() in ('true', '1', 'yes')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'api.backends.mysql',
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT':  os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 20)),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+                # Log pool stats (waits, churn) this often; 0 disables.
+                'stats_interval': float(os.getenv('DB_POOL_STATS_SECONDS', 0)),
+            },
+        } if DB_POOL else {},
     }
 }
 
+# Read replicas (api.replicas): DB_REPLICA_HOSTS="10.0.0.5,10.0.0.6" adds
+# replica_1, replica_2, ... with the primary's credentials. List and search
+# views read from them; a client that wrote reads the primary for
+# DB_STICKY_PRIMARY_SECONDS, to outlast replication lag.
+DATABASE_REPLICAS = []
+for _number, _host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica_{_number}'] = {
+        **DATABASES['default'],
+        'HOST': _host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_number}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+DB_STICKY_PRIMARY_SECONDS = int(os.getenv('DB_STICKY_PRIMARY_SECONDS', 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,14 +174,88 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ]
+    ],
+    # Reverse proxies in front of the app; throttles take the client IP
+    # from X-Forwarded-For only behind this many (0: REMOTE_ADDR).
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
 }
 
+# Default cache: throttling windows, verify-pin metrics (api.throttling) and
+# the typeahead index generations (api.typeahead). locmem is per process;
+# point CACHE_BACKEND / CACHE_LOCATION at a shared backend in production,
+# e.g. django.core.cache.backends.redis.RedisCache.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Oldest a worker's vessel/supplier typeahead index may get before it is
+# rebuilt. Without a shared cache, a rename or new vessel reaches the
+# other workers only through this.
+TYPEAHEAD_MAX_AGE_SECONDS = float(os.getenv("TYPEAHEAD_MAX_AGE_SECONDS", 60))
+
+# verify-pin/ brute-force protection: failed attempts allowed per client IP
+# and per device in a sliding window ("<count>/<n><s|m|h|d>"), and the
+# timed lock put on a valid PIN found by a client with this many failures.
+# Keep PIN_LOCK_AFTER_FAILURES below the device count, or a single device
+# is throttled before it can ever trigger the lock.
+VERIFY_PIN_IP_RATE = os.getenv("VERIFY_PIN_IP_RATE", "30/15m")
+VERIFY_PIN_DEVICE_RATE = os.getenv("VERIFY_PIN_DEVICE_RATE", "10/15m")
+PIN_LOCK_AFTER_FAILURES = int(os.getenv("PIN_LOCK_AFTER_FAILURES", 5))
+PIN_LOCK_MINUTES = int(os.getenv("PIN_LOCK_MINUTES", 30))
+
+# Supplier tokens issued by verify-pin/ and token/refresh/ (api.tokens).
+# Denylisted refresh tokens are kept until they expire; run
+# prune_revoked_tokens daily to drop them after that.
+PIN_ACCESS_TOKEN_MINUTES = int(os.getenv("PIN_ACCESS_TOKEN_MINUTES", 30))
+PIN_REFRESH_TOKEN_DAYS = int(os.getenv("PIN_REFRESH_TOKEN_DAYS", 7))
+# Rotating refresh tokens never extends a session past this many days
+# after the PIN was entered.
+PIN_SESSION_DAYS = int(os.getenv("PIN_SESSION_DAYS", 30))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(hours=12),
 }
 
+# Per-process caches used by api.authentication (seconds / entries)
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 60))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 4096))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", 2048))
+
+# Invoice list pagination (api.pagination.InvoiceCursorPagination)
+INVOICE_PAGE_SIZE = int(os.getenv("INVOICE_PAGE_SIZE", 50))
+INVOICE_MAX_PAGE_SIZE = int(os.getenv("INVOICE_MAX_PAGE_SIZE", 200))
+
+# Staff invoice search (api.search); extra words beyond this are ignored
+INVOICE_SEARCH_MAX_TERMS = int(os.getenv("INVOICE_SEARCH_MAX_TERMS", 5))
+
+# Rows fetched per keyset query by invoice exports (api.export)
+INVOICE_EXPORT_CHUNK_SIZE = int(os.getenv("INVOICE_EXPORT_CHUNK_SIZE", 2000))
+
+# Invoice-number availability checks (api.bloom)
+INVOICE_CHECK_MAX_NUMBERS = int(os.getenv("INVOICE_CHECK_MAX_NUMBERS", 500))
+INVOICE_BLOOM_ERROR_RATE = float(os.getenv("INVOICE_BLOOM_ERROR_RATE", 0.01))
+INVOICE_BLOOM_SYNC_SECONDS = int(os.getenv("INVOICE_BLOOM_SYNC_SECONDS", 2))
+INVOICE_BLOOM_REBUILD_SECONDS = int(os.getenv("INVOICE_BLOOM_REBUILD_SECONDS", 3600))
+
+# Invoice change feed (api.sync). Changes younger than the settle window
+# are sent but not yet acknowledged by the cursor, so rows from a slower
+# concurrent transaction that commits later are not skipped.
+INVOICE_SYNC_PAGE_SIZE = int(os.getenv("INVOICE_SYNC_PAGE_SIZE", 500))
+INVOICE_SYNC_SETTLE_SECONDS = int(os.getenv("INVOICE_SYNC_SETTLE_SECONDS", 5))
+INVOICE_SYNC_RETENTION_DAYS = int(os.getenv("INVOICE_SYNC_RETENTION_DAYS", 30))
+
+# Server-sent invoice events (invoices/events/, api.events). Each open
+# stream buffers at most INVOICE_EVENTS_QUEUE_SIZE events before it is
+# told to resync from the feed above.
+INVOICE_EVENTS_POLL_SECONDS = float(os.getenv("INVOICE_EVENTS_POLL_SECONDS", 2))
+INVOICE_EVENTS_QUEUE_SIZE = int(os.getenv("INVOICE_EVENTS_QUEUE_SIZE", 100))
+INVOICE_EVENTS_KEEPALIVE_SECONDS = int(os.getenv("INVOICE_EVENTS_KEEPALIVE_SECONDS", 15))
+INVOICE_EVENTS_RETRY_MS = int(os.getenv("INVOICE_EVENTS_RETRY_MS", 5000))
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # Vite dev server
 ]
@@ -167,5 +290,23 @@ CORS_ALLOWED_ORIGINS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("DATA_UPLOAD_MAX_MEMORY_SIZE", 52428800))
-FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", 52428800))
\ No newline at end of file
+# Non-file form data and in-memory file uploads stay small; invoice PDFs
+# are streamed to disk by api.upload_handlers.PdfUploadHandler.
+DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("DATA_UPLOAD_MAX_MEMORY_SIZE", 2621440))
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", 2621440))
+INVOICE_UPLOAD_MAX_SIZE = int(os.getenv("INVOICE_UPLOAD_MAX_SIZE", 52428800))
+
+# Staff batch submission (user/invoices/batch/). Django refuses more than
+# DATA_UPLOAD_MAX_NUMBER_FILES (100) files per request.
+INVOICE_BATCH_MAX_ITEMS = int(os.getenv("INVOICE_BATCH_MAX_ITEMS", 100))
+INVOICE_BATCH_MAX_SIZE = int(os.getenv("INVOICE_BATCH_MAX_SIZE", 209715200))
+
+# Resumable invoice uploads (invoices/uploads/)
+RESUMABLE_UPLOAD_DIR = os.getenv("RESUMABLE_UPLOAD_DIR", str(BASE_DIR / "upload_sessions"))
+RESUMABLE_UPLOAD_CHUNK_SIZE = int(os.getenv("RESUMABLE_UPLOAD_CHUNK_SIZE", 1048576))
+RESUMABLE_UPLOAD_TTL_HOURS = int(os.getenv("RESUMABLE_UPLOAD_TTL_HOURS", 24))
+
+# PDF post-processing (manage.py process_pdfs)
+PDF_THUMBNAIL_WIDTH = int(os.getenv("PDF_THUMBNAIL_WIDTH", 320))
+PDF_TEXT_MAX_CHARS = int(os.getenv("PDF_TEXT_MAX_CHARS", 100000))
+PDF_PROCESSING_MAX_ATTEMPTS = int(os.getenv("PDF_PROCESSING_MAX_ATTEMPTS", 3))
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""
+Settings for running the tests on SQLite instead of MariaDB:
+
+    python manage.py test --settings=server.test_settings
+
+"replica" is a second, separate database that is not replicated to, so
+api.tests.test_replicas can tell from the rows it returns which database
+a view read. It is only used by tests that list it in DATABASE_REPLICAS.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_default.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_replica.sqlite3",
+    },
+}
+DATABASE_REPLICAS = []
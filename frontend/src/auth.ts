@@ -0,0 +1,43 @@
+// Supplier session tokens. The access token lasts 30 minutes; before it
+// runs out the dashboard trades the refresh token for a new pair at
+// token/refresh/ instead of asking for the PIN again. Each refresh token
+// works once, so the new one must replace it.
+const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
+
+export interface SupplierTokens {
+  access_token: string;
+  refresh_token: string;
+}
+
+// Returns null when the session cannot be renewed (expired, reused or
+// revoked token, or locked PIN) and the supplier must log in again.
+export async function refreshSupplierTokens(): Promise<SupplierTokens | null> {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return null;
+
+  const res = await fetch(`${API_BASE_URL}/token/refresh/`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  });
+  if (!res.ok) return null;
+
+  const data: SupplierTokens = await res.json();
+  localStorage.setItem("access_token", data.access_token);
+  localStorage.setItem("refresh_token", data.refresh_token);
+  return data;
+}
+
+export async function revokeRefreshToken(): Promise<void> {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return;
+  try {
+    await fetch(`${API_BASE_URL}/token/revoke/`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    });
+  } catch (err) {
+    console.error("Failed to revoke refresh token:", err);
+  }
+}
@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from "react";
 import { ToastContainer, toast } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
 import styles from "../styles/Dashboard.module.css";
+import { uploadInvoiceResumable } from "../resumableUpload";
 
 interface SubmitInvoiceProps {
   supplierId: string | null;
@@ -285,22 +286,37 @@ export default function SubmitInvoice({
     setIsSubmitting(true);
 
     try {
-      const formData = new FormData();
-      formData.append("supplier_id", supplierId ?? "");
-      formData.append("submitted_date", invoiceDate);
-      formData.append("vessel", selectedVesselId);
-      formData.append("invoice_number", invoiceNumber);
-      formData.append("description", description);
-      formData.append("amount_due", rawAmount.toString());
-      if (attachment) formData.append("pdf_file", attachment);
-
-      const response = await fetch(`${API_BASE_URL}/invoices/upload/`, {
-        method: "POST",
-        headers: {
-          Authorization: `Bearer ${accessToken}`,
-        },
-        body: formData,
-      });
+      const fields: Record<string, string> = {
+        submitted_date: invoiceDate,
+        vessel: selectedVesselId,
+        invoice_number: invoiceNumber,
+        description: description,
+        amount_due: rawAmount.toString(),
+      };
+
+      let response: Response;
+      if (attachment && window.crypto?.subtle) {
+        // Chunked + resumable so a dropped connection does not restart the PDF.
+        response = await uploadInvoiceResumable(
+          API_BASE_URL,
+          accessToken ?? "",
+          attachment,
+          fields
+        );
+      } else {
+        const formData = new FormData();
+        formData.append("supplier_id", supplierId ?? "");
+        Object.entries(fields).forEach(([key, value]) => formData.append(key, value));
+        if (attachment) formData.append("pdf_file", attachment);
+
+        response = await fetch(`${API_BASE_URL}/invoices/upload/`, {
+          method: "POST",
+          headers: {
+            Authorization: `Bearer ${accessToken}`,
+          },
+          body: formData,
+        });
+      }
 
       if (!response.ok) {
         const errorText = await response.text();
@@ -1,5 +1,6 @@
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useRef, useState } from "react";
 import styles from "../styles/Dashboard.module.css";
+import { fetchInvoiceChanges, mergeInvoiceChanges, useInvoiceSync } from "../invoiceSync";
 
 interface Invoice {
   invoice_id: string;
@@ -11,6 +12,12 @@ interface Invoice {
   date_created: string;
 }
 
+interface InvoicePage {
+  next: string | null;
+  next_cursor: string | null;
+  results: Invoice[];
+}
+
 interface SubmittedInvoicesProps {
   supplierId: string | null;
   accessToken: string | null;
@@ -19,31 +26,93 @@ interface SubmittedInvoicesProps {
 
 export default function SubmittedInvoices({ accessToken }: SubmittedInvoicesProps) {
   const [invoices, setInvoices] = useState<Invoice[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [syncCursor, setSyncCursor] = useState<string | null>(null);
+  const [reloads, setReloads] = useState(0);
+  const sentinelRef = useRef<HTMLTableRowElement | null>(null);
 
   // ✅ Base URL from environment
   const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
+  const SYNC_URL = `${API_BASE_URL}/invoices/sync/`;
+  const EVENTS_URL = `${API_BASE_URL}/invoices/events/`;
+
+  const fetchPage = useCallback(
+    (cursor: string | null) =>
+      fetch(
+        cursor
+          ? `${API_BASE_URL}/invoices/?cursor=${encodeURIComponent(cursor)}`
+          : `${API_BASE_URL}/invoices/`,
+        {
+          headers: {
+            Authorization: `Bearer ${accessToken}`,
+          },
+        }
+      ).then((res) => {
+        if (!res.ok) throw new Error("Failed to fetch invoices");
+        return res.json() as Promise<InvoicePage>;
+      }),
+    [API_BASE_URL, accessToken]
+  );
 
   useEffect(() => {
     if (!accessToken) return;
 
-    fetch(`${API_BASE_URL}/invoices/`, {
-      headers: {
-        Authorization: `Bearer ${accessToken}`,
-      },
-    })
-      .then((res) => {
-        if (!res.ok) throw new Error("Failed to fetch invoices");
-        return res.json();
-      })
-      .then((data) => {
-        setInvoices(data);
-      })
+    // Take the change feed cursor first so nothing falls between it and the list.
+    fetchInvoiceChanges<Invoice>(SYNC_URL, accessToken, null)
+      .then((start) =>
+        fetchPage(null).then((data) => {
+          setInvoices(data.results);
+          setNextCursor(data.next_cursor);
+          setSyncCursor(start ? start.cursor : null);
+        })
+      )
       .catch((err) => {
         console.error("Error fetching invoices:", err);
       })
       .finally(() => setLoading(false));
-  }, [accessToken]);
+  }, [accessToken, fetchPage, SYNC_URL, reloads]);
+
+  // Follow invoices created, edited or deleted since the list was loaded.
+  useInvoiceSync<Invoice>(
+    SYNC_URL,
+    EVENTS_URL,
+    accessToken,
+    syncCursor,
+    (changes) => setInvoices((prev) => mergeInvoiceChanges(prev, changes)),
+    () => {
+      setSyncCursor(null);
+      setReloads((n) => n + 1);
+    }
+  );
+
+  // Load the next page when the last row scrolls into view.
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !nextCursor || loadingMore) return;
+
+    const observer = new IntersectionObserver((entries) => {
+      if (!entries[0].isIntersecting) return;
+      observer.disconnect();
+      setLoadingMore(true);
+      fetchPage(nextCursor)
+        .then((data) => {
+          setInvoices((prev) => {
+            // Rows the change feed already added are not repeated.
+            const seen = new Set(prev.map((inv) => inv.invoice_id));
+            return [...prev, ...data.results.filter((inv) => !seen.has(inv.invoice_id))];
+          });
+          setNextCursor(data.next_cursor);
+        })
+        .catch((err) => {
+          console.error("Error fetching invoices:", err);
+        })
+        .finally(() => setLoadingMore(false));
+    });
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [nextCursor, loadingMore, fetchPage]);
 
   if (loading) return <p>Loading invoices...</p>;
 
@@ -73,6 +142,11 @@ export default function SubmittedInvoices({ accessToken }: SubmittedInvoicesProp
               <td colSpan={4}>No invoices found</td>
             </tr>
           )}
+          {nextCursor && (
+            <tr ref={sentinelRef}>
+              <td colSpan={4}>{loadingMore ? "Loading more invoices..." : ""}</td>
+            </tr>
+          )}
         </tbody>
       </table>
     </div>
@@ -0,0 +1,200 @@
+// Keeps an already loaded invoice list current by polling the change feed
+// (invoices/sync/ or user/invoices/sync/) instead of re-downloading it.
+// Take the cursor before loading the list, then apply each batch of
+// upserts and deletes; a 410 means the cursor expired and the list must
+// be loaded again. While the invoices/events/ stream is open, its events
+// trigger the polls and the interval polling pauses.
+import { useEffect, useRef } from "react";
+
+const POLL_INTERVAL_MS = 15000;
+const RECONNECT_MS = 5000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+export interface SyncedInvoice {
+  invoice_id: string;
+  date_created: string;
+}
+
+export interface InvoiceChanges<T> {
+  cursor: string;
+  has_more: boolean;
+  upserts: T[];
+  deletes: string[];
+}
+
+export async function fetchInvoiceChanges<T>(
+  syncUrl: string,
+  accessToken: string,
+  cursor: string | null
+): Promise<InvoiceChanges<T> | null> {
+  const res = await fetch(
+    cursor === null ? syncUrl : `${syncUrl}?cursor=${encodeURIComponent(cursor)}`,
+    { headers: { Authorization: `Bearer ${accessToken}` } }
+  );
+  if (res.status === 410) return null;
+  if (!res.ok) throw new Error("Failed to fetch invoice changes");
+  return res.json();
+}
+
+// Apply changes to a newest-first list. New rows older than the last
+// loaded one are left for the paginated list to bring in.
+export function mergeInvoiceChanges<T extends SyncedInvoice>(
+  invoices: T[],
+  changes: InvoiceChanges<T>
+): T[] {
+  if (changes.upserts.length === 0 && changes.deletes.length === 0) return invoices;
+
+  const deleted = new Set(changes.deletes);
+  const upserts = new Map(changes.upserts.map((inv) => [inv.invoice_id, inv]));
+  const oldest = invoices.length ? invoices[invoices.length - 1].date_created : "";
+
+  const merged = invoices
+    .filter((inv) => !deleted.has(inv.invoice_id))
+    .map((inv) => {
+      const updated = upserts.get(inv.invoice_id);
+      upserts.delete(inv.invoice_id);
+      return updated ?? inv;
+    });
+  const added = [...upserts.values()].filter(
+    (inv) => Date.parse(inv.date_created) >= Date.parse(oldest || inv.date_created)
+  );
+  return [...added, ...merged].sort(
+    (a, b) => Date.parse(b.date_created) - Date.parse(a.date_created)
+  );
+}
+
+// Read server-sent events with fetch, since EventSource cannot send the
+// Authorization header. Resolves when the server ends the stream.
+export async function streamInvoiceEvents(
+  eventsUrl: string,
+  accessToken: string,
+  lastEventId: string | null,
+  signal: AbortSignal,
+  onOpen: () => void,
+  onEvent: (id: string | null, name: string, data: string) => void
+): Promise<void> {
+  const headers: Record<string, string> = {
+    Authorization: `Bearer ${accessToken}`,
+    Accept: "text/event-stream",
+  };
+  if (lastEventId !== null) headers["Last-Event-ID"] = lastEventId;
+
+  const res = await fetch(eventsUrl, { headers, signal });
+  if (!res.ok || !res.body) throw new Error("Failed to open invoice events");
+  onOpen();
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let end;
+    while ((end = buffer.indexOf("\n\n")) >= 0) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let id: string | null = null;
+      let name = "";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("id: ")) id = line.slice(4);
+        else if (line.startsWith("event: ")) name = line.slice(7);
+        else if (line.startsWith("data: ")) data = line.slice(6);
+      }
+      // Comments (keepalives) and retry hints carry no event name.
+      if (name) onEvent(id, name, data);
+    }
+  }
+}
+
+// Keep the list current from `cursor` while it is set, handing each batch
+// to onChanges. onExpired is called when the server no longer has the
+// cursor's history.
+export function useInvoiceSync<T>(
+  syncUrl: string,
+  eventsUrl: string,
+  accessToken: string | null,
+  cursor: string | null,
+  onChanges: (changes: InvoiceChanges<T>) => void,
+  onExpired: () => void
+) {
+  const handlers = useRef({ onChanges, onExpired });
+  handlers.current = { onChanges, onExpired };
+
+  useEffect(() => {
+    if (!accessToken || cursor === null) return;
+
+    let current = cursor;
+    let stopped = false;
+    let streaming = false;
+    let polling = false;
+    let pollAgain = false;
+    const controller = new AbortController();
+
+    const poll = async () => {
+      if (polling) {
+        pollAgain = true;
+        return;
+      }
+      polling = true;
+      try {
+        let more = true;
+        while (more && !stopped) {
+          const changes = await fetchInvoiceChanges<T>(syncUrl, accessToken, current);
+          if (stopped) return;
+          if (changes === null) {
+            stopped = true;
+            controller.abort();
+            handlers.current.onExpired();
+            return;
+          }
+          current = changes.cursor;
+          handlers.current.onChanges(changes);
+          more = changes.has_more || pollAgain;
+          pollAgain = false;
+        }
+      } catch (err) {
+        console.error("Error syncing invoices:", err);
+      } finally {
+        polling = false;
+      }
+    };
+
+    const listen = async () => {
+      let lastEventId: string | null = null;
+      while (!stopped) {
+        try {
+          await streamInvoiceEvents(
+            eventsUrl,
+            accessToken,
+            lastEventId,
+            controller.signal,
+            () => {
+              streaming = true;
+              poll();
+            },
+            (id) => {
+              if (id) lastEventId = id;
+              poll();
+            }
+          );
+        } catch (err) {
+          if (!stopped) console.error("Invoice events disconnected:", err);
+        }
+        streaming = false;
+        if (!stopped) await sleep(RECONNECT_MS);
+      }
+    };
+
+    listen();
+    const timer = setInterval(() => {
+      if (!streaming) poll();
+    }, POLL_INTERVAL_MS);
+    return () => {
+      stopped = true;
+      controller.abort();
+      clearInterval(timer);
+    };
+  }, [syncUrl, eventsUrl, accessToken, cursor]);
+}
@@ -9,6 +9,7 @@ import Topbar from "../components/Topbar";
 import SubmitInvoice from "../components/SubmitInvoice";
 import SubmittedInvoices from "../components/SubmittedInvoices";
 import styles from "../styles/Dashboard.module.css";
+import { refreshSupplierTokens, revokeRefreshToken } from "../auth";
 
 type Page = "submit" | "submitted";
 
@@ -17,7 +18,7 @@ export default function Dashboard() {
 
   const supplierId = localStorage.getItem("supplier_id");
   const supplierName = localStorage.getItem("supplier_name");
-  const accessToken = localStorage.getItem("access_token"); // JWT
+  const [accessToken, setAccessToken] = useState(localStorage.getItem("access_token")); // JWT
 
   const [sidebarOpen, setSidebarOpen] = useState(false);
   const [activePage, setActivePage] = useState<Page>("submit");
@@ -27,6 +28,7 @@ export default function Dashboard() {
   //    Secure Logout Handler     -
   // ------------------------------
   const handleLogout = () => {
+    revokeRefreshToken();
     localStorage.clear();
     navigate("/");
 
@@ -87,15 +89,26 @@ useEffect(() => {
     console.groupEnd();
 
     if (timeLeft <= 0) {
-      console.warn("⚠️ Token already expired. Logging out.");
-      handleLogout();
+      // e.g. a reload after a long break: the refresh token may still be good
+      refreshSupplierTokens().then((tokens) => {
+        if (tokens) {
+          setAccessToken(tokens.access_token);
+        } else {
+          console.warn("⚠️ Token already expired. Logging out.");
+          handleLogout();
+        }
+      });
       return;
     }
 
-    // Warn 1 minute before logout
-    const warnTimer = setTimeout(() => {
-      toast.warning("Your session will expire in 1 minute.", { autoClose: 60000 });
-      console.info("⚠️ 1-minute warning toast shown.");
+    // Renew the session 1 minute before expiry; log out only if that fails
+    const refreshTimer = setTimeout(async () => {
+      const tokens = await refreshSupplierTokens();
+      if (tokens) {
+        setAccessToken(tokens.access_token);
+      } else {
+        toast.warning("Your session will expire in 1 minute.", { autoClose: 60000 });
+      }
     }, Math.max(timeLeft - 60000, 0));
 
     // Auto logout at expiration
@@ -108,7 +121,7 @@ useEffect(() => {
     //  Cleanup timers to prevent memory leaks  -
     // ------------------------------------------
     return () => {
-      clearTimeout(warnTimer);
+      clearTimeout(refreshTimer);
       clearTimeout(logoutTimer);
     };
   }, [accessToken, navigate]);
@@ -6,6 +6,16 @@ import "react-toastify/dist/ReactToastify.css";
 import styles from "../styles/PinPage.module.css";
 
 
+// Random id for this browser, so verify-pin can throttle failures per device.
+function deviceId() {
+  let id = localStorage.getItem("device_id");
+  if (!id) {
+    id = crypto.randomUUID();
+    localStorage.setItem("device_id", id);
+  }
+  return id;
+}
+
 function PinPage() {
   const PIN_LENGTH = 6;
   const [pin, setPin] = useState<string[]>(Array(PIN_LENGTH).fill(""));
@@ -57,9 +67,11 @@ function PinPage() {
     setLoading(true);
 
     try {
-      const response = await axios.post(`${API_BASE_URL}/verify-pin/`, {
-          pin_code: enteredPin,
-      });
+      const response = await axios.post(
+        `${API_BASE_URL}/verify-pin/`,
+        { pin_code: enteredPin },
+        { headers: { "X-Device-Id": deviceId() } }
+      );
       // console.log("✅ API Response:", response.data); // show full JSON in console
 
       toast.success("PIN verified successfully!", {
@@ -75,6 +87,13 @@ function PinPage() {
     catch (error: any) {
       if (error.response?.status === 401) {
             toast.error("Invalid PIN.");
+      } else if (error.response?.status === 429) {
+            const wait = Number(error.response.headers["retry-after"]);
+            toast.error(
+              wait
+                ? `Too many attempts. Try again in ${Math.ceil(wait / 60)} minute(s).`
+                : "Too many attempts. Try again later."
+            );
       } else {
             toast.error("Account locked.");
       }
@@ -0,0 +1,92 @@
+// Resumable invoice upload for slow or flaky links (ships, ports).
+// Protocol: create a session, PUT checksummed chunks at the server's offset,
+// then finalize with the invoice fields. A dropped chunk is retried from
+// whatever offset the server last acknowledged.
+
+const MAX_ATTEMPTS = 8;
+
+interface UploadSession {
+  upload_id: string;
+  received_size: number;
+  total_size: number;
+  chunk_size: number;
+}
+
+async function sha256Hex(data: ArrayBuffer): Promise<string> {
+  const digest = await crypto.subtle.digest("SHA-256", data);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+export async function uploadInvoiceResumable(
+  apiBaseUrl: string,
+  accessToken: string,
+  file: File,
+  fields: Record<string, string>,
+  onProgress?: (sent: number, total: number) => void
+): Promise<Response> {
+  const authHeader = { Authorization: `Bearer ${accessToken}` };
+
+  const createRes = await fetch(`${apiBaseUrl}/invoices/uploads/`, {
+    method: "POST",
+    headers: { ...authHeader, "Content-Type": "application/json" },
+    body: JSON.stringify({
+      filename: file.name,
+      total_size: file.size,
+      sha256: await sha256Hex(await file.arrayBuffer()),
+    }),
+  });
+  if (!createRes.ok) return createRes;
+
+  let session: UploadSession = await createRes.json();
+  const sessionUrl = `${apiBaseUrl}/invoices/uploads/${session.upload_id}/`;
+  let attempts = 0;
+
+  while (session.received_size < session.total_size) {
+    const start = session.received_size;
+    const end = Math.min(start + session.chunk_size, session.total_size);
+    const chunk = await file.slice(start, end).arrayBuffer();
+
+    try {
+      const chunkRes = await fetch(sessionUrl, {
+        method: "PUT",
+        headers: {
+          ...authHeader,
+          "Content-Type": "application/octet-stream",
+          "Content-Range": `bytes ${start}-${end - 1}/${session.total_size}`,
+          "X-Chunk-SHA256": await sha256Hex(chunk),
+        },
+        body: chunk,
+      });
+      if (chunkRes.status >= 400 && chunkRes.status < 500 && chunkRes.status !== 409) {
+        return chunkRes;
+      }
+      if (!chunkRes.ok) throw new Error(`Chunk upload failed (${chunkRes.status})`);
+
+      session = await chunkRes.json();
+      attempts = 0;
+      onProgress?.(session.received_size, session.total_size);
+    } catch (err) {
+      attempts += 1;
+      if (attempts >= MAX_ATTEMPTS) throw err;
+      await sleep(Math.min(1000 * 2 ** attempts, 30000));
+
+      // Ask the server where to resume from; the last chunk may have landed.
+      try {
+        const statusRes = await fetch(sessionUrl, { headers: authHeader });
+        if (statusRes.ok) session = await statusRes.json();
+      } catch {
+        // Still offline; the next loop iteration retries the same chunk.
+      }
+    }
+  }
+
+  return fetch(`${sessionUrl}finalize/`, {
+    method: "POST",
+    headers: { ...authHeader, "Content-Type": "application/json" },
+    body: JSON.stringify(fields),
+  });
+}